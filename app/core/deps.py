@@ -1,10 +1,10 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt, ExpiredSignatureError
-from datetime import datetime, timezone
 
 # importar la misma configuración desde security.py
 from .security import SECRET_KEY, ALGORITHM
+from .token_cache import token_cache, token_digest
 
 security = HTTPBearer(auto_error=True)  # forzar comportamiento en Swagger (candado)
 
@@ -14,25 +14,37 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
                             detail="Token requerido",
                             headers={"WWW-Authenticate": "Bearer"})
 
-    token = credentials.credentials
+    return user_from_token(credentials.credentials)
+
+
+def user_from_token(token: str) -> dict:
+    """Valida el JWT (o lo toma de la caché) y devuelve {uid, email, role}; si no, HTTPException 401."""
+    # token ya verificado: sin HMAC ni parseo de claims (la entrada vence antes que `exp`)
+    digest = token_digest(token)
+    cached = token_cache.get(digest)
+    if cached is not None:
+        return dict(cached)
+
     try:
+        # jose ya valida firma y `exp`
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
         role: str = payload.get("role")
         uid: str = payload.get("uid")
-        exp: int = payload.get("exp")
 
         if not email or not role:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
                                 detail="Token inválido: falta información (sub o role)",
                                 headers={"WWW-Authenticate": "Bearer"})
 
-        if exp and datetime.fromtimestamp(exp, tz=timezone.utc) < datetime.now(tz=timezone.utc):
+        if token_cache.is_revoked(uid, payload.get("iat")):
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
-                                detail="Token expirado",
+                                detail="Token revocado",
                                 headers={"WWW-Authenticate": "Bearer"})
 
-        return {"uid": uid, "email": email, "role": role}
+        user = {"uid": uid, "email": email, "role": role}
+        token_cache.put(digest, user, payload.get("exp"), payload.get("iat"))
+        return dict(user)
 
     except ExpiredSignatureError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
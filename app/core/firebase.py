@@ -1,12 +1,88 @@
+import atexit
+import os
+import threading
+
 import firebase_admin
 from firebase_admin import credentials, db
 from .config import settings
+from .rtdb_memory import MemoryTree, parse_latency
+
+# firebase (por defecto) | memory: emulador en proceso, sin credenciales ni red
+RTDB_BACKEND = os.getenv("RTDB_BACKEND", "firebase").strip().lower()
+# Solo con RTDB_BACKEND=memory:
+RTDB_MEMORY_FILE = os.getenv("RTDB_MEMORY_FILE") or None  # JSON donde persistir el árbol
+RTDB_MEMORY_FLUSH_SECONDS = float(os.getenv("RTDB_MEMORY_FLUSH_SECONDS", "1"))
+RTDB_LATENCY_MS = os.getenv("RTDB_LATENCY_MS", "")  # "40" o "20-80" por operación
+
+_memory_tree = None
+_memory_lock = threading.Lock()
+
+def memory_tree() -> MemoryTree:
+    """Árbol del emulador (uno por proceso), creado en el primer uso."""
+    global _memory_tree
+    if _memory_tree is None:
+        with _memory_lock:
+            if _memory_tree is None:
+                tree = MemoryTree(
+                    path=RTDB_MEMORY_FILE,
+                    latency=parse_latency(RTDB_LATENCY_MS),
+                    flush_interval=RTDB_MEMORY_FLUSH_SECONDS,
+                )
+                atexit.register(tree.flush)
+                _memory_tree = tree
+    return _memory_tree
+
+def use_memory() -> bool:
+    return RTDB_BACKEND == "memory"
 
 def init_firebase():
+    if use_memory():
+        memory_tree()
+        return
     if firebase_admin._apps:
         return
     cred = credentials.Certificate(settings.cred_dict())
     firebase_admin.initialize_app(cred, {"databaseURL": settings.FIREBASE_DB_URL})
 
 def rtdb(path="/"):
-    return db.reference(path)
\ No newline at end of file
+    if use_memory():
+        return memory_tree().reference(path)
+    return db.reference(path)
+
+def iter_pages(path: str, page_size: int = 500, start_key: str | None = None):
+    """
+    Recorre los hijos de `path` por páginas de claves (order_by_key + start_at),
+    sin bajar la rama entera. Cada página es una lista [(key, value), ...].
+    `start_key` es exclusivo (la última clave ya procesada).
+    """
+    last_key = start_key
+    while True:
+        query = rtdb(path).order_by_key()
+        if last_key is not None:
+            query = query.start_at(last_key)
+        # +1 porque start_at incluye la última clave de la página anterior
+        want = page_size + (1 if last_key is not None else 0)
+        page = query.limit_to_first(want).get() or {}
+        items = [(k, v) for k, v in page.items() if k != last_key]
+        if not items:
+            return
+        yield items
+        if len(page) < want:
+            return
+        last_key = items[-1][0]
+
+def key_page(path: str, limit: int, after: str | None = None):
+    """
+    Una sola página de hijos de `path` por clave (keyset): ([(key, value)], next_key).
+    `after` es exclusivo; next_key es None cuando no hay más páginas.
+    Se pide un elemento extra para saber si existe una página siguiente.
+    """
+    query = rtdb(path).order_by_key()
+    if after is not None:
+        query = query.start_at(after)
+    want = limit + 1 + (1 if after is not None else 0)
+    page = query.limit_to_first(want).get() or {}
+    items = [(k, v) for k, v in page.items() if k != after]
+    if len(items) > limit:
+        return items[:limit], items[limit - 1][0]
+    return items, None
@@ -0,0 +1,75 @@
+import secrets
+import threading
+import time
+from typing import List, Optional
+
+# IDs estilo push de Firebase: 8 caracteres de timestamp (ms) + 12 aleatorios.
+# El alfabeto está en orden ASCII, así que el orden de claves de RTDB
+# (order_by_key) es el orden de creación.
+PUSH_CHARS = "-0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ_abcdefghijklmnopqrstuvwxyz"
+PUSH_ID_LENGTH = 20
+
+# Todo push ID generado antes del año ~2109 empieza con "-", que ordena antes
+# que los dígitos y letras de los uuid4 legacy: end_at(PUSH_ID_END) acota
+# la consulta a los IDs nuevos.
+PUSH_ID_PREFIX = "-"
+PUSH_ID_END = PUSH_ID_PREFIX + "\uf8ff"
+
+_lock = threading.Lock()
+_last_ms = -1
+_last_rand: List[int] = [0] * 12
+
+
+def _encode_time(ms: int) -> str:
+    chars = []
+    for _ in range(8):
+        chars.append(PUSH_CHARS[ms % 64])
+        ms //= 64
+    return "".join(reversed(chars))
+
+
+def push_id(now_ms: Optional[int] = None) -> str:
+    """
+    Nuevo ID ordenable por tiempo. Dentro del mismo milisegundo la parte
+    aleatoria se incrementa en 1, así que los IDs siguen siendo únicos y crecientes.
+    """
+    global _last_ms
+    ms = int(time.time() * 1000) if now_ms is None else now_ms
+    with _lock:
+        if ms <= _last_ms:
+            # mismo ms (o reloj hacia atrás): se reutiliza el último tiempo + 1 en la parte aleatoria
+            ms = _last_ms
+            i = 11
+            while i >= 0 and _last_rand[i] == 63:
+                _last_rand[i] = 0
+                i -= 1
+            if i < 0:
+                raise RuntimeError("Demasiados IDs en el mismo milisegundo")
+            _last_rand[i] += 1
+        else:
+            for i in range(12):
+                _last_rand[i] = secrets.randbelow(64)
+        _last_ms = ms
+        return _encode_time(ms) + "".join(PUSH_CHARS[n] for n in _last_rand)
+
+
+def is_push_id(key: Optional[str]) -> bool:
+    return (
+        isinstance(key, str)
+        and len(key) == PUSH_ID_LENGTH
+        and key.startswith(PUSH_ID_PREFIX)
+        and all(c in PUSH_CHARS for c in key)
+    )
+
+
+def push_id_time(key: str) -> int:
+    """Milisegundos epoch codificados en un push ID."""
+    ms = 0
+    for c in key[:8]:
+        ms = ms * 64 + PUSH_CHARS.index(c)
+    return ms
+
+
+def push_id_bound(ms: int, upper: bool = False) -> str:
+    """Menor (o mayor) push ID posible para un instante: límites de rangos por tiempo."""
+    return _encode_time(ms) + (PUSH_CHARS[-1] if upper else PUSH_CHARS[0]) * 12
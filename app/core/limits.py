@@ -0,0 +1,205 @@
+"""
+Control de admisión para los endpoints pesados (voz).
+
+Cada grupo de rutas tiene un límite de ejecuciones simultáneas y una cola
+acotada. Si la cola está llena, o la espera supera LIMIT_QUEUE_TIMEOUT, se
+responde 503 con Retry-After al instante en vez de aceptar más trabajo. Así
+unas cuantas subidas grandes no dejan sin CPU/memoria a /sales y al resto del CRUD.
+
+Se aplica como middleware ASGI, antes de leer el cuerpo: una subida rechazada
+no se recibe entera. En las rutas con login (AUTH_REQUIRED) primero se valida
+el bearer token: una request sin token válido no ocupa cupo y sigue hasta la
+app, que responde 401. Un WebSocket ocupa su cupo mientras la sesión está
+abierta; si no hay cupo se acepta y se cierra enseguida con el código 1013
+(try again later), para que el cliente vea el código y no un 403 del handshake.
+
+  TRANSCRIBE_MAX_CONCURRENCY / TRANSCRIBE_MAX_QUEUE    POST /api/transcribe
+  TTS_MAX_CONCURRENCY / TTS_MAX_QUEUE                  POST /nlp/tts
+  REALTIME_WS_MAX_SESSIONS / REALTIME_WS_MAX_QUEUE     /api/realtime/ws
+"""
+import asyncio
+import json
+import os
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from .deps import user_from_token
+
+LIMIT_QUEUE_TIMEOUT = float(os.getenv("LIMIT_QUEUE_TIMEOUT", "10"))
+LIMIT_RETRY_AFTER = int(os.getenv("LIMIT_RETRY_AFTER", "5"))
+
+
+class LimiterBusy(RuntimeError):
+    """Sin cupo ni lugar en la cola: reintentar más tarde."""
+
+
+class ConcurrencyLimiter:
+    """Semáforo con cola acotada y timeout de espera (un solo event loop, sin locks)."""
+
+    def __init__(self, name: str, limit: int, max_queue: int, queue_timeout: float = LIMIT_QUEUE_TIMEOUT):
+        self.name = name
+        self.limit = max(limit, 1)
+        self.max_queue = max(max_queue, 0)
+        self.queue_timeout = queue_timeout
+        self._waiters: Deque[asyncio.Future] = deque()
+        # métricas
+        self.active = 0
+        self.admitted = 0
+        self.rejected_full = 0
+        self.rejected_timeout = 0
+        self.max_queue_seen = 0
+
+    async def acquire(self) -> None:
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            self.rejected_full += 1
+            raise LimiterBusy(f"{self.name}: sin cupo, intenta de nuevo en unos segundos")
+
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        self.max_queue_seen = max(self.max_queue_seen, len(self._waiters))
+        try:
+            await asyncio.wait_for(fut, self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if fut.done() and not fut.cancelled():
+                # el cupo llegó justo al vencer la espera: se pasa al siguiente
+                self.release()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.rejected_timeout += 1
+            raise LimiterBusy(f"{self.name}: tiempo de espera agotado, intenta de nuevo en unos segundos")
+        finally:
+            try:
+                self._waiters.remove(fut)
+            except ValueError:
+                pass
+        self.admitted += 1  # el cupo lo cedió release(); active no cambia
+
+    def release(self) -> None:
+        while self._waiters:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                fut.set_result(None)
+                return
+        self.active -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "queued": len(self._waiters),
+            "max_queue_seen": self.max_queue_seen,
+            "admitted": self.admitted,
+            "rejected_full": self.rejected_full,
+            "rejected_timeout": self.rejected_timeout,
+        }
+
+
+# (prefijo de ruta, limitador). Se compara con startswith, en orden.
+ROUTE_LIMITS: List[Tuple[str, ConcurrencyLimiter]] = [
+    ("/api/transcribe", ConcurrencyLimiter(
+        "transcribe",
+        int(os.getenv("TRANSCRIBE_MAX_CONCURRENCY", str(min(2, os.cpu_count() or 1)))),
+        int(os.getenv("TRANSCRIBE_MAX_QUEUE", "8")),
+    )),
+    ("/nlp/tts", ConcurrencyLimiter(
+        "tts",
+        int(os.getenv("TTS_MAX_CONCURRENCY", "4")),
+        int(os.getenv("TTS_MAX_QUEUE", "16")),
+    )),
+    ("/api/realtime/ws", ConcurrencyLimiter(
+        "realtime_ws",
+        int(os.getenv("REALTIME_WS_MAX_SESSIONS", "8")),
+        int(os.getenv("REALTIME_WS_MAX_QUEUE", "0")),
+    )),
+]
+
+# rutas que no cuentan (p. ej. /api/transcribe/health)
+EXEMPT_SUFFIXES = ("/health",)
+
+# grupos cuyas rutas exigen login: sin token válido no se toma cupo
+AUTH_REQUIRED = {"tts"}
+
+
+def limiter_for(path: str) -> Optional[ConcurrencyLimiter]:
+    if path.endswith(EXEMPT_SUFFIXES):
+        return None
+    for prefix, limiter in ROUTE_LIMITS:
+        if path == prefix or path.startswith(prefix + "/"):
+            return limiter
+    return None
+
+
+def limits_stats() -> Dict[str, Dict[str, Any]]:
+    return {limiter.name: limiter.stats() for _, limiter in ROUTE_LIMITS}
+
+
+class ConcurrencyLimitMiddleware:
+    """Middleware ASGI: ocupa un cupo del grupo durante toda la request o sesión WS."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            return await self.app(scope, receive, send)
+        limiter = limiter_for(scope.get("path", ""))
+        if limiter is None or scope.get("method") == "OPTIONS":
+            return await self.app(scope, receive, send)
+        if limiter.name in AUTH_REQUIRED and not _authenticated(scope):
+            return await self.app(scope, receive, send)  # la dependencia de login responde 401
+
+        try:
+            await limiter.acquire()
+        except LimiterBusy as e:
+            if scope["type"] == "websocket":
+                await _close_busy(receive, send, str(e))
+            else:
+                await _send_busy(send, str(e))
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
+
+
+def _authenticated(scope) -> bool:
+    for name, value in scope.get("headers") or ():
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer" or not token:
+                return False
+            try:
+                user_from_token(token.strip())  # queda en token_cache: get_current_user no lo decodifica otra vez
+            except HTTPException:
+                return False
+            return True
+    return False
+
+
+async def _close_busy(receive, send, reason: str) -> None:
+    message = await receive()
+    if message["type"] != "websocket.connect":
+        return
+    await send({"type": "websocket.accept"})
+    await send({"type": "websocket.close", "code": 1013, "reason": reason[:120]})
+
+
+async def _send_busy(send, detail: str) -> None:
+    body = json.dumps({"detail": detail}).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": 503,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(LIMIT_RETRY_AFTER).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,38 @@
+import base64
+import json
+from typing import Any, Dict, Optional
+
+# Cursores opacos para paginación keyset: el cliente solo reenvía lo que
+# recibió en el header X-Next-Cursor; el contenido puede cambiar sin romperlo.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(position: Optional[Dict[str, Any]]) -> Optional[str]:
+    if not position:
+        return None
+    raw = json.dumps(position, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Dict[str, Any]]:
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        position = json.loads(raw.decode("utf-8"))
+    except Exception:
+        raise ValueError("cursor inválido")
+    if not isinstance(position, dict):
+        raise ValueError("cursor inválido")
+    return position
+
+
+def cursor_key(cursor: Optional[str]) -> Optional[str]:
+    """Cursor de listas ordenadas por clave RTDB -> última clave entregada."""
+    position = decode_cursor(cursor)
+    if position is None:
+        return None
+    key = position.get("k")
+    if not isinstance(key, str) or not key:
+        raise ValueError("cursor inválido")
+    return key
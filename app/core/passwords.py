@@ -0,0 +1,125 @@
+"""
+Hash y verificación de contraseñas (bcrypt) fuera del hilo de la request.
+
+Un solo CryptContext y un pool acotado para todo el proceso (AuthService y
+UserService). bcrypt libera el GIL mientras calcula, así que un pool de hilos
+aprovecha varios núcleos sin el costo de un pool de procesos.
+
+- PASSWORD_HASH_WORKERS: hashes en paralelo.
+- PASSWORD_HASH_MAX_QUEUE: cuántos más pueden esperar turno; pasado eso se
+  rechaza con PasswordHasherBusy (el router responde 503 + Retry-After) en vez
+  de acumular logins que igual llegarían tarde.
+- PASSWORD_BCRYPT_ROUNDS: costo. Si cambia, verify_and_update() devuelve el
+  hash nuevo para que el login lo guarde (rehash transparente).
+"""
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from passlib.context import CryptContext
+
+PASSWORD_BCRYPT_ROUNDS = int(os.getenv("PASSWORD_BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64"))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=PASSWORD_BCRYPT_ROUNDS)
+
+
+class PasswordHasherBusy(RuntimeError):
+    """La cola de hashing está llena: reintentar más tarde."""
+
+
+class PasswordHasher:
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_queue: int = PASSWORD_HASH_MAX_QUEUE):
+        self._pool = ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="pwd-hash")
+        self._slots = threading.BoundedSemaphore(max(workers, 1) + max(max_queue, 0))
+        self._lock = threading.Lock()
+        self._workers = max(workers, 1)
+        # métricas
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+        self._busy_seconds = 0.0
+        self._wait_seconds = 0.0
+
+    # ---------- API ----------
+    def hash(self, password: str) -> str:
+        return self._submit(pwd_context.hash, password).result()
+
+    def verify_and_update(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        """(coincide, hash nuevo si el guardado usa otro costo/esquema; si no None)."""
+        return self._submit(self._verify_and_update, password, hashed).result()
+
+    async def ahash(self, password: str) -> str:
+        return await asyncio.wrap_future(self._submit(pwd_context.hash, password))
+
+    async def averify_and_update(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        """Como verify_and_update, sin ocupar un hilo del threadpool mientras espera."""
+        return await asyncio.wrap_future(self._submit(self._verify_and_update, password, hashed))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            done = self.completed or 1
+            return {
+                "workers": self._workers,
+                "rounds": PASSWORD_BCRYPT_ROUNDS,
+                "in_flight": self.in_flight,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "rehashed": self.rehashed,
+                "avg_hash_ms": round(self._busy_seconds / done * 1000, 1),
+                "avg_wait_ms": round(self._wait_seconds / done * 1000, 1),
+            }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    # ---------- internos ----------
+    def _verify_and_update(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        try:
+            ok, new_hash = pwd_context.verify_and_update(password, hashed)
+        except (ValueError, TypeError):
+            return False, None  # hash guardado corrupto o de un esquema desconocido
+        if ok and new_hash:
+            with self._lock:
+                self.rehashed += 1
+        return ok, new_hash
+
+    def _submit(self, fn: Callable, *args) -> Future:
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PasswordHasherBusy("Demasiados logins en cola, intenta de nuevo en unos segundos")
+        queued_at = time.perf_counter()
+        with self._lock:
+            self.in_flight += 1
+
+        def run():
+            started = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                finished = time.perf_counter()
+                with self._lock:
+                    self.in_flight -= 1
+                    self.completed += 1
+                    self._wait_seconds += started - queued_at
+                    self._busy_seconds += finished - started
+                self._slots.release()
+
+        try:
+            return self._pool.submit(run)
+        except RuntimeError:
+            # pool cerrado (shutdown): se libera el cupo tomado
+            with self._lock:
+                self.in_flight -= 1
+            self._slots.release()
+            raise
+
+
+# Instancia compartida del proceso
+password_hasher = PasswordHasher()
@@ -0,0 +1,444 @@
+"""
+Réplica de lectura local en SQLite (opcional, READ_REPLICA_PATH).
+
+Copia /products, /users y las particiones /sales_by_month en tablas con
+índices, mantenida al día con rtdb().listen():
+
+- products y users: un listener por rama (el primer evento trae el snapshot).
+- ventas: un listener por cada uno de los últimos READ_REPLICA_LIVE_MONTHS
+  meses; los meses anteriores se cargan una vez por páginas y no se vuelven a
+  bajar. La posición de sincronización (synced_at por rama y por mes) queda en
+  la tabla sync_state, así que al reiniciar solo se recargan los meses que
+  seguían abiertos la última vez y la réplica sirve lecturas desde el arranque.
+- Las ventas salen de la réplica solo con la migración de particiones completa
+  (SaleRepo.partitions_ready): antes las particiones no tienen la historia que
+  sigue solo en /sales, y ready("sales") es False.
+- Las escrituras de este proceso (SaleRepo, UserRepo) se aplican al instante con
+  apply_sale/remove_sale, como product_catalog.apply.
+
+Los repos consultan la réplica solo si está lista (listener activo o última
+sincronización dentro de READ_REPLICA_MAX_STALENESS); si no, van a RTDB.
+Mientras RTDB no responde, las lecturas siguen saliendo de la réplica.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .firebase import iter_pages, rtdb
+from .rtdb_query import key_rank
+
+READ_REPLICA_PATH = os.getenv("READ_REPLICA_PATH", "")  # vacío = sin réplica
+READ_REPLICA_LIVE_MONTHS = int(os.getenv("READ_REPLICA_LIVE_MONTHS", "2"))
+READ_REPLICA_MAX_STALENESS = float(os.getenv("READ_REPLICA_MAX_STALENESS", "3600"))
+READ_REPLICA_REFRESH_SECONDS = float(os.getenv("READ_REPLICA_REFRESH_SECONDS", "60"))
+
+# mismas rutas que los repos
+PRODUCTS_PATH = "/products"
+USERS_PATH = "/users"
+SALES_BY_MONTH_PATH = "/sales_by_month"
+
+logger = logging.getLogger(__name__)
+
+# Orden de claves de RTDB en SQL, igual que rtdb_query.key_rank: claves enteras
+# (32 bits) primero y en orden numérico, luego strings. Así un cursor sirve igual
+# contra la réplica y contra RTDB.
+_KEY_IS_INT = ("(CAST(CAST(id AS INTEGER) AS TEXT) = id"
+               " AND CAST(id AS INTEGER) BETWEEN -2147483648 AND 2147483647)")
+_KEY_ORDER = (f"(CASE WHEN {_KEY_IS_INT} THEN 0 ELSE 1 END),"
+              f" (CASE WHEN {_KEY_IS_INT} THEN CAST(id AS INTEGER) ELSE 0 END), id")
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS products (
+    id TEXT PRIMARY KEY, name TEXT, price REAL, status TEXT, created_at TEXT, doc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS products_created_at ON products (created_at);
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY, email TEXT, role TEXT, disabled INTEGER, doc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS users_email ON users (email);
+CREATE TABLE IF NOT EXISTS sales (
+    id TEXT PRIMARY KEY, month TEXT NOT NULL, date TEXT, product_id TEXT,
+    payment_method TEXT, quantity REAL, total_cents INTEGER, doc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sales_date ON sales (date);
+CREATE INDEX IF NOT EXISTS sales_product_date ON sales (product_id, date);
+CREATE INDEX IF NOT EXISTS sales_month ON sales (month);
+CREATE INDEX IF NOT EXISTS sales_key_rank ON sales ({_KEY_ORDER});
+CREATE TABLE IF NOT EXISTS sync_state (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+
+def _split_path(path: str) -> List[str]:
+    return [p for p in (path or "").split("/") if p]
+
+
+def _number(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _text(value: Any) -> Optional[str]:
+    return value if isinstance(value, str) else None
+
+
+def _product_row(pid: str, doc: Dict[str, Any]) -> Tuple:
+    return (pid, _text(doc.get("name")), _number(doc.get("price")), _text(doc.get("status")),
+            _text(doc.get("created_at")), json.dumps(doc, ensure_ascii=False))
+
+
+def _user_row(uid: str, doc: Dict[str, Any]) -> Tuple:
+    return (uid, _text(doc.get("email")), _text(doc.get("role")), 1 if doc.get("disabled") else 0,
+            json.dumps(doc, ensure_ascii=False))
+
+
+def _sale_row(month: str, sid: str, doc: Dict[str, Any]) -> Tuple:
+    total = _number(doc.get("total"))
+    return (sid, month, _text(doc.get("date")), _text(doc.get("product_id")),
+            _text(doc.get("payment_method")), _number(doc.get("quantity")),
+            int(round(total * 100)) if total is not None else None, json.dumps(doc, ensure_ascii=False))
+
+
+_INSERT = {
+    "products": "INSERT OR REPLACE INTO products VALUES (?, ?, ?, ?, ?, ?)",
+    "users": "INSERT OR REPLACE INTO users VALUES (?, ?, ?, ?, ?)",
+    "sales": "INSERT OR REPLACE INTO sales VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+}
+
+
+def _month_index(month: str) -> int:
+    return int(month[:4]) * 12 + int(month[5:7]) - 1
+
+
+def _month_of(index: int) -> str:
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def _month_start(index: int) -> float:
+    """Timestamp UTC del primer día del mes `index` (año * 12 + mes - 1)."""
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc).timestamp()
+
+
+def live_months(now: Optional[datetime] = None, count: int = READ_REPLICA_LIVE_MONTHS) -> List[str]:
+    """Meses que se escuchan en vivo: el actual y los count-1 anteriores."""
+    now = now or datetime.now(timezone.utc)
+    current = now.year * 12 + now.month - 1
+    return [_month_of(i) for i in range(current - max(count, 1) + 1, current + 1)]
+
+
+class ReadReplica:
+    def __init__(self, path: str):
+        self._path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._listeners: Dict[str, Any] = {}
+        self._live: Dict[str, bool] = {}
+        self._stop = threading.Event()
+        self._refresher: Optional[threading.Thread] = None
+        self._sales_loaded = False
+        with self._write_lock:
+            conn = self._conn()
+            conn.executescript(SCHEMA)
+            conn.commit()
+        # "2": cargada con las particiones completas (un "1" viene de antes del chequeo)
+        self._sales_loaded = self._state("sales_loaded") == "2"
+        # contadores
+        self.events = 0
+        self.reads = 0
+
+    # ---------- conexión ----------
+    def _conn(self) -> sqlite3.Connection:
+        """Una conexión por hilo (WAL: lectores concurrentes con un escritor)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _state(self, key: str) -> Optional[str]:
+        row = self._conn().execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _set_state(conn: sqlite3.Connection, key: str, value: Any) -> None:
+        conn.execute("INSERT OR REPLACE INTO sync_state VALUES (?, ?)", (key, str(value)))
+
+    # ---------- ciclo de vida ----------
+    def start(self) -> None:
+        self._listen("products", PRODUCTS_PATH)
+        self._listen("users", USERS_PATH)
+        self._refresher = threading.Thread(target=self._refresh_loop, name="read-replica", daemon=True)
+        self._refresher.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        listeners, self._listeners = self._listeners, {}
+        for listener in listeners.values():
+            try:
+                listener.close()
+            except Exception:
+                pass
+        self._live.clear()
+
+    def _refresh_loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.sync_sales()
+                # un listener caído (cancel) se vuelve a abrir en la siguiente vuelta
+                for table, path in (("products", PRODUCTS_PATH), ("users", USERS_PATH)):
+                    if table not in self._listeners:
+                        self._listen(table, path)
+            except Exception:
+                logger.exception("réplica: sincronización fallida")
+            self._stop.wait(READ_REPLICA_REFRESH_SECONDS)
+
+    def sync_sales(self) -> None:
+        """
+        Escucha los meses vivos y carga (una vez) los meses cerrados que falten.
+        Un mes cerrado se recarga si su última sincronización fue antes de que
+        terminara (estaba vivo cuando el proceso anterior se detuvo).
+
+        Hasta que la migración de particiones termine no se cargan los meses
+        cerrados: la migración todavía les está copiando ventas de /sales.
+        """
+        from ..repositories.sale_repo import partitions_ready  # sale_repo importa este módulo
+
+        live = live_months()
+        for month in live:
+            if f"sales:{month}" not in self._listeners:
+                self._listen("sales", f"{SALES_BY_MONTH_PATH}/{month}", month)
+        for key in [k for k in self._listeners if k.startswith("sales:") and k[6:] not in live]:
+            listener = self._listeners.pop(key)
+            self._live.pop(key, None)
+            listener.close()
+
+        if not partitions_ready():
+            return
+        months = rtdb(SALES_BY_MONTH_PATH).get(shallow=True)
+        for month in sorted(months) if isinstance(months, dict) else []:
+            if month in live:
+                continue
+            synced_at = float(self._state(f"sales:{month}") or 0)
+            # sin carga completa previa se recarga todo: pudo leerse a mitad de la migración
+            if not self._sales_loaded or synced_at < _month_start(_month_index(month) + 1):
+                self._load_month(month)
+        if not self._sales_loaded:
+            with self._write_lock:
+                conn = self._conn()
+                self._set_state(conn, "sales_loaded", 2)
+                conn.commit()
+            self._sales_loaded = True
+
+    def _load_month(self, month: str) -> None:
+        rows = [
+            _sale_row(month, sid, doc)
+            for page in iter_pages(f"{SALES_BY_MONTH_PATH}/{month}", 1000)
+            for sid, doc in page
+            if isinstance(doc, dict)
+        ]
+        with self._write_lock:
+            conn = self._conn()
+            conn.execute("DELETE FROM sales WHERE month = ?", (month,))
+            conn.executemany(_INSERT["sales"], rows)
+            self._set_state(conn, f"sales:{month}", time.time())
+            conn.commit()
+
+    # ---------- listeners ----------
+    def _listen(self, table: str, path: str, month: Optional[str] = None) -> None:
+        key = f"sales:{month}" if month else table
+        try:
+            self._listeners[key] = rtdb(path).listen(
+                lambda event: self._on_event(key, table, month, event)
+            )
+        except Exception:
+            logger.exception("réplica: no se pudo escuchar %s", path)
+
+    def _on_event(self, key: str, table: str, month: Optional[str], event) -> None:
+        etype = getattr(event, "event_type", None)
+        if etype not in ("put", "patch"):
+            if etype in ("cancel", "auth_revoked"):
+                self._live[key] = False
+                self._listeners.pop(key, None)
+            return
+
+        parts = _split_path(event.path)
+        changes = [(parts, event.data)] if etype == "put" else [
+            (parts + _split_path(rel), value) for rel, value in (event.data or {}).items()
+        ]
+        with self._write_lock:
+            conn = self._conn()
+            for change_parts, value in changes:
+                self._apply(conn, table, month, change_parts, value)
+            self._set_state(conn, key if table == "sales" else f"{table}_synced_at", time.time())
+            conn.commit()
+        self.events += 1
+        self._live[key] = True
+
+    def _apply(self, conn: sqlite3.Connection, table: str, month: Optional[str],
+               parts: List[str], value: Any) -> None:
+        build: Callable[[str, Dict[str, Any]], Tuple] = (
+            _product_row if table == "products" else _user_row if table == "users"
+            else (lambda sid, doc: _sale_row(month, sid, doc))
+        )
+        if not parts:
+            # snapshot completo de la rama (o del mes)
+            if table == "sales":
+                conn.execute("DELETE FROM sales WHERE month = ?", (month,))
+            else:
+                conn.execute(f"DELETE FROM {table}")
+            src = value if isinstance(value, dict) else {}
+            conn.executemany(_INSERT[table], [build(k, v) for k, v in src.items() if isinstance(v, dict)])
+            return
+
+        doc_id = parts[0]
+        if len(parts) > 1:
+            # cambio de un campo: se aplica sobre el doc guardado
+            row = conn.execute(f"SELECT doc FROM {table} WHERE id = ?", (doc_id,)).fetchone()
+            doc = json.loads(row[0]) if row else {}
+            node = doc
+            for p in parts[1:-1]:
+                child = node.get(p)
+                node[p] = child if isinstance(child, dict) else {}
+                node = node[p]
+            if value is None:
+                node.pop(parts[-1], None)
+            else:
+                node[parts[-1]] = value
+            value = doc or None
+        if isinstance(value, dict):
+            conn.execute(_INSERT[table], build(doc_id, value))
+        else:
+            conn.execute(f"DELETE FROM {table} WHERE id = ?", (doc_id,))
+
+    # ---------- escrituras propias ----------
+    def apply_sale(self, sale_id: str, sale: Dict[str, Any], month: Optional[str]) -> None:
+        if not month:
+            return
+        with self._write_lock:
+            conn = self._conn()
+            conn.execute(_INSERT["sales"], _sale_row(month, sale_id, sale))
+            conn.commit()
+
+    def apply_user(self, uid: str, profile: Dict[str, Any]) -> None:
+        with self._write_lock:
+            conn = self._conn()
+            conn.execute(_INSERT["users"], _user_row(uid, profile))
+            conn.commit()
+
+    def remove_sale(self, sale_id: str) -> None:
+        with self._write_lock:
+            conn = self._conn()
+            conn.execute("DELETE FROM sales WHERE id = ?", (sale_id,))
+            conn.commit()
+
+    # ---------- estado ----------
+    def ready(self, table: str) -> bool:
+        """True si se puede leer `table` de la réplica."""
+        if table == "sales":
+            keys = [k for k in self._listeners if k.startswith("sales:")]
+            if not self._sales_loaded:
+                return False
+            if keys and all(self._live.get(k) for k in keys):
+                return True
+            synced = [float(self._state(f"sales:{m}") or 0) for m in live_months()]
+            return bool(synced) and time.time() - min(synced) < READ_REPLICA_MAX_STALENESS
+        if self._live.get(table):
+            return True
+        synced_at = self._state(f"{table}_synced_at")
+        return synced_at is not None and time.time() - float(synced_at) < READ_REPLICA_MAX_STALENESS
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._conn()
+        return {
+            "path": self._path,
+            "products": conn.execute("SELECT COUNT(*) FROM products").fetchone()[0],
+            "users": conn.execute("SELECT COUNT(*) FROM users").fetchone()[0],
+            "sales": conn.execute("SELECT COUNT(*) FROM sales").fetchone()[0],
+            "live": dict(self._live),
+            "ready": {t: self.ready(t) for t in ("products", "users", "sales")},
+            "events": self.events,
+            "reads": self.reads,
+        }
+
+    # ---------- lecturas ----------
+    def products(self) -> Dict[str, Dict[str, Any]]:
+        self.reads += 1
+        return {pid: json.loads(doc) for pid, doc in self._conn().execute("SELECT id, doc FROM products")}
+
+    def user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        self.reads += 1
+        row = self._conn().execute("SELECT id, doc FROM users WHERE email = ? LIMIT 1", (email,)).fetchone()
+        return {"uid": row[0], **json.loads(row[1])} if row else None
+
+    def sales_page(self, limit: int, after: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Página por id, como SaleRepo.list_page: (ventas, último id si hay más)."""
+        self.reads += 1
+        sql, params = "SELECT id, doc FROM sales", []
+        if after is not None:
+            kind, number, _ = key_rank(after)
+            sql += f" WHERE ({_KEY_ORDER}) > (?, ?, ?)"
+            params = [kind, number, after]
+        rows = self._conn().execute(f"{sql} ORDER BY {_KEY_ORDER} LIMIT ?", (*params, limit + 1)).fetchall()
+        items = [{"id": sid, **json.loads(doc)} for sid, doc in rows[:limit]]
+        return items, (items[-1]["id"] if len(rows) > limit and items else None)
+
+    def iter_sales(self, start: Optional[str] = None, end: Optional[str] = None,
+                   product_id: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Ventas con date en [start, end] (strings ISO), en orden de fecha; usa los índices de date."""
+        self.reads += 1
+        sql = "SELECT id, doc FROM sales WHERE date >= ?"
+        params: List[Any] = [start or ""]
+        if end is not None:
+            sql += " AND date <= ?"
+            params.append(end)
+        if product_id:
+            sql += " AND product_id = ?"
+            params.append(product_id)
+        cursor = self._conn().execute(sql + " ORDER BY date, id", params)
+        while True:
+            rows = cursor.fetchmany(1000)
+            if not rows:
+                return
+            for sid, doc in rows:
+                yield {"id": sid, **json.loads(doc)}
+
+
+# -------------------------------------------------------------------
+# Instancia del proceso
+# -------------------------------------------------------------------
+_replica: Optional[ReadReplica] = None
+
+
+def start_read_replica() -> Optional[ReadReplica]:
+    """Abre y sincroniza la réplica si READ_REPLICA_PATH está configurado."""
+    global _replica
+    if READ_REPLICA_PATH and _replica is None:
+        _replica = ReadReplica(READ_REPLICA_PATH)
+        _replica.start()
+    return _replica
+
+
+def read_replica(table: str) -> Optional[ReadReplica]:
+    """La réplica, solo si puede servir `table` ahora mismo."""
+    if _replica is not None and _replica.ready(table):
+        return _replica
+    return None
+
+
+def replica_instance() -> Optional[ReadReplica]:
+    return _replica
+
+
+def close_read_replica() -> None:
+    global _replica
+    if _replica is not None:
+        _replica.close()
+        _replica = None
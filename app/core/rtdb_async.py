@@ -0,0 +1,235 @@
+"""
+Acceso async a Firebase RTDB por su API REST.
+
+Un solo httpx.AsyncClient compartido (keep-alive + HTTP/2) para todo el
+proceso, con la misma forma que firebase_admin.db: artdb(path) devuelve una
+referencia con get/set/update/delete/push y consultas order_by_*(). Así los
+routers pueden ser `async def` y lanzar varias lecturas a la vez
+(asyncio.gather) sin ocupar hilos del threadpool de Starlette.
+
+Para pruebas sin red: use_memory_backend() conecta el cliente a un
+MemoryTransport (app/core/rtdb_memory.py) en vez de Firebase.
+"""
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+from datetime import timezone
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+import httpx
+
+from .config import settings
+from .rtdb_memory import MemoryTransport, MemoryTree, join_path, split_path
+from .rtdb_query import sort_entries
+
+RTDB_HTTP_MAX_CONNECTIONS = int(os.getenv("RTDB_HTTP_MAX_CONNECTIONS", "100"))
+RTDB_HTTP_TIMEOUT = float(os.getenv("RTDB_HTTP_TIMEOUT", "10"))
+
+
+class RTDBError(RuntimeError):
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"RTDB {status_code}: {message}")
+        self.status_code = status_code
+
+
+class _AccessToken:
+    """Token OAuth de la cuenta de servicio, renovado 5 min antes de expirar."""
+
+    def __init__(self):
+        self._token: Optional[str] = None
+        self._expires_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def get(self) -> str:
+        if self._token and time.time() < self._expires_at:
+            return self._token
+        async with self._lock:
+            if not self._token or time.time() >= self._expires_at:
+                # google-auth es bloqueante: se refresca en un hilo
+                self._token, self._expires_at = await asyncio.to_thread(self._refresh)
+            return self._token
+
+    @staticmethod
+    def _refresh() -> Tuple[str, float]:
+        import firebase_admin
+
+        info = firebase_admin.get_app().credential.get_access_token()
+        expiry = info.expiry
+        if expiry is None:
+            expires_at = time.time() + 3000
+        else:
+            # google-auth entrega expiry como datetime UTC naive
+            expires_at = (expiry if expiry.tzinfo else expiry.replace(tzinfo=timezone.utc)).timestamp()
+        return info.access_token, expires_at - 300
+
+
+class AsyncRTDB:
+    def __init__(self, base_url: str, transport: Optional[httpx.AsyncBaseTransport] = None,
+                 auth: Optional[_AccessToken] = None):
+        self._auth = auth
+        self._client = httpx.AsyncClient(
+            base_url=base_url.rstrip("/"),
+            transport=transport,
+            http2=transport is None,
+            limits=httpx.Limits(
+                max_connections=RTDB_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=RTDB_HTTP_MAX_CONNECTIONS,
+            ),
+            timeout=RTDB_HTTP_TIMEOUT,
+        )
+
+    def reference(self, path: str = "/") -> "AsyncReference":
+        return AsyncReference(self, path)
+
+    async def request(self, method: str, path: str, params: Optional[Dict[str, Any]] = None,
+                      body: Any = None) -> Any:
+        headers = {}
+        if self._auth is not None:
+            headers["Authorization"] = f"Bearer {await self._auth.get()}"
+        url = quote(join_path(split_path(path)).rstrip("/") + ".json", safe="/")
+        content = None if body is None and method == "GET" else json.dumps(body)
+        resp = await self._client.request(method, url, params=params, content=content, headers=headers)
+        if resp.status_code == 204:
+            return None
+        if resp.status_code >= 400:
+            try:
+                message = resp.json().get("error", resp.text)
+            except Exception:
+                message = resp.text
+            raise RTDBError(resp.status_code, message)
+        return resp.json()
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+class AsyncReference:
+    def __init__(self, db: AsyncRTDB, path: str = "/"):
+        self._db = db
+        self.path = join_path(split_path(path))
+
+    @property
+    def key(self) -> Optional[str]:
+        parts = split_path(self.path)
+        return parts[-1] if parts else None
+
+    def child(self, path: str) -> "AsyncReference":
+        return AsyncReference(self._db, join_path(split_path(self.path) + split_path(path)))
+
+    async def get(self, shallow: bool = False) -> Any:
+        return await self._db.request("GET", self.path, params={"shallow": "true"} if shallow else None)
+
+    async def set(self, value: Any) -> None:
+        await self._db.request("PUT", self.path, params={"print": "silent"}, body=value)
+
+    async def update(self, value: Dict[str, Any]) -> None:
+        if not value or not isinstance(value, dict):
+            raise ValueError("Value argument must be a non-empty dictionary.")
+        await self._db.request("PATCH", self.path, params={"print": "silent"}, body=value)
+
+    async def delete(self) -> None:
+        await self._db.request("DELETE", self.path, params={"print": "silent"})
+
+    async def push(self, value: Any = "") -> "AsyncReference":
+        data = await self._db.request("POST", self.path, body=value)
+        return self.child(data["name"])
+
+    def order_by_key(self) -> "AsyncQuery":
+        return AsyncQuery(self._db, self.path, "$key")
+
+    def order_by_value(self) -> "AsyncQuery":
+        return AsyncQuery(self._db, self.path, "$value")
+
+    def order_by_child(self, path: str) -> "AsyncQuery":
+        return AsyncQuery(self._db, self.path, path)
+
+
+class AsyncQuery:
+    def __init__(self, db: AsyncRTDB, path: str, order_by: str):
+        self._db = db
+        self._path = path
+        self._order_by = order_by
+        self._params: Dict[str, Any] = {"orderBy": json.dumps(order_by)}
+
+    def start_at(self, value: Any) -> "AsyncQuery":
+        self._params["startAt"] = json.dumps(value)
+        return self
+
+    def end_at(self, value: Any) -> "AsyncQuery":
+        self._params["endAt"] = json.dumps(value)
+        return self
+
+    def equal_to(self, value: Any) -> "AsyncQuery":
+        self._params["equalTo"] = json.dumps(value)
+        return self
+
+    def limit_to_first(self, n: int) -> "AsyncQuery":
+        self._params["limitToFirst"] = n
+        return self
+
+    def limit_to_last(self, n: int) -> "AsyncQuery":
+        self._params["limitToLast"] = n
+        return self
+
+    async def get(self) -> "OrderedDict[str, Any]":
+        data = await self._db.request("GET", self._path, params=self._params)
+        if not isinstance(data, dict):
+            return OrderedDict()
+        # la API REST no garantiza orden: se ordena como lo haría el SDK
+        return OrderedDict(sort_entries(data.items(), self._order_by))
+
+
+# -------------------------------------------------------------------
+# Cliente compartido
+# -------------------------------------------------------------------
+_db: Optional[AsyncRTDB] = None
+
+
+def get_async_db() -> AsyncRTDB:
+    global _db
+    if _db is None:
+        from .firebase import memory_tree, use_memory
+
+        if use_memory():
+            # mismo árbol que rtdb(): lo escrito por una vía se lee por la otra
+            use_memory_backend(memory_tree())
+            return _db
+        if not settings.FIREBASE_DB_URL:
+            raise RuntimeError("FIREBASE_DB_URL vacío")
+        _db = AsyncRTDB(settings.FIREBASE_DB_URL, auth=_AccessToken())
+    return _db
+
+
+def artdb(path: str = "/") -> AsyncReference:
+    return get_async_db().reference(path)
+
+
+def use_memory_backend(tree: Optional[MemoryTree] = None) -> MemoryTree:
+    """Conecta artdb() a un árbol en memoria (pruebas/desarrollo sin Firebase)."""
+    global _db
+    transport = MemoryTransport(tree)
+    _db = AsyncRTDB("http://rtdb.memory", transport=transport)
+    return transport.tree
+
+
+async def close_async_db() -> None:
+    global _db
+    if _db is not None:
+        await _db.aclose()
+        _db = None
+
+
+async def akey_page(path: str, limit: int, after: Optional[str] = None) -> Tuple[List[Tuple[str, Any]], Optional[str]]:
+    """Versión async de firebase.key_page: ([(key, value)], next_key)."""
+    query = artdb(path).order_by_key()
+    if after is not None:
+        query = query.start_at(after)
+    want = limit + 1 + (1 if after is not None else 0)
+    page = await query.limit_to_first(want).get()
+    items = [(k, v) for k, v in page.items() if k != after]
+    if len(items) > limit:
+        return items[:limit], items[limit - 1][0]
+    return items, None
@@ -0,0 +1,455 @@
+"""
+Emulador en proceso de Firebase RTDB para desarrollo, pruebas y benchmarks sin red.
+
+- MemoryTree: el árbol JSON con la semántica que usa la app (get/shallow,
+  consultas ordenadas, set/update multi-path, incrementos ".sv", borrado con
+  None, poda de ramas vacías, listen() y transaction()). Es thread-safe,
+  puede persistir a un archivo JSON y simular latencia por operación.
+- Reference/Query: la misma interfaz que firebase_admin.db; rtdb() las
+  devuelve cuando RTDB_BACKEND=memory (ver app/core/firebase.py).
+- MemoryTransport: transporte httpx que atiende el protocolo REST de RTDB
+  (GET/PUT/PATCH/POST/DELETE sobre /{ruta}.json) desde un MemoryTree; se
+  enchufa al cliente async con rtdb_async.use_memory_backend().
+"""
+import asyncio
+import copy
+import itertools
+import json
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from .ids import push_id
+from .rtdb_query import apply_query
+
+
+def split_path(path: Optional[str]) -> List[str]:
+    return [p for p in (path or "/").split("/") if p]
+
+
+def join_path(parts: List[str]) -> str:
+    return "/" + "/".join(parts)
+
+
+def _prune(value: Any) -> Any:
+    """RTDB no guarda null ni objetos vacíos; las listas llegan como dicts."""
+    if isinstance(value, dict):
+        out = {}
+        for k, v in value.items():
+            v = _prune(v)
+            if v is not None:
+                out[str(k)] = v
+        return out or None
+    if isinstance(value, list):
+        return _prune({str(i): v for i, v in enumerate(value)})
+    return value
+
+
+class Event:
+    """Evento de listen(), con los mismos atributos que el del SDK."""
+
+    def __init__(self, event_type: str, path: str, data: Any):
+        self.event_type = event_type
+        self.path = path
+        self.data = data
+
+
+class ListenerRegistration:
+    def __init__(self, tree: "MemoryTree", listener_id: int):
+        self._tree = tree
+        self._id = listener_id
+
+    def close(self) -> None:
+        with self._tree._lock:
+            self._tree._listeners.pop(self._id, None)
+
+
+def parse_latency(spec: Optional[str]) -> Tuple[float, float]:
+    """'40' -> 40 ms fijos; '20-80' -> uniforme entre 20 y 80 ms. Devuelve segundos."""
+    if not spec or not spec.strip():
+        return 0.0, 0.0
+    lo, _, hi = spec.partition("-")
+    lo_ms = float(lo)
+    hi_ms = float(hi) if hi else lo_ms
+    if lo_ms < 0 or hi_ms < lo_ms:
+        raise ValueError(f"Latencia inválida: {spec!r}")
+    return lo_ms / 1000, hi_ms / 1000
+
+
+class MemoryTree:
+    def __init__(self, data: Optional[Dict[str, Any]] = None, path: Optional[str] = None,
+                 latency: Tuple[float, float] = (0.0, 0.0), flush_interval: float = 1.0):
+        self._lock = threading.RLock()
+        self._listeners: Dict[int, Tuple[List[str], Callable[[Event], None]]] = {}
+        self._listener_ids = itertools.count(1)
+        self._latency = latency
+        # persistencia: write-behind a un JSON (escritura atómica cada flush_interval)
+        self._file = path
+        self._dirty = False
+        self._flush_interval = flush_interval
+        self._flusher: Optional[threading.Thread] = None
+
+        if data is None and path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        self._root: Any = _prune(copy.deepcopy(data)) if data else None
+
+    # ---------------------------
+    # Latencia simulada
+    # ---------------------------
+    def delay(self) -> float:
+        """Segundos a esperar por una operación (0 si no hay latencia configurada)."""
+        lo, hi = self._latency
+        return lo if lo == hi else random.uniform(lo, hi)
+
+    def reference(self, path: str = "/") -> "Reference":
+        return Reference(self, path)
+
+    # ---------------------------
+    # Lectura
+    # ---------------------------
+    def get(self, path: str = "/", shallow: bool = False) -> Any:
+        with self._lock:
+            value = self._read(split_path(path))
+            if shallow and isinstance(value, dict):
+                return {k: (True if isinstance(v, dict) else v) for k, v in value.items()}
+            return copy.deepcopy(value)
+
+    def query(self, path: str, order_by: str, **params) -> Any:
+        with self._lock:
+            node = self._read(split_path(path))
+            result = apply_query(node, order_by, **params)
+            return copy.deepcopy(result)
+
+    # ---------------------------
+    # Escritura
+    # ---------------------------
+    def set(self, path: str, value: Any) -> None:
+        self.update("/", {path: value})
+
+    def delete(self, path: str) -> None:
+        self.set(path, None)
+
+    def push(self, path: str, value: Any) -> str:
+        key = push_id()
+        self.set(join_path(split_path(path) + [key]), value)
+        return key
+
+    def update(self, path: str, values: Dict[str, Any]) -> None:
+        """Update multi-path atómico; rechaza rutas ancestro/descendiente como RTDB."""
+        with self._lock:
+            events = self._apply(path, values)
+        # fuera del lock: los callbacks pueden volver a leer el árbol
+        for callback, event in events:
+            callback(event)
+
+    def transaction(self, path: str, fn: Callable[[Any], Any]) -> Any:
+        """
+        Aplica fn sobre el valor actual de forma atómica y devuelve el nuevo valor.
+        Como el SDK (set_if_unchanged), fn no puede devolver None: para abortar se
+        lanza una excepción desde fn, que llega tal cual a quien llamó.
+        """
+        with self._lock:
+            new_value = fn(self.get(path))
+            if new_value is None:
+                raise ValueError("Value must not be none.")
+            events = self._apply("/", {path: new_value})
+        for callback, event in events:
+            callback(event)
+        return new_value
+
+    def listen(self, path: str, callback: Callable[[Event], None]) -> ListenerRegistration:
+        """Como el SDK: primero un put "/" con el snapshot y luego un put por cada escritura."""
+        with self._lock:
+            listener_id = next(self._listener_ids)
+            self._listeners[listener_id] = (split_path(path), callback)
+            snapshot = self.get(path)
+        callback(Event("put", "/", snapshot))
+        return ListenerRegistration(self, listener_id)
+
+    # ---------------------------
+    # Persistencia
+    # ---------------------------
+    def flush(self) -> None:
+        """Escribe el árbol al archivo (si hay cambios pendientes)."""
+        if not self._file:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            data = json.dumps(self._root, ensure_ascii=False)
+            self._dirty = False
+        tmp = f"{self._file}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp, self._file)
+
+    def _mark_dirty(self) -> None:
+        if not self._file:
+            return
+        self._dirty = True
+        if self._flusher is None:
+            self._flusher = threading.Thread(target=self._flush_loop, name="rtdb-memory-flush", daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self) -> None:
+        while True:
+            time.sleep(self._flush_interval)
+            try:
+                self.flush()
+            except OSError:
+                pass
+
+    # ---------------------------
+    # Internos
+    # ---------------------------
+    def _apply(self, path: str, values: Dict[str, Any]) -> List[Tuple[Callable[[Event], None], Event]]:
+        """Escribe el update (con self._lock tomado) y devuelve los eventos a emitir."""
+        base = split_path(path)
+        targets = [(base + split_path(k), v) for k, v in values.items()]
+        # ordenadas, un ancestro queda justo antes de alguno de sus descendientes
+        ordered = sorted(parts for parts, _ in targets)
+        for a, b in zip(ordered, ordered[1:]):
+            if len(a) < len(b) and b[:len(a)] == a:
+                raise ValueError(f"Update inválido: {join_path(a)} es ancestro de {join_path(b)}")
+        for parts, value in targets:
+            current = self._read(parts)
+            self._write(parts, _prune(self._resolve(copy.deepcopy(value), current)))
+        events = self._collect_events([parts for parts, _ in targets])
+        self._mark_dirty()
+        return events
+
+    def _resolve(self, value: Any, current: Any) -> Any:
+        """Valores de servidor: {".sv": {"increment": n}} y {".sv": "timestamp"}."""
+        if isinstance(value, dict):
+            sv = value.get(".sv")
+            if sv is not None and len(value) == 1:
+                if isinstance(sv, dict) and "increment" in sv:
+                    ok = isinstance(current, (int, float)) and not isinstance(current, bool)
+                    return (current if ok else 0) + sv["increment"]
+                if sv == "timestamp":
+                    return int(time.time() * 1000)
+            return {
+                k: self._resolve(v, current.get(k) if isinstance(current, dict) else None)
+                for k, v in value.items()
+            }
+        return value
+
+    def _collect_events(self, written: List[List[str]]) -> List[Tuple[Callable[[Event], None], Event]]:
+        out = []
+        for listen_parts, callback in list(self._listeners.values()):
+            for parts in written:
+                if parts[:len(listen_parts)] == listen_parts:
+                    # escritura dentro de lo escuchado: put relativo
+                    rel = join_path(parts[len(listen_parts):])
+                    out.append((callback, Event("put", rel, copy.deepcopy(self._read(parts)))))
+                elif listen_parts[:len(parts)] == parts:
+                    # se reemplazó un ancestro: snapshot completo
+                    out.append((callback, Event("put", "/", copy.deepcopy(self._read(listen_parts)))))
+        return out
+
+    def _read(self, parts: List[str]) -> Any:
+        node = self._root
+        for p in parts:
+            if not isinstance(node, dict):
+                return None
+            node = node.get(p)
+        return node
+
+    def _write(self, parts: List[str], value: Any) -> None:
+        if not parts:
+            self._root = value
+            return
+        if not isinstance(self._root, dict):
+            self._root = {}
+        stack = [self._root]
+        node = self._root
+        for p in parts[:-1]:
+            nxt = node.get(p)
+            if not isinstance(nxt, dict):
+                nxt = {}
+                node[p] = nxt
+            node = nxt
+            stack.append(node)
+        if value is None:
+            node.pop(parts[-1], None)
+        else:
+            node[parts[-1]] = value
+        # limpia ramas que quedaron vacías
+        for i in range(len(parts) - 1, 0, -1):
+            if stack[i]:
+                break
+            stack[i - 1].pop(parts[i - 1], None)
+        if not self._root:
+            self._root = None
+
+
+# -------------------------------------------------------------------
+# Interfaz de firebase_admin.db (sync)
+# -------------------------------------------------------------------
+class Reference:
+    def __init__(self, tree: MemoryTree, path: str = "/"):
+        self._tree = tree
+        self.path = join_path(split_path(path))
+
+    @property
+    def key(self) -> Optional[str]:
+        parts = split_path(self.path)
+        return parts[-1] if parts else None
+
+    def child(self, path: str) -> "Reference":
+        return Reference(self._tree, join_path(split_path(self.path) + split_path(path)))
+
+    def _wait(self) -> None:
+        seconds = self._tree.delay()
+        if seconds:
+            time.sleep(seconds)
+
+    def get(self, etag: bool = False, shallow: bool = False) -> Any:
+        self._wait()
+        value = self._tree.get(self.path, shallow=shallow)
+        return (value, "") if etag else value
+
+    def set(self, value: Any) -> None:
+        self._wait()
+        self._tree.set(self.path, value)
+
+    def update(self, value: Dict[str, Any]) -> None:
+        if not value or not isinstance(value, dict):
+            raise ValueError("Value argument must be a non-empty dictionary.")
+        self._wait()
+        self._tree.update(self.path, value)
+
+    def delete(self) -> None:
+        self._wait()
+        self._tree.delete(self.path)
+
+    def push(self, value: Any = "") -> "Reference":
+        self._wait()
+        return self.child(self._tree.push(self.path, value))
+
+    def listen(self, callback: Callable[[Event], None]) -> ListenerRegistration:
+        return self._tree.listen(self.path, callback)
+
+    def transaction(self, transaction_update: Callable[[Any], Any]) -> Any:
+        self._wait()
+        return self._tree.transaction(self.path, transaction_update)
+
+    def order_by_key(self) -> "Query":
+        return Query(self, "$key")
+
+    def order_by_value(self) -> "Query":
+        return Query(self, "$value")
+
+    def order_by_child(self, path: str) -> "Query":
+        return Query(self, path)
+
+
+class Query:
+    def __init__(self, ref: Reference, order_by: str):
+        self._ref = ref
+        self._params: Dict[str, Any] = {}
+        self._order_by = order_by
+
+    def start_at(self, start: Any) -> "Query":
+        self._params["start_at"] = start
+        return self
+
+    def end_at(self, end: Any) -> "Query":
+        self._params["end_at"] = end
+        return self
+
+    def equal_to(self, value: Any) -> "Query":
+        self._params["equal_to"] = value
+        return self
+
+    def limit_to_first(self, limit: int) -> "Query":
+        self._params["limit_to_first"] = limit
+        return self
+
+    def limit_to_last(self, limit: int) -> "Query":
+        self._params["limit_to_last"] = limit
+        return self
+
+    def get(self) -> Any:
+        self._ref._wait()
+        return self._ref._tree.query(self._ref.path, self._order_by, **self._params)
+
+
+# -------------------------------------------------------------------
+# Servidor REST en memoria (transporte httpx)
+# -------------------------------------------------------------------
+_QUERY_PARAMS = {
+    "startAt": "start_at",
+    "endAt": "end_at",
+    "equalTo": "equal_to",
+}
+
+
+class MemoryTransport(httpx.AsyncBaseTransport):
+    """Atiende /{ruta}.json con la semántica REST de RTDB desde un MemoryTree."""
+
+    def __init__(self, tree: Optional[MemoryTree] = None):
+        self.tree = tree if tree is not None else MemoryTree()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if not path.endswith(".json"):
+            return self._error(404, "Not Found")
+        path = path[:-len(".json")] or "/"
+        params = request.url.params
+        silent = params.get("print") == "silent"
+        seconds = self.tree.delay()
+        if seconds:
+            await asyncio.sleep(seconds)
+
+        try:
+            if request.method == "GET":
+                return self._json(200, self._get(path, params))
+            body = json.loads(request.content or b"null")
+            if request.method == "PUT":
+                self.tree.set(path, body)
+                result = self.tree.get(path)
+            elif request.method == "PATCH":
+                if not isinstance(body, dict):
+                    return self._error(400, "Invalid data; couldn't parse JSON object.")
+                self.tree.update(path, body)
+                result = body
+            elif request.method == "POST":
+                result = {"name": self.tree.push(path, body)}
+            elif request.method == "DELETE":
+                self.tree.delete(path)
+                result = None
+            else:
+                return self._error(405, "Method Not Allowed")
+        except ValueError as e:
+            return self._error(400, str(e))
+        return httpx.Response(204) if silent else self._json(200, result)
+
+    def _get(self, path: str, params: httpx.QueryParams) -> Any:
+        if "orderBy" not in params:
+            return self.tree.get(path, shallow=params.get("shallow") == "true")
+        query: Dict[str, Any] = {}
+        for name, arg in _QUERY_PARAMS.items():
+            if name in params:
+                query[arg] = json.loads(params[name])
+        for name, arg in (("limitToFirst", "limit_to_first"), ("limitToLast", "limit_to_last")):
+            if name in params:
+                query[arg] = int(params[name])
+        result = self.tree.query(path, json.loads(params["orderBy"]), **query)
+        return dict(result)  # como el servidor real: sin orden garantizado
+
+    @staticmethod
+    def _json(status: int, data: Any) -> httpx.Response:
+        return httpx.Response(
+            status, content=json.dumps(data).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+        )
+
+    @staticmethod
+    def _error(status: int, message: str) -> httpx.Response:
+        return MemoryTransport._json(status, {"error": message})
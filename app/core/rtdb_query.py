@@ -0,0 +1,84 @@
+"""
+Orden y filtros de consultas RTDB (orderBy/startAt/endAt/equalTo/limitTo*).
+
+Lo comparten el cliente REST async (la API REST devuelve los resultados sin
+orden y hay que ordenarlos igual que el SDK) y el stand-in en memoria, que
+además aplica los filtros del lado "servidor".
+"""
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+_INT_MIN, _INT_MAX = -(2 ** 31), 2 ** 31 - 1
+
+
+def key_rank(key: str) -> Tuple:
+    """Claves enteras (32 bits) primero, en orden numérico; luego strings."""
+    try:
+        n = int(key)
+        if str(n) == key and _INT_MIN <= n <= _INT_MAX:
+            return (0, n, "")
+    except (TypeError, ValueError):
+        pass
+    return (1, 0, str(key))
+
+
+def value_rank(value: Any) -> Tuple:
+    """null < false < true < números < strings < objetos."""
+    if value is None:
+        return (0, 0)
+    if value is False:
+        return (1, 0)
+    if value is True:
+        return (2, 0)
+    if isinstance(value, (int, float)):
+        return (3, value)
+    if isinstance(value, str):
+        return (4, value)
+    return (5, 0)
+
+
+def child_value(value: Any, path: str) -> Any:
+    for seg in (p for p in path.split("/") if p):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(seg)
+    return value
+
+
+def _rankers(order_by: str) -> Tuple[Callable, Callable]:
+    """(rango de una entrada (k, v), rango de un límite start/end) para order_by."""
+    if order_by == "$key":
+        return (lambda kv: key_rank(kv[0])), (lambda b: key_rank(str(b)))
+    if order_by == "$value":
+        pick = lambda kv: kv[1]
+    else:
+        pick = lambda kv: child_value(kv[1], order_by)
+    return (lambda kv: (value_rank(pick(kv)), key_rank(kv[0]))), (lambda b: (value_rank(b),))
+
+
+def sort_entries(entries: Iterable[Tuple[str, Any]], order_by: str) -> List[Tuple[str, Any]]:
+    rank, _ = _rankers(order_by)
+    return sorted(entries, key=rank)
+
+
+def apply_query(node: Any, order_by: str, start_at: Any = None, end_at: Any = None,
+                equal_to: Any = None, limit_to_first: Optional[int] = None,
+                limit_to_last: Optional[int] = None) -> "OrderedDict[str, Any]":
+    """Resultado de una consulta sobre `node` (dict de hijos), ya ordenado."""
+    if not isinstance(node, dict):
+        return OrderedDict()
+    rank, bound = _rankers(order_by)
+    entries = sorted(node.items(), key=rank)
+    if equal_to is not None:
+        start_at = end_at = equal_to
+    if start_at is not None:
+        lo = bound(start_at)
+        entries = [kv for kv in entries if rank(kv)[:len(lo)] >= lo]
+    if end_at is not None:
+        hi = bound(end_at)
+        entries = [kv for kv in entries if rank(kv)[:len(hi)] <= hi]
+    if limit_to_first is not None:
+        entries = entries[:limit_to_first]
+    if limit_to_last is not None:
+        entries = entries[-limit_to_last:] if limit_to_last else []
+    return OrderedDict(entries)
@@ -7,6 +7,7 @@ import os
 SECRET_KEY = os.getenv("SECRET_KEY", "supersecretkey123")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
 
 def create_access_token(sub: str, role: str, uid: str, minutes: int | None = None) -> str:
     now = datetime.now(timezone.utc)
@@ -15,7 +16,7 @@ def create_access_token(sub: str, role: str, uid: str, minutes: int | None = Non
         "sub": sub,
         "role": role,
         "uid": uid,
-        "iat": int(now.timestamp()),
+        "iat": round(now.timestamp(), 6),  # con fracción: ver token_cache.revoke_uid
         "exp": int(expire.timestamp()),
     }
     return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
\ No newline at end of file
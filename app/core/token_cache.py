@@ -0,0 +1,148 @@
+"""
+Caché de tokens ya verificados (claims por digest del token).
+
+Los clientes móviles mandan el mismo JWT cientos de veces por sesión: con
+la caché solo la primera request paga jwt.decode (HMAC + base64 + JSON).
+Cada entrada vence a los TOKEN_CACHE_TTL segundos o al `exp` del token, lo
+que llegue primero. Se guarda el sha256 del token, no el token.
+
+revoke_uid(uid) saca de la caché los tokens de ese usuario y rechaza los
+emitidos antes de ese instante (solo en este proceso). El `iat` lleva
+fracción de segundo, así que un login justo después de la revocación vale.
+Pasado ACCESS_TOKEN_EXPIRE_MINUTES la marca se descarta: todo token anterior
+ya venció.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
+from .security import ACCESS_TOKEN_EXPIRE_MINUTES
+
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+TOKEN_CACHE_TTL = float(os.getenv("TOKEN_CACHE_TTL", "300"))
+
+
+def token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
+
+class TokenCache:
+    def __init__(self, max_size: int = TOKEN_CACHE_SIZE, ttl: float = TOKEN_CACHE_TTL,
+                 revoke_ttl: float = ACCESS_TOKEN_EXPIRE_MINUTES * 60):
+        self._max_size = max_size
+        self._ttl = ttl
+        self._revoke_ttl = revoke_ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[bytes, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._by_uid: Dict[str, Set[bytes]] = {}
+        self._revoked: Dict[str, float] = {}  # uid -> tokens con iat anterior quedan rechazados
+        # contadores
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.revocations = 0
+
+    def get(self, digest: bytes) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                self.misses += 1
+                return None
+            claims, expires_at = entry
+            if now >= expires_at:
+                self._drop(digest, claims)
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return claims
+
+    def put(self, digest: bytes, claims: Dict[str, Any], exp: Optional[int], iat: Optional[float] = None) -> None:
+        if self._max_size <= 0:
+            return
+        expires_at = time.time() + self._ttl
+        if exp:
+            expires_at = min(expires_at, float(exp))
+        with self._lock:
+            if self._is_revoked(claims.get("uid"), iat):
+                return  # revocado mientras se verificaba
+            old = self._entries.pop(digest, None)
+            if old is not None:
+                self._unindex(digest, old[0])
+            self._entries[digest] = (claims, expires_at)
+            uid = claims.get("uid")
+            if uid:
+                self._by_uid.setdefault(uid, set()).add(digest)
+            while len(self._entries) > self._max_size:
+                old_digest, (old_claims, _) = self._entries.popitem(last=False)
+                self._unindex(old_digest, old_claims)
+                self.evictions += 1
+
+    def is_revoked(self, uid: Optional[str], iat: Optional[float]) -> bool:
+        with self._lock:
+            return self._is_revoked(uid, iat)
+
+    def revoke_uid(self, uid: str) -> int:
+        """Hook de revocación: expulsa los tokens de `uid` y rechaza los emitidos hasta ahora."""
+        now = time.time()
+        with self._lock:
+            for old_uid, revoked_at in list(self._revoked.items()):
+                if revoked_at <= now - self._revoke_ttl:
+                    del self._revoked[old_uid]
+            self._revoked[uid] = now
+            digests = self._by_uid.pop(uid, set())
+            for digest in digests:
+                self._entries.pop(digest, None)
+            self.revocations += 1
+            return len(digests)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_uid.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self._max_size,
+                "ttl_seconds": self._ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "revocations": self.revocations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+    # ---------- internos (con self._lock tomado) ----------
+    def _is_revoked(self, uid: Optional[str], iat: Optional[float]) -> bool:
+        revoked_at = self._revoked.get(uid or "")
+        if revoked_at is None:
+            return False
+        if revoked_at <= time.time() - self._revoke_ttl:
+            del self._revoked[uid]  # los tokens emitidos antes ya vencieron
+            return False
+        return float(iat or 0) < revoked_at
+
+    def _drop(self, digest: bytes, claims: Dict[str, Any]) -> None:
+        self._entries.pop(digest, None)
+        self._unindex(digest, claims)
+
+    def _unindex(self, digest: bytes, claims: Dict[str, Any]) -> None:
+        uid = claims.get("uid")
+        if uid and uid in self._by_uid:
+            self._by_uid[uid].discard(digest)
+            if not self._by_uid[uid]:
+                del self._by_uid[uid]
+
+
+# Instancia compartida por get_current_user
+token_cache = TokenCache()
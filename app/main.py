@@ -1,6 +1,13 @@
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.firebase import init_firebase
+from app.core.deps import require_role
+from app.core.limits import ConcurrencyLimitMiddleware, limits_stats
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.replica import start_read_replica, close_read_replica
+from app.core.passwords import password_hasher
+from app.core.rtdb_async import close_async_db
+from app.services.product_service import product_catalog
 from app.routers import auth, users, products, sales, nlp
 from app.routers import realtime, transcribe
 
@@ -13,17 +20,23 @@ def create_app() -> FastAPI:
         openapi_url="/openapi.json",
     )
 
+    # límites de concurrencia de los endpoints de voz; CORS va por fuera para que
+    # el navegador pueda leer los 503
+    app.add_middleware(ConcurrencyLimitMiddleware)
+
     app.add_middleware(
         CORSMiddleware,
         allow_origins=["*"],
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER],  # el cliente web lee el cursor de paginación
     )
 
     @app.on_event("startup")
     def _startup():
         init_firebase()
+        start_read_replica()  # solo si READ_REPLICA_PATH está configurado
         try:
             print("=== ROUTES ===")
             for r in app.routes:
@@ -31,6 +44,13 @@ def create_app() -> FastAPI:
         except Exception:
             pass
 
+    @app.on_event("shutdown")
+    async def _shutdown():
+        product_catalog.close()
+        close_read_replica()
+        password_hasher.shutdown()
+        await close_async_db()  # cierra el pool HTTP/2 hacia RTDB
+
     @app.api_route("/", methods=["GET", "HEAD"], include_in_schema=False)
     async def root():
         return {"status": "ok", "service": "apisalestalk", "docs": "/docs"}
@@ -39,6 +59,11 @@ def create_app() -> FastAPI:
     async def healthz():
         return {"ok": True}
 
+    # LIMITS STATS (cupos, cola y rechazos de transcribe/tts/realtime)
+    @app.get("/limits/stats", include_in_schema=False)
+    def limits_stats_endpoint(current_user: dict = Depends(require_role("superadmin"))):
+        return limits_stats()
+
     app.include_router(auth.router)
     app.include_router(users.router)
     app.include_router(products.router)
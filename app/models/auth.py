@@ -0,0 +1,6 @@
+from pydantic import BaseModel
+
+
+class RefreshRequest(BaseModel):
+    # en el cuerpo, no en la URL: no queda en logs de acceso, proxies ni historial
+    refresh_token: str
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, Literal
+from typing import Optional, Literal, List, Dict, Any
 from datetime import datetime
 
 ProductStatus = Literal["active", "inactive"]
@@ -25,3 +25,22 @@ class ProductResponse(BaseModel):
 class ProductNameResponse(BaseModel):
     id: str
     name: str
+
+# Import CSV (POST /products/import)
+class ProductImportChange(BaseModel):
+    row: int                      # línea del CSV (1 = encabezado)
+    action: Literal["create", "update", "error"]
+    id: Optional[str] = None
+    name: Optional[str] = None
+    changes: Optional[Dict[str, Dict[str, Any]]] = None  # campo -> {old, new}
+    error: Optional[str] = None
+
+class ProductImportResponse(BaseModel):
+    dry_run: bool
+    rows: int
+    created: int
+    updated: int
+    unchanged: int
+    failed: int
+    write_error: Optional[str] = None  # un bloque no se pudo escribir (los anteriores sí)
+    changes: List[ProductImportChange]
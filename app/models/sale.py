@@ -30,6 +30,25 @@ class SaleResponse(BaseModel):
     payment_method: PaymentMethod
     date: datetime
     created_at: datetime
+    # Precio congelado al momento de la venta (ventas antiguas pueden no tenerlo)
+    unit_price: Optional[float] = None
+    total: Optional[float] = None
+
+# -------------------------
+# Carga masiva (POST /sales/bulk)
+# -------------------------
+class BulkSaleResult(BaseModel):
+    index: int                # posición del item en el body (0-based)
+    ok: bool
+    id: Optional[str] = None  # id de la venta creada
+    error: Optional[str] = None
+
+class BulkSalesResponse(BaseModel):
+    received: int
+    created: int
+    failed: int
+    write_error: Optional[str] = None  # un bloque no se pudo escribir (los anteriores sí)
+    results: List[BulkSaleResult]
 
 GroupBy = Literal["day", "month", "none"]
 
@@ -47,3 +66,70 @@ class SalesReportResponse(BaseModel):
     total_revenue: float
     avg_ticket: float
     buckets: List[SalesReportBucket]
+
+BreakdownBy = Literal["day", "month", "product", "payment_method", "hour"]
+
+class SalesBreakdownBucket(BaseModel):
+    key: str               # día | mes | product_id | método de pago | hora 'HH'
+    label: Optional[str] = None  # nombre del producto cuando by=product
+    count: int
+    units: float
+    total: float
+
+class SalesBreakdownResponse(BaseModel):
+    date_from: Optional[str] = None
+    date_to: Optional[str] = None
+    by: BreakdownBy
+    product_id: Optional[str] = None
+    currency: str = "PEN"
+    total_sales: int
+    total_units: float
+    total_revenue: float
+    buckets: List[SalesBreakdownBucket]
+
+# -------------------------
+# Analytics
+# -------------------------
+TopMetric = Literal["revenue", "units"]
+
+class TopProductItem(BaseModel):
+    product_id: str
+    name: Optional[str] = None
+    count: int
+    units: float
+    total: float
+    share: float       # participación (0-1) en la métrica pedida
+
+class TopProductsResponse(BaseModel):
+    date_from: Optional[str] = None
+    date_to: Optional[str] = None
+    metric: TopMetric
+    currency: str = "PEN"
+    total_sales: int
+    total_units: float
+    total_revenue: float
+    items: List[TopProductItem]
+
+class PaymentMixItem(BaseModel):
+    method: str
+    count: int
+    total: float
+    count_share: float    # 0-1
+    revenue_share: float  # 0-1
+
+class PaymentMixResponse(BaseModel):
+    date_from: Optional[str] = None
+    date_to: Optional[str] = None
+    currency: str = "PEN"
+    total_sales: int
+    total_revenue: float
+    items: List[PaymentMixItem]
+
+class HourlyHeatmapResponse(BaseModel):
+    date_from: Optional[str] = None
+    date_to: Optional[str] = None
+    currency: str = "PEN"
+    weekdays: List[str]        # filas (lunes..domingo)
+    hours: List[int]           # columnas (0..23)
+    counts: List[List[int]]    # 7x24 ventas
+    totals: List[List[float]]  # 7x24 ingresos
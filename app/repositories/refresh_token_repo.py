@@ -0,0 +1,67 @@
+import hashlib
+import secrets
+import time
+from typing import Any, Dict, Optional, Tuple
+from ..core.firebase import rtdb
+
+# /_refresh_tokens/{sha256(token)} = {uid, email, exp}
+# Solo se guarda el digest: quien lea la base no puede usar los tokens.
+REFRESH_TOKENS_PATH = "/_refresh_tokens"
+
+
+def refresh_key(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class _NotUsable(Exception):
+    """El token no existe o ya fue canjeado."""
+
+
+class RefreshTokenRepo:
+    @staticmethod
+    def issue(uid: str, email: str, ttl_seconds: int) -> Tuple[str, int]:
+        """Crea un refresh token opaco; devuelve (token, exp)."""
+        token = secrets.token_urlsafe(32)
+        exp = int(time.time()) + ttl_seconds
+        rtdb(f"{REFRESH_TOKENS_PATH}/{refresh_key(token)}").set({"uid": uid, "email": email, "exp": exp})
+        return token, exp
+
+    @staticmethod
+    def consume(token: str) -> Optional[Dict[str, Any]]:
+        """
+        Invalida el token y devuelve su registro, o None si no existe, ya se usó o venció.
+        La transacción lo marca {"used": true} (el SDK no acepta None como valor nuevo):
+        si llegan dos refresh con el mismo token, solo uno lo obtiene. Luego se borra.
+        """
+        ref = rtdb(f"{REFRESH_TOKENS_PATH}/{refresh_key(token)}")
+        taken: Dict[str, Any] = {}
+
+        def take(current):
+            if not isinstance(current, dict) or current.get("used"):
+                raise _NotUsable()  # aborta sin escribir
+            taken["record"] = current
+            return {**current, "used": True}
+
+        try:
+            ref.transaction(take)
+        except _NotUsable:
+            return None
+        ref.delete()
+        record = taken["record"]
+        if int(record.get("exp") or 0) <= int(time.time()):
+            return None
+        return record
+
+    @staticmethod
+    def revoke(token: str) -> None:
+        rtdb(f"{REFRESH_TOKENS_PATH}/{refresh_key(token)}").delete()
+
+    @staticmethod
+    def purge_expired(limit: int = 500) -> int:
+        """Borra hasta `limit` tokens vencidos (usa el índice de exp)."""
+        now = int(time.time())
+        expired = rtdb(REFRESH_TOKENS_PATH).order_by_child("exp").end_at(now).limit_to_first(limit).get()
+        if not isinstance(expired, dict) or not expired:
+            return 0
+        rtdb(REFRESH_TOKENS_PATH).update({key: None for key in expired})
+        return len(expired)
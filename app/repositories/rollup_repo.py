@@ -0,0 +1,79 @@
+from typing import Optional, Dict, Any
+from ..core.firebase import rtdb
+
+ROLLUPS_PATH = "/_rollups/sales"
+DAY_PATH = f"{ROLLUPS_PATH}/day"      # /_rollups/sales/day/{YYYY-MM-DD}
+MONTH_PATH = f"{ROLLUPS_PATH}/month"  # /_rollups/sales/month/{YYYY-MM}
+
+# Cada bucket guarda:
+#   count, revenue_cents, by_payment/{método}/{count, revenue_cents}
+# Los ingresos van en céntimos (enteros) para que los incrementos no acumulen
+# error de punto flotante.
+
+
+def _cents(value: Any) -> int:
+    try:
+        return int(round(float(value) * 100))
+    except Exception:
+        return 0
+
+
+class RollupRepo:
+    @staticmethod
+    def deltas(sale: Dict[str, Any], sign: int = 1) -> Dict[str, int]:
+        """Contribución de una venta a sus buckets de día y mes (rutas absolutas)."""
+        date = str(sale.get("date") or "")
+        day, month = date[:10], date[:7]
+        if len(day) != 10:
+            return {}
+
+        cents = sign * _cents(sale.get("total"))
+        method = sale.get("payment_method") or "Efectivo"
+        out: Dict[str, int] = {}
+        for base in (f"{DAY_PATH}/{day}", f"{MONTH_PATH}/{month}"):
+            out[f"{base}/count"] = sign
+            out[f"{base}/revenue_cents"] = cents
+            out[f"{base}/by_payment/{method}/count"] = sign
+            out[f"{base}/by_payment/{method}/revenue_cents"] = cents
+        return out
+
+    @staticmethod
+    def merge(into: Dict[str, int], deltas: Dict[str, int]) -> Dict[str, int]:
+        """Suma deltas por ruta (un update multi-path no admite rutas repetidas)."""
+        for path, value in deltas.items():
+            into[path] = into.get(path, 0) + value
+        return into
+
+    @staticmethod
+    def increments(deltas: Dict[str, int]) -> Dict[str, Any]:
+        """Convierte deltas en incrementos del lado del servidor para rtdb().update()."""
+        return {path: {".sv": {"increment": value}} for path, value in deltas.items() if value}
+
+    @staticmethod
+    def list_days(start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        query = rtdb(DAY_PATH).order_by_key()
+        if start:
+            query = query.start_at(start)
+        if end:
+            query = query.end_at(end)
+        data = query.get()
+        if not isinstance(data, dict):
+            return {}
+        return {k: v for k, v in data.items() if isinstance(v, dict)}
+
+    @staticmethod
+    def list_months(start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        query = rtdb(MONTH_PATH).order_by_key()
+        if start:
+            query = query.start_at(start)
+        if end:
+            query = query.end_at(end)
+        data = query.get()
+        if not isinstance(data, dict):
+            return {}
+        return {k: v for k, v in data.items() if isinstance(v, dict)}
+
+    @staticmethod
+    def replace_all(rollups: Optional[Dict[str, Any]]) -> None:
+        """Reemplaza todos los rollups (usado por scripts/rebuild_rollups.py)."""
+        rtdb(ROLLUPS_PATH).set(rollups)
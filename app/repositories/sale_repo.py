@@ -1,18 +1,176 @@
-from typing import Optional, Dict, Any, List
-from ..core.firebase import rtdb
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import os
+import time
+from typing import Optional, Dict, Any, List, Iterator, Set, Tuple
+from ..core.firebase import rtdb, key_page, iter_pages
+from ..core.ids import PUSH_ID_END, is_push_id
+from ..core.replica import read_replica, replica_instance
+from ..core.rtdb_async import artdb, akey_page
+from ..core.rtdb_query import key_rank
+from .rollup_repo import RollupRepo
 
 SALES_PATH = "/sales"
-#Commit
+DATE_END_SUFFIX = "\uf8ff"  # end_at(fecha + sufijo) incluye todo el día
+# /_indexes/sales_by_product/{product_id}/{sale_id} = fecha de la venta
+SALES_BY_PRODUCT_PATH = "/_indexes/sales_by_product"
+
+# Particiones mensuales: /sales_by_month/{YYYY-MM}/{sale_id} = venta.
+# Copia de cada venta con fecha, escrita en el mismo update que /sales. Los
+# rangos de fechas se leen de aquí (solo los meses del rango). Al archivar un
+# mes (scripts/archive_sales.py) la venta sale de /sales y queda solo en su
+# partición; /_archive/sales/ids/{sale_id} = mes permite encontrarla por id.
+SALES_BY_MONTH_PATH = "/sales_by_month"
+ARCHIVE_PATH = "/_archive/sales"
+ARCHIVED_IDS_PATH = f"{ARCHIVE_PATH}/ids"
+ARCHIVED_MONTHS_PATH = f"{ARCHIVE_PATH}/months"  # /_archive/sales/months/{YYYY-MM} = {count, archived_at}
+
+# Las particiones solo tienen toda la historia cuando terminó la migración que
+# copia /sales (scripts/migrations/m0006_sales_by_month.py). Antes de eso una venta
+# nueva crea su partición pero las antiguas siguen solo en /sales.
+MIGRATIONS_PATH = "/_migrations"
+PARTITIONS_MIGRATION = "2026-10-partition-sales-by-month"
+PARTITIONS_CHECK_SECONDS = float(os.getenv("PARTITIONS_CHECK_SECONDS", "30"))
+_partitions: Dict[str, Any] = {"ready": False, "checked_at": None}
+
+
+def partitions_ready() -> bool:
+    """
+    True cuando el checkpoint de la migración de particiones está completo. Una vez
+    completo no vuelve atrás (se guarda en el proceso); mientras no, se relee cada
+    PARTITIONS_CHECK_SECONDS.
+    """
+    if _partitions["ready"]:
+        return True
+    now = time.monotonic()
+    checked_at = _partitions["checked_at"]
+    if checked_at is not None and now - checked_at < PARTITIONS_CHECK_SECONDS:
+        return False
+    checkpoint = rtdb(f"{MIGRATIONS_PATH}/{PARTITIONS_MIGRATION}").get()
+    # formato antiguo del runner: timestamp de cuando se aplicó
+    done = checkpoint is not None and (not isinstance(checkpoint, dict) or checkpoint.get("status") == "done")
+    _partitions["ready"], _partitions["checked_at"] = done, now
+    return done
+
+
+# Lecturas en paralelo de ventas referenciadas por el índice (el SDK no tiene multi-get)
+_fetch_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv("SALE_FETCH_WORKERS", "8")),
+    thread_name_prefix="sale-fetch",
+)
+
+
+def _product_index_path(sale_id: str, sale: Dict[str, Any]) -> Optional[str]:
+    product_id = sale.get("product_id")
+    if not product_id:
+        return None
+    return f"{SALES_BY_PRODUCT_PATH}/{product_id}/{sale_id}"
+
+
+def sale_month(sale: Dict[str, Any]) -> Optional[str]:
+    """'YYYY-MM' de la fecha de la venta (None si no trae fecha válida)."""
+    month = str(sale.get("date") or "")[:7]
+    return month if len(month) == 7 and month[4] == "-" else None
+
+
+def _partition_path(sale_id: str, sale: Dict[str, Any]) -> Optional[str]:
+    month = sale_month(sale)
+    return f"{SALES_BY_MONTH_PATH}/{month}/{sale_id}" if month else None
+
+
+def _write_paths(sale_id: str, sale: Dict[str, Any]) -> Dict[str, Any]:
+    """Venta + copia en su partición + entrada en el índice por producto."""
+    paths: Dict[str, Any] = {f"{SALES_PATH}/{sale_id}": sale}
+    partition_path = _partition_path(sale_id, sale)
+    if partition_path:
+        paths[partition_path] = sale
+    index_path = _product_index_path(sale_id, sale)
+    if index_path:
+        paths[index_path] = sale.get("date") or True
+    return paths
+
+
+def _merge_pages(hot: List[Tuple[str, Any]], hot_next: Optional[str],
+                 archived: List[Tuple[str, Any]], archived_next: Optional[str],
+                 limit: int) -> Tuple[List[Tuple[str, Any, bool]], Optional[str]]:
+    """
+    Une una página de /sales con una del índice de archivadas (mismo `after`):
+    [(key, valor, archivada)] en orden de clave y la clave para seguir.
+    """
+    merged = sorted(
+        [(k, v, False) for k, v in hot] + [(k, v, True) for k, v in archived],
+        key=lambda e: key_rank(e[0]),
+    )
+    page = merged[:limit]
+    more = len(merged) > limit or hot_next is not None or archived_next is not None
+    return page, (page[-1][0] if more and page else None)
+
+
+def _replicate(sales: List[Tuple[str, Dict[str, Any]]]) -> None:
+    """Escrituras propias a la réplica local (sin esperar el eco del listener)."""
+    replica = replica_instance()
+    if replica is not None:
+        for sale_id, sale in sales:
+            replica.apply_sale(sale_id, sale, sale_month(sale))
 
 class SaleRepo:
     @staticmethod
     def get_by_id(sale_id: str) -> Optional[Dict[str, Any]]:
-        return rtdb(f"{SALES_PATH}/{sale_id}").get()
+        data = rtdb(f"{SALES_PATH}/{sale_id}").get()
+        if data is not None:
+            return data
+        # archivada: el índice dice en qué partición quedó
+        month = rtdb(f"{ARCHIVED_IDS_PATH}/{sale_id}").get()
+        if not isinstance(month, str):
+            return None
+        return rtdb(f"{SALES_BY_MONTH_PATH}/{month}/{sale_id}").get()
+
+    @staticmethod
+    def get_archived(entries: List[Tuple[str, str]]) -> List[Optional[Dict[str, Any]]]:
+        """Lee ventas archivadas [(sale_id, mes)] de sus particiones, en paralelo."""
+        return list(_fetch_pool.map(
+            lambda e: rtdb(f"{SALES_BY_MONTH_PATH}/{e[1]}/{e[0]}").get(), entries
+        ))
 
     @staticmethod
     def upsert(sale_id: str, sale: Dict[str, Any]) -> None:
-        """Crea o actualiza una venta."""
-        rtdb(f"{SALES_PATH}/{sale_id}").set(sale)
+        """Crea o actualiza una venta (y su copia en la partición del mes)."""
+        rtdb().update(_write_paths(sale_id, sale))
+
+    @staticmethod
+    def create(sale_id: str, sale: Dict[str, Any]) -> None:
+        """Crea la venta, su partición, su entrada en el índice por producto y suma sus rollups (un update multi-path)."""
+        paths = _write_paths(sale_id, sale)
+        paths.update(RollupRepo.increments(RollupRepo.deltas(sale, +1)))
+        rtdb().update(paths)
+        _replicate([(sale_id, sale)])
+
+    @staticmethod
+    def create_many(sales: List[Tuple[str, Dict[str, Any]]]) -> None:
+        """
+        Crea varias ventas en un solo update multi-path: ventas, particiones,
+        índice por producto y rollups (los deltas de ventas del mismo día/mes se
+        suman por ruta).
+        """
+        paths: Dict[str, Any] = {}
+        deltas: Dict[str, int] = {}
+        for sale_id, sale in sales:
+            paths.update(_write_paths(sale_id, sale))
+            RollupRepo.merge(deltas, RollupRepo.deltas(sale, +1))
+        paths.update(RollupRepo.increments(deltas))
+        rtdb().update(paths)
+        _replicate(sales)
+
+    @staticmethod
+    def remove(sale_id: str, sale: Dict[str, Any]) -> None:
+        """Borra la venta (ya leída, activa o archivada) de todas sus rutas y resta sus rollups (un update multi-path)."""
+        paths: Dict[str, Any] = {path: None for path in _write_paths(sale_id, sale)}
+        paths[f"{ARCHIVED_IDS_PATH}/{sale_id}"] = None
+        paths.update(RollupRepo.increments(RollupRepo.deltas(sale, -1)))
+        rtdb().update(paths)
+        replica = replica_instance()
+        if replica is not None:
+            replica.remove_sale(sale_id)
 
     @staticmethod
     def delete(sale_id: str) -> None:
@@ -28,17 +186,222 @@ class SaleRepo:
         return [{"id": k, **v} for k, v in data.items() if isinstance(v, dict)]
 
     @staticmethod
-    def list_by_product(product_id: str, limit: int = 50) -> List[Dict[str, Any]]:
-        """Lista ventas asociadas a un producto específico."""
-        data = (
-            rtdb(SALES_PATH)
-            .order_by_child("product_id")
-            .equal_to(product_id)
-            .limit_to_first(limit)
-            .get()
-        )
+    def list_page(limit: int = 50, after: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Página por clave: (ventas, última clave si hay más). Incluye las ventas
+        archivadas en su lugar (el índice de archivadas se pagina con el mismo cursor).
+        """
+        replica = read_replica("sales")
+        if replica is not None:
+            return replica.sales_page(limit, after)
+        hot, hot_next = key_page(SALES_PATH, limit, after)
+        archived, archived_next = key_page(ARCHIVED_IDS_PATH, limit, after)
+        if not archived:
+            return [{"id": k, **v} for k, v in hot if isinstance(v, dict)], hot_next
+
+        page, next_key = _merge_pages(hot, hot_next, archived, archived_next, limit)
+        cold = [(k, v) for k, v, is_archived in page if is_archived and isinstance(v, str)]
+        docs = dict(zip((k for k, _ in cold), SaleRepo.get_archived(cold)))
+        out = []
+        for k, v, is_archived in page:
+            doc = docs.get(k) if is_archived else v
+            if isinstance(doc, dict):
+                out.append({"id": k, **doc})
+        return out, next_key
+
+    @staticmethod
+    def latest(limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Últimas `limit` ventas, más reciente primero.
+        Las claves push (empiezan con "-") ordenan antes que los uuid legacy, así
+        que end_at(PUSH_ID_END).limit_to_last(n) trae directamente las más nuevas.
+        Si no alcanzan, se completa con las ventas legacy (uuid) más recientes por date.
+        """
+        data = rtdb(SALES_PATH).order_by_key().end_at(PUSH_ID_END).limit_to_last(limit).get()
+        out = [{"id": k, **v} for k, v in (data or {}).items() if isinstance(v, dict)]
+        out.reverse()
+        if len(out) >= limit:
+            return out
 
+        # compatibilidad: claves uuid no tienen orden temporal -> índice por date
+        legacy = rtdb(SALES_PATH).order_by_child("date").limit_to_last(limit).get() or {}
+        rows = [{"id": k, **v} for k, v in legacy.items() if isinstance(v, dict) and not is_push_id(k)]
+        rows.reverse()
+        out += rows[:limit - len(out)]
+        if len(out) >= limit:
+            return out
+
+        # todo lo activo no alcanza: las archivadas más nuevas (push IDs al final)
+        archived = rtdb(ARCHIVED_IDS_PATH).order_by_key().end_at(PUSH_ID_END).limit_to_last(limit - len(out)).get() or {}
+        cold = [(k, m) for k, m in reversed(list(archived.items())) if isinstance(m, str)]
+        out += [{"id": k, **doc} for (k, _), doc in zip(cold, SaleRepo.get_archived(cold)) if isinstance(doc, dict)]
+        return out
+
+    @staticmethod
+    def months() -> List[str]:
+        """Meses con partición, en orden (lectura shallow: solo las claves)."""
+        data = rtdb(SALES_BY_MONTH_PATH).get(shallow=True)
+        return sorted(data) if isinstance(data, dict) else []
+
+    @staticmethod
+    def iter_by_date(start: Optional[str] = None, end: Optional[str] = None,
+                     page_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """
+        Ventas con `date` en [start, end] (comparación de strings ISO), en orden
+        de fecha. Con la migración de particiones completa solo se leen las
+        particiones de los meses del rango (incluye las archivadas); antes se
+        recorre /sales, que todavía tiene toda la historia.
+        Con la réplica local lista, sale de SQLite (índice por date).
+        """
+        replica = read_replica("sales")
+        if replica is not None:
+            yield from replica.iter_sales(start, end)
+            return
+        if not partitions_ready():
+            yield from SaleRepo.iter_by_child_date(SALES_PATH, start, end, page_size)
+            return
+        for month in SaleRepo.months():
+            if start is not None and month < start[:7]:
+                continue
+            if end is not None and month > end[:7]:
+                break
+            yield from SaleRepo.iter_by_child_date(f"{SALES_BY_MONTH_PATH}/{month}", start, end, page_size)
+
+    @staticmethod
+    def iter_by_child_date(path: str, start: Optional[str] = None, end: Optional[str] = None,
+                           page_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """
+        Recorre los hijos de `path` con `date` en [start, end] usando
+        order_by_child("date") por páginas. Requiere ".indexOn": ["date"] en
+        la ruta (ver database.rules.json).
+
+        El cursor es (último date, claves ya entregadas con ese date): start_at()
+        vuelve a incluir los empates, que se descartan sin repetir ventas.
+        """
+        cursor = start or ""  # "" deja fuera nodos sin date (null/bool) y basura
+        seen: Set[str] = set()
+        while True:
+            query = rtdb(path).order_by_child("date").start_at(cursor)
+            if end is not None:
+                query = query.end_at(end)
+            want = page_size + len(seen)
+            data = query.limit_to_first(want).get()
+            if not isinstance(data, dict) or not data:
+                return
+
+            for k, v in data.items():
+                if k in seen or not isinstance(v, dict):
+                    continue
+                yield {"id": k, **v}
+            if len(data) < want:
+                return
+
+            dates = [(k, v.get("date") if isinstance(v, dict) else None) for k, v in data.items()]
+            last_date = dates[-1][1]
+            if not isinstance(last_date, str):
+                return
+            tied = {k for k, d in dates if d == last_date}
+            seen = (seen | tied) if last_date == cursor else tied
+            cursor = last_date
+
+    @staticmethod
+    def iter_all(page_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """Todas las ventas: primero las particiones archivadas (las más antiguas), luego /sales."""
+        archived = rtdb(ARCHIVED_MONTHS_PATH).get(shallow=True)
+        for month in sorted(archived) if isinstance(archived, dict) else []:
+            for page in iter_pages(f"{SALES_BY_MONTH_PATH}/{month}", page_size):
+                for k, v in page:
+                    if isinstance(v, dict):
+                        yield {"id": k, **v}
+        for page in iter_pages(SALES_PATH, page_size):
+            for k, v in page:
+                if isinstance(v, dict):
+                    yield {"id": k, **v}
+
+    @staticmethod
+    def get_many(sale_ids: List[str]) -> List[Dict[str, Any]]:
+        """Lee varias ventas en paralelo, en el orden pedido; omite las que ya no existen."""
+        docs = _fetch_pool.map(SaleRepo.get_by_id, sale_ids)
+        return [{"id": sid, **doc} for sid, doc in zip(sale_ids, docs) if isinstance(doc, dict)]
+
+    @staticmethod
+    def list_by_product(product_id: str, limit: int = 50,
+                        after: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Ventas de un producto vía /_indexes/sales_by_product: una página de ids
+        (orden de clave = orden de creación) y luego lectura de esas ventas.
+        """
+        items, next_key = key_page(f"{SALES_BY_PRODUCT_PATH}/{product_id}", limit, after)
+        return SaleRepo.get_many([sid for sid, _ in items]), next_key
+
+    @staticmethod
+    def iter_by_product(product_id: str, start: Optional[str] = None, end: Optional[str] = None,
+                        batch_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """
+        Ventas de un producto con fecha en [start, end] (strings ISO). El rango se
+        resuelve sobre el índice (valor = fecha, ".indexOn": ".value") y solo se
+        leen las ventas que caen dentro.
+        """
+        replica = read_replica("sales")
+        if replica is not None:
+            yield from replica.iter_sales(start, end, product_id)
+            return
+        query = rtdb(f"{SALES_BY_PRODUCT_PATH}/{product_id}").order_by_value()
+        if start is not None:
+            query = query.start_at(start)
+        if end is not None:
+            query = query.end_at(end)
+        data = query.get()
         if not isinstance(data, dict):
-            return []
+            return
+        sale_ids = list(data.keys())
+        for i in range(0, len(sale_ids), batch_size):
+            yield from SaleRepo.get_many(sale_ids[i:i + batch_size])
 
-        return [{"id": k, **v} for k, v in data.items() if isinstance(v, dict)]
+    # ---------------------------
+    # Async (API REST + httpx, ver app/core/rtdb_async.py)
+    # ---------------------------
+    @staticmethod
+    async def alist_page(limit: int = 50, after: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        replica = read_replica("sales")
+        if replica is not None:
+            return await asyncio.to_thread(replica.sales_page, limit, after)
+        (hot, hot_next), (archived, archived_next) = await asyncio.gather(
+            akey_page(SALES_PATH, limit, after),
+            akey_page(ARCHIVED_IDS_PATH, limit, after),
+        )
+        if not archived:
+            return [{"id": k, **v} for k, v in hot if isinstance(v, dict)], hot_next
+
+        page, next_key = _merge_pages(hot, hot_next, archived, archived_next, limit)
+        cold = [(k, v) for k, v, is_archived in page if is_archived and isinstance(v, str)]
+        docs = await asyncio.gather(*(artdb(f"{SALES_BY_MONTH_PATH}/{m}/{k}").get() for k, m in cold))
+        by_id = dict(zip((k for k, _ in cold), docs))
+        out = []
+        for k, v, is_archived in page:
+            doc = by_id.get(k) if is_archived else v
+            if isinstance(doc, dict):
+                out.append({"id": k, **doc})
+        return out, next_key
+
+    @staticmethod
+    async def aget_by_id(sale_id: str) -> Optional[Dict[str, Any]]:
+        data = await artdb(f"{SALES_PATH}/{sale_id}").get()
+        if data is not None:
+            return data
+        month = await artdb(f"{ARCHIVED_IDS_PATH}/{sale_id}").get()
+        if not isinstance(month, str):
+            return None
+        return await artdb(f"{SALES_BY_MONTH_PATH}/{month}/{sale_id}").get()
+
+    @staticmethod
+    async def aget_many(sale_ids: List[str]) -> List[Dict[str, Any]]:
+        """Lecturas concurrentes sobre el cliente HTTP compartido (sin hilos)."""
+        docs = await asyncio.gather(*(SaleRepo.aget_by_id(sid) for sid in sale_ids))
+        return [{"id": sid, **doc} for sid, doc in zip(sale_ids, docs) if isinstance(doc, dict)]
+
+    @staticmethod
+    async def alist_by_product(product_id: str, limit: int = 50,
+                               after: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        items, next_key = await akey_page(f"{SALES_BY_PRODUCT_PATH}/{product_id}", limit, after)
+        return await SaleRepo.aget_many([sid for sid, _ in items]), next_key
@@ -1,8 +1,62 @@
-from typing import Optional, Dict, Any, List
-from ..core.firebase import rtdb
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple
+from ..core.firebase import rtdb, key_page
+from ..core.ids import push_id
+from ..core.replica import read_replica, replica_instance
+from ..core.token_cache import token_cache
 
 USERS_PATH = "/users"
 EMAIL_INDEX_PATH = "/_indexes/email_to_uid"
+# Proyección para login: email -> {uid, email, role, disabled, password}; una sola lectura
+AUTH_INDEX_PATH = "/_indexes/auth_by_email"
+AUTH_FIELDS = ("email", "role", "disabled", "password")
+
+# Caché local de la proyección (login sin lecturas en caliente). El TTL acota cuánto
+# puede tardar en verse un cambio hecho por otro proceso; los de este proceso se ven al instante.
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "1000"))
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "60"))
+
+_auth_cache: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+_auth_lock = threading.Lock()
+
+
+def email_key(email: str) -> str:
+    return email.replace(".", ",")
+
+
+def auth_entry(uid: str, profile: Dict[str, Any]) -> Dict[str, Any]:
+    entry = {k: profile.get(k) for k in AUTH_FIELDS}
+    entry["uid"] = uid
+    entry["disabled"] = bool(entry["disabled"])
+    return entry
+
+
+def _cache_get(email: str) -> Optional[Dict[str, Any]]:
+    with _auth_lock:
+        hit = _auth_cache.get(email)
+        if hit is None:
+            return None
+        if time.monotonic() >= hit[1]:
+            del _auth_cache[email]
+            return None
+        _auth_cache.move_to_end(email)
+        return hit[0]
+
+
+def _cache_put(email: str, entry: Optional[Dict[str, Any]]) -> None:
+    if AUTH_CACHE_SIZE <= 0:
+        return
+    with _auth_lock:
+        if entry is None:
+            _auth_cache.pop(email, None)
+            return
+        _auth_cache[email] = (entry, time.monotonic() + AUTH_CACHE_TTL)
+        _auth_cache.move_to_end(email)
+        while len(_auth_cache) > AUTH_CACHE_SIZE:
+            _auth_cache.popitem(last=False)
 
 class UserRepo:
     @staticmethod
@@ -11,20 +65,72 @@ class UserRepo:
 
     @staticmethod
     def get_by_email(email: str) -> Optional[Dict[str, Any]]:
-        uid = rtdb(f"{EMAIL_INDEX_PATH}/{email.replace('.', ',')}").get()
+        """Perfil del usuario con su uid, o None."""
+        replica = read_replica("users")
+        if replica is not None:
+            return replica.user_by_email(email)
+        uid = rtdb(f"{EMAIL_INDEX_PATH}/{email_key(email)}").get()
         if not uid:
             return None
         data = rtdb(f"{USERS_PATH}/{uid}").get()
-        return data
+        return {"uid": uid, **data} if isinstance(data, dict) else None
+
+    @staticmethod
+    def get_auth(email: str) -> Optional[Dict[str, Any]]:
+        """
+        Lo que necesita el login (uid, email, role, disabled, password) con a lo sumo
+        una lectura: caché local, réplica o /_indexes/auth_by_email. Si el usuario aún
+        no tiene proyección (antes de la migración) se cae al camino de dos lecturas.
+        """
+        entry = _cache_get(email)
+        if entry is not None:
+            return entry
+        replica = read_replica("users")
+        if replica is not None:
+            user = replica.user_by_email(email)
+        else:
+            user = rtdb(f"{AUTH_INDEX_PATH}/{email_key(email)}").get()
+            if not isinstance(user, dict) or not user.get("uid"):
+                user = UserRepo.get_by_email(email)
+        if not user:
+            return None
+        entry = auth_entry(user["uid"], user)
+        _cache_put(email, entry)
+        return entry
+
+    @staticmethod
+    def create(profile: Dict[str, Any]) -> str:
+        """Crea el usuario (perfil + índice de email) con un uid nuevo."""
+        uid = push_id()
+        UserRepo.upsert_profile(uid, profile)
+        return uid
+
+    @staticmethod
+    def update_password(uid: str, email: str, hashed: str) -> None:
+        rtdb().update({
+            f"{USERS_PATH}/{uid}/password": hashed,
+            f"{AUTH_INDEX_PATH}/{email_key(email)}/password": hashed,
+        })
+        entry = _cache_get(email)
+        if entry is not None and entry.get("uid") == uid:
+            _cache_put(email, {**entry, "password": hashed})
 
     @staticmethod
     def upsert_profile(uid: str, profile: Dict[str, Any]) -> None:
-        # upsert atómico + índice de email
-        email_key = profile["email"].replace(".", ",")
+        # upsert atómico + índice de email + proyección de login
+        key = email_key(profile["email"])
+        entry = auth_entry(uid, profile)
         rtdb().update({
             f"{USERS_PATH}/{uid}": profile,
-            f"{EMAIL_INDEX_PATH}/{email_key}": uid
+            f"{EMAIL_INDEX_PATH}/{key}": uid,
+            f"{AUTH_INDEX_PATH}/{key}": entry,
         })
+        _cache_put(profile["email"], entry)
+        if entry["disabled"]:
+            token_cache.revoke_uid(uid)  # sus tokens vigentes dejan de valer en este proceso
+        replica = replica_instance()
+        if replica is not None:
+            replica.apply_user(uid, profile)
 
     @staticmethod
     def list(limit: int = 50) -> List[Dict[str, Any]]:
@@ -36,3 +142,8 @@ class UserRepo:
 
         return [{"uid": k, **v} for k, v in data.items() if isinstance(v, dict)]
 
+    @staticmethod
+    def list_page(limit: int = 50, after: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Página por uid: (usuarios, último uid si hay más)."""
+        items, next_key = key_page(USERS_PATH, limit, after)
+        return [{"uid": k, **v} for k, v in items if isinstance(v, dict)], next_key
@@ -1,23 +1,43 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from ..models.user import UserResponse
+from ..models.auth import RefreshRequest
 from ..services.auth_service import AuthService
-from ..core.deps import get_current_user
+from ..core.deps import get_current_user, require_role
+from ..core.passwords import password_hasher
+from ..core.token_cache import token_cache
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
 @router.post("/login")
-def login(email: str, password: str):
+async def login(email: str, password: str):
     """
-    Genera un JWT válido si las credenciales son correctas.
+    Genera un JWT válido si las credenciales son correctas, más un refresh token.
     """
-    token = AuthService.login(email, password)
-    if not token:
+    tokens = await AuthService.login(email, password)
+    if not tokens:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Credenciales inválidas"
         )
-    return {"access_token": token, "token_type": "bearer"}
+    return tokens
+
+
+@router.post("/refresh")
+async def refresh(body: RefreshRequest):
+    """
+    Renueva el access token sin contraseña. El refresh token usado deja de valer;
+    la respuesta trae uno nuevo.
+    """
+    return await AuthService.refresh(body.refresh_token)
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(body: RefreshRequest):
+    """
+    Revoca el refresh token (el access token vigente expira solo).
+    """
+    await AuthService.logout(body.refresh_token)
 
 
 @router.get("/me", response_model=UserResponse)
@@ -25,4 +45,16 @@ def me(current_user: dict = Depends(get_current_user)):
     """
     Devuelve la información del usuario autenticado a partir del token.
     """
-    return current_user
\ No newline at end of file
+    return current_user
+
+
+# HASHING STATS (pool de bcrypt: cola, rechazos, rehash)
+@router.get("/hashing/stats")
+def hashing_stats(current_user: dict = Depends(require_role("superadmin"))):
+    return password_hasher.stats()
+
+
+# TOKEN CACHE STATS (tokens verificados en memoria: aciertos, expulsiones)
+@router.get("/token-cache/stats")
+def token_cache_stats(current_user: dict = Depends(require_role("superadmin"))):
+    return token_cache.stats()
@@ -1,13 +1,20 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List, Optional
+import io
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, UploadFile, File
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 
 from ..core.deps import get_current_user, require_role
+from ..core.pagination import NEXT_CURSOR_HEADER
 from ..services.product_service import ProductService
+from ..services.sale_service import SaleService
+from ..models.sale import SaleResponse
 from ..models.product import (
     ProductCreate,
     ProductUpdate,
     ProductResponse,
     ProductNameResponse,
+    ProductImportResponse,
 )
 
 router = APIRouter(prefix="/products", tags=["products"])
@@ -26,10 +33,52 @@ def create_product(
 # LIST
 @router.get("", response_model=List[ProductResponse])
 def list_products(
+    response: Response,
     limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="Valor del header X-Next-Cursor de la página anterior"),
     current_user: dict = Depends(get_current_user),
 ):
-    return ProductService.list(limit=limit)
+    try:
+        items, next_cursor = ProductService.list_page(limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return items
+
+# IMPORT CSV (upsert por bloques; dry_run=true solo devuelve el diff)
+@router.post("/import", response_model=ProductImportResponse)
+def import_products(
+    file: UploadFile = File(...),
+    dry_run: bool = Query(False),
+    current_user: dict = Depends(require_role("superadmin")),
+):
+    # se lee fila a fila desde el archivo temporal del upload
+    text = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        return ProductService.import_csv(text, dry_run=dry_run)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        text.detach()
+
+# EXPORT CSV
+@router.get("/export")
+def export_products(
+    current_user: dict = Depends(require_role("superadmin")),
+):
+    return StreamingResponse(
+        ProductService.export_csv(),
+        media_type="text/csv; charset=utf-8",
+        headers={"Content-Disposition": 'attachment; filename="products.csv"'},
+    )
+
+# CACHE STATS
+@router.get("/cache/stats")
+def cache_stats(
+    current_user: dict = Depends(require_role("superadmin")),
+):
+    return ProductService.cache_stats()
 
 # GET BY ID
 @router.get("/{product_id}", response_model=ProductResponse)
@@ -85,4 +134,24 @@ def get_name_by_id(
     res = ProductService.get_name_by_id(product_id)
     if not res:
         raise HTTPException(status_code=404, detail="Producto no encontrado.")
-    return res
\ No newline at end of file
+    return res
+
+# SALES OF A PRODUCT (índice /_indexes/sales_by_product)
+@router.get("/{product_id}/sales", response_model=List[SaleResponse])
+async def list_product_sales(
+    product_id: str,
+    response: Response,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="Valor del header X-Next-Cursor de la página anterior"),
+    current_user: dict = Depends(get_current_user),
+):
+    # el catálogo puede estar cargándose (bloqueante): fuera del event loop
+    if not await run_in_threadpool(ProductService.get_by_id, product_id):
+        raise HTTPException(status_code=404, detail="Producto no encontrado.")
+    try:
+        items, next_cursor = await SaleService.list_sales_by_product_async(product_id, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return items
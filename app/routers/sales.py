@@ -1,7 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from ..core.deps import get_current_user, require_role
-from ..services.sale_service import SaleService
-from ..models.sale import SaleCreate, SaleResponse
+from ..core.pagination import NEXT_CURSOR_HEADER
+from ..services.sale_service import SaleService, ExportFormat, parse_bulk_body
+from ..models.sale import (
+    SaleCreate,
+    SaleResponse,
+    SalesReportResponse,
+    SalesBreakdownResponse,
+    GroupBy,
+    BreakdownBy,
+    TopMetric,
+    TopProductsResponse,
+    PaymentMixResponse,
+    HourlyHeatmapResponse,
+    BulkSalesResponse,
+)
 
 router = APIRouter(prefix="/sales", tags=["sales"])
 
@@ -15,18 +31,129 @@ def create_sale(
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.post("/bulk", response_model=BulkSalesResponse)
+async def create_sales_bulk(
+    request: Request,
+    current_user: dict = Depends(require_role("superadmin")),
+):
+    """
+    Carga masiva: arreglo JSON de ventas o NDJSON (Content-Type: application/x-ndjson).
+    Cada item tiene el formato de POST /sales; la respuesta trae un resultado por item.
+    """
+    try:
+        items = parse_bulk_body(await request.body(), request.headers.get("content-type"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # lecturas/escrituras RTDB son bloqueantes: fuera del event loop
+    return await run_in_threadpool(SaleService.create_bulk, items)
+
 @router.get("", response_model=list[SaleResponse])
-def list_sales(
-    limit: int = 50,
+async def list_sales(
+    response: Response,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="Valor del header X-Next-Cursor de la página anterior"),
     current_user: dict = Depends(get_current_user)  # 🔒 Cualquier usuario logueado puede ver
 ):
-    return SaleService.list_sales(limit)
+    try:
+        items, next_cursor = await SaleService.list_sales_async(limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return items
+
+
+
+@router.get("/latest", response_model=list[SaleResponse])
+def latest_sales(
+    limit: int = Query(20, ge=1, le=500),
+    current_user: dict = Depends(get_current_user),
+):
+    return SaleService.latest_sales(limit)
 
+@router.get("/export")
+def export_sales(
+    format: ExportFormat = "csv",
+    date_from: Optional[str] = Query(None, description="YYYY-MM-DD o ISO-8601 (inclusive)"),
+    date_to: Optional[str] = Query(None, description="YYYY-MM-DD o ISO-8601 (inclusive)"),
+    current_user: dict = Depends(get_current_user),
+):
+    try:
+        chunks = SaleService.export(format, date_from=date_from, date_to=date_to)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if format == "csv":
+        media_type, filename = "text/csv; charset=utf-8", "sales.csv"
+    else:
+        media_type, filename = "application/x-ndjson", "sales.ndjson"
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
+@router.get("/report", response_model=SalesReportResponse)
+def report_sales(
+    date_from: Optional[str] = Query(None, description="YYYY-MM-DD o ISO-8601 (inclusive)"),
+    date_to: Optional[str] = Query(None, description="YYYY-MM-DD o ISO-8601 (inclusive)"),
+    group_by: GroupBy = "day",
+    _=Depends(get_current_user),  # mantiene autenticación, sin warning
+):
+    try:
+        return SaleService.report(date_from=date_from, date_to=date_to, group_by=group_by)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-@router.get("/report")
-def report_sales(_=Depends(get_current_user)):  # mantiene autenticación, sin warning
-    return SaleService.report()
+@router.get("/report/breakdown", response_model=SalesBreakdownResponse)
+def report_breakdown(
+    by: BreakdownBy = "product",
+    date_from: Optional[str] = Query(None, description="YYYY-MM-DD o ISO-8601 (inclusive)"),
+    date_to: Optional[str] = Query(None, description="YYYY-MM-DD o ISO-8601 (inclusive)"),
+    product_id: Optional[str] = Query(None, description="Solo ventas de este producto"),
+    _=Depends(get_current_user),
+):
+    try:
+        return SaleService.breakdown(by=by, date_from=date_from, date_to=date_to, product_id=product_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# -------------------------------------------------------------------
+# Analytics (agregaciones en el servidor; ventana de fechas opcional)
+# -------------------------------------------------------------------
+@router.get("/analytics/top-products", response_model=TopProductsResponse)
+def analytics_top_products(
+    metric: TopMetric = "revenue",
+    limit: int = Query(10, ge=1, le=100),
+    date_from: Optional[str] = Query(None, description="YYYY-MM-DD o ISO-8601 (inclusive)"),
+    date_to: Optional[str] = Query(None, description="YYYY-MM-DD o ISO-8601 (inclusive)"),
+    _=Depends(get_current_user),
+):
+    try:
+        return SaleService.top_products(metric=metric, limit=limit, date_from=date_from, date_to=date_to)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/analytics/payment-mix", response_model=PaymentMixResponse)
+def analytics_payment_mix(
+    date_from: Optional[str] = Query(None, description="YYYY-MM-DD o ISO-8601 (inclusive)"),
+    date_to: Optional[str] = Query(None, description="YYYY-MM-DD o ISO-8601 (inclusive)"),
+    _=Depends(get_current_user),
+):
+    try:
+        return SaleService.payment_mix(date_from=date_from, date_to=date_to)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/analytics/hourly-heatmap", response_model=HourlyHeatmapResponse)
+def analytics_hourly_heatmap(
+    date_from: Optional[str] = Query(None, description="YYYY-MM-DD o ISO-8601 (inclusive)"),
+    date_to: Optional[str] = Query(None, description="YYYY-MM-DD o ISO-8601 (inclusive)"),
+    _=Depends(get_current_user),
+):
+    try:
+        return SaleService.hourly_heatmap(date_from=date_from, date_to=date_to)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.delete("/{sale_id}", status_code=204)
 def delete_sale(
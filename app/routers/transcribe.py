@@ -8,6 +8,7 @@ from pathlib import Path
 
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException
 from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 
 router = APIRouter(prefix="/api", tags=["stt"])
 
@@ -187,7 +188,8 @@ async def transcribe(file: UploadFile = File(...), language: str = Form(LANG_DEF
 
         if STT_ENGINE == "vosk":
             # Vosk necesita WAV 16k mono -> convertimos con ffmpeg
-            result = _vosk_transcribe_bytes(content, file.filename or "audio.bin")
+            # (ffmpeg + reconocimiento bloquean: van a un hilo para no frenar el event loop)
+            result = await run_in_threadpool(_vosk_transcribe_bytes, content, file.filename or "audio.bin")
         else:
             # faster-whisper acepta varios formatos (ffmpeg interno vía decode)
             # pero por simplicidad guardamos a un archivo temporal
@@ -195,7 +197,7 @@ async def transcribe(file: UploadFile = File(...), language: str = Form(LANG_DEF
             tmp.write(content); tmp.flush(); tmp.close()
 
             try:
-                result = _fw_transcribe(tmp.name, language)
+                result = await run_in_threadpool(_fw_transcribe, tmp.name, language)
             finally:
                 try: os.unlink(tmp.name)
                 except: pass
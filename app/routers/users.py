@@ -1,4 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from ..core.pagination import NEXT_CURSOR_HEADER
+from ..core.passwords import PasswordHasherBusy
 from ..models.user import UserCreate, UserResponse
 from ..services.user_service import UserService
 from ..core.deps import get_current_user, require_role
@@ -12,13 +15,24 @@ def create_user(
 ):
     try:
         return UserService.create_if_not_exists(body)
+    except PasswordHasherBusy as e:
+        # pool de hashing lleno: reintentable, no es un error del body
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "2"})
     except Exception as e:
         raise HTTPException(400, str(e))
 
 
 @router.get("", response_model=list[UserResponse])
 def list_users(
-    limit: int = 50,
+    response: Response,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="Valor del header X-Next-Cursor de la página anterior"),
     current_user: dict = Depends(get_current_user)  # 🔒 Cualquiera logueado
 ):
-    return UserService.list_users(limit)
\ No newline at end of file
+    try:
+        items, next_cursor = UserService.list_users(limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return items
\ No newline at end of file
@@ -1,33 +1,81 @@
+from typing import Any, Dict
 from fastapi import HTTPException, status
-from ..core.security import create_access_token
+from starlette.concurrency import run_in_threadpool
+from ..core.security import create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES, REFRESH_TOKEN_EXPIRE_DAYS
+from ..core.passwords import password_hasher, PasswordHasherBusy
 from ..repositories.user_repo import UserRepo
-from ..core.security import ACCESS_TOKEN_EXPIRE_MINUTES
+from ..repositories.refresh_token_repo import RefreshTokenRepo
 
 class AuthService:
     @staticmethod
-    def login(email: str, password: str) -> str:
-        # Tu repositorio debe devolver user con keys: email, role, uid, password_hash
-        user = UserRepo.get_by_email(email)
+    async def login(email: str, password: str) -> Dict[str, Any]:
+        # proyección de login (uid, email, role, disabled, password): una lectura o ninguna
+        user = await run_in_threadpool(UserRepo.get_auth, email)
         if not user:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Credenciales inválidas")
 
-        # verifica contraseña: asumo que ya tienes verify_password somewhere,
-        # si usas passlib: pwd_context.verify(password, user["password"])
-        from ..core.security import SECRET_KEY  # solo por visibilidad, no necesario aquí
-        from passlib.context import CryptContext
-        pwd = CryptContext(schemes=["bcrypt"], deprecated="auto")
-        if "password" not in user:
+        if not user.get("password"):
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Usuario sin contraseña")
-        if not pwd.verify(password, user["password"]):
+
+        # bcrypt corre en el pool de hashing; la request solo espera (no ocupa un hilo)
+        try:
+            ok, new_hash = await password_hasher.averify_and_update(password, user["password"])
+        except PasswordHasherBusy as e:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e),
+                                headers={"Retry-After": "2"})
+        if not ok:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Credenciales inválidas")
 
+        # después de verificar: no revela qué cuentas existen
+        if user.get("disabled"):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Usuario deshabilitado")
+
+        # el hash guardado usa otro costo (PASSWORD_BCRYPT_ROUNDS cambió): se actualiza ahora
+        if new_hash and user.get("uid"):
+            await run_in_threadpool(UserRepo.update_password, user["uid"], user["email"], new_hash)
+
+        return await AuthService._issue_tokens(user)
+
+    @staticmethod
+    async def refresh(refresh_token: str) -> Dict[str, Any]:
+        """
+        Canjea un refresh token por un access token nuevo sin bcrypt. El refresh token
+        se consume (rotación): el cliente debe guardar el que viene en la respuesta.
+        """
+        record = await run_in_threadpool(RefreshTokenRepo.consume, refresh_token)
+        if not record:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token inválido o expirado")
+
+        # rol y estado actuales (proyección de login; normalmente sin lecturas)
+        user = await run_in_threadpool(UserRepo.get_auth, record.get("email") or "")
+        if not user or user.get("uid") != record.get("uid"):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token inválido o expirado")
+        if user.get("disabled"):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Usuario deshabilitado")
+
+        return await AuthService._issue_tokens(user)
+
+    @staticmethod
+    async def logout(refresh_token: str) -> None:
+        await run_in_threadpool(RefreshTokenRepo.revoke, refresh_token)
+
+    @staticmethod
+    async def _issue_tokens(user: Dict[str, Any]) -> Dict[str, Any]:
         # genera token con los claims que deps.py espera
         token = create_access_token(sub=user["email"], role=user.get("role", "user"), uid=user.get("uid", ""))
-        return token
+        refresh_token, _ = await run_in_threadpool(
+            RefreshTokenRepo.issue, user.get("uid", ""), user["email"], REFRESH_TOKEN_EXPIRE_DAYS * 86400
+        )
+        return {
+            "access_token": token,
+            "token_type": "bearer",
+            "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+            "refresh_token": refresh_token,
+        }
 
     @staticmethod
     def verify_token(token: str) -> dict:
         # útil si quieres chequear token manualmente en algún lugar
         from jose import jwt
         from ..core.security import SECRET_KEY, ALGORITHM
-        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
\ No newline at end of file
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
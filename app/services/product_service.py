@@ -1,11 +1,32 @@
-from typing import List, Optional, Dict, Any
+from bisect import bisect_left
+from typing import List, Optional, Dict, Any, Tuple, Iterable, Iterator
 from datetime import datetime, timezone
-import uuid
+import csv
+import io
+import math
+import os
+import re
+import threading
+import time
+import unicodedata
 
 from app.core.firebase import rtdb
+from app.core.replica import read_replica
+from app.core.pagination import encode_cursor, decode_cursor
+from app.core.ids import push_id
 from app.models.product import ProductCreate, ProductUpdate
 
 COLLECTION = "products"  # nodo raíz en RTDB: /products/{id}
+NAME_INDEX_PATH = "/_indexes/product_name"  # /_indexes/product_name/{nombre_normalizado}_{id} = id
+
+# Sin listener activo, la copia en memoria se recarga pasado este tiempo (segundos)
+CACHE_MAX_STALENESS = float(os.getenv("PRODUCT_CACHE_MAX_STALENESS", "300"))
+# Espera máxima por el snapshot inicial del listener antes de caer a un get()
+CACHE_LISTEN_TIMEOUT = float(os.getenv("PRODUCT_CACHE_LISTEN_TIMEOUT", "10"))
+# Import CSV: productos por update multi-path
+IMPORT_CHUNK_SIZE = int(os.getenv("PRODUCT_IMPORT_CHUNK_SIZE", "500"))
+EXPORT_COLUMNS = ["id", "name", "price", "status", "created_at"]
+_INVALID_KEY = re.compile(r"[.$#\[\]/\x00-\x1f\x7f]")
 
 def _now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
@@ -42,26 +63,276 @@ def _doc_to_response(doc_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
         "created_at": _parse_created_at(data.get("created_at")),
     }
 
+def _created_key(item: Dict[str, Any]) -> Tuple[float, str]:
+    """Clave de orden (created_at, id) del listado; sin fecha va al final."""
+    created = item.get("created_at")
+    return (created.timestamp() if created else float("-inf"), item["id"])
+
+def normalize_name(name: Optional[str]) -> str:
+    """
+    Forma canónica del nombre para el índice: minúsculas, sin tildes,
+    sin caracteres prohibidos en claves RTDB (. $ # [ ] /) y espacios colapsados.
+    """
+    s = (name or "").lower()
+    s = unicodedata.normalize("NFD", s)
+    s = "".join(ch for ch in s if unicodedata.category(ch) != "Mn")
+    s = re.sub(r"[.$#\[\]/\x00-\x1f\x7f]", " ", s)
+    s = re.sub(r"\s+", " ", s).strip()
+    return s[:200]
+
+def name_index_key(name: Optional[str], product_id: str) -> str:
+    return f"{normalize_name(name)}_{product_id}"
+
+def _split_path(path: str) -> List[str]:
+    return [p for p in (path or "").split("/") if p]
+
+# ---------------------------
+# CACHE DEL CATÁLOGO
+# ---------------------------
+class ProductCatalog:
+    """
+    Copia en memoria de /products compartida por todo el proceso.
+
+    - Se carga una sola vez: el primer evento de rtdb().listen() trae el snapshot
+      completo y los siguientes (put/patch) la mantienen al día.
+    - Las escrituras hechas por ProductService se aplican al instante (apply),
+      sin esperar el eco del listener.
+    - Si el listener no arranca o se cae, la copia vence pasado
+      PRODUCT_CACHE_MAX_STALENESS segundos y se recarga con un get().
+    - `version` sube con cada cambio; sirve para invalidar vistas derivadas.
+    """
+
+    def __init__(self, path: str):
+        self._path = path
+        self._lock = threading.RLock()
+        self._load_lock = threading.Lock()
+        self._ready = threading.Event()
+        self._items: Optional[Dict[str, Dict[str, Any]]] = None
+        self._listener = None
+        self._listening = False
+        self._loaded_at = 0.0
+        self._version = 0
+        self._sorted: Optional[List[Dict[str, Any]]] = None
+        self._sorted_keys: List[Tuple[float, str]] = []  # claves de _sorted en orden ascendente
+        self._sorted_version = -1
+        # contadores
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.events = 0
+
+    # ---------- lectura ----------
+    def get(self, product_id: str) -> Optional[Dict[str, Any]]:
+        self._ensure_loaded()
+        with self._lock:
+            data = self._items.get(product_id)
+            return dict(data) if data is not None else None
+
+    def items(self) -> List[tuple]:
+        self._ensure_loaded()
+        with self._lock:
+            return list(self._items.items())
+
+    def sorted_by_created(self) -> List[Dict[str, Any]]:
+        """Productos como respuesta, del más nuevo al más antiguo (cacheado por versión)."""
+        self._ensure_loaded()
+        with self._lock:
+            if self._sorted is None or self._sorted_version != self._version:
+                items = [_doc_to_response(pid, pdata) for pid, pdata in self._items.items()]
+                items.sort(key=_created_key, reverse=True)
+                self._sorted = items
+                self._sorted_keys = [_created_key(x) for x in reversed(items)]
+                self._sorted_version = self._version
+            return self._sorted
+
+    def page_by_created(self, limit: int, after: Optional[Tuple[float, str]] = None):
+        """
+        Página keyset del listado (created_at desc, id desc): (items, última clave
+        o None). `after` es la clave del último item entregado; se ubica con
+        búsqueda binaria, así que no importa si ese producto ya no existe.
+        """
+        self.sorted_by_created()
+        with self._lock:
+            items, keys = self._sorted, self._sorted_keys  # misma versión
+            # las claves menores que `after` son las que siguen en orden descendente
+            start = len(items) - bisect_left(keys, after) if after else 0
+            page = items[start:start + limit]
+            more = start + limit < len(items)
+        return page, (_created_key(page[-1]) if page and more else None)
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._items or {}),
+                "version": self._version,
+                "listening": self._listening,
+                "age_seconds": round(time.monotonic() - self._loaded_at, 3) if self._items is not None else None,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale": self.stale,
+                "events": self.events,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+    # ---------- escritura local ----------
+    def apply(self, product_id: str, data: Optional[Dict[str, Any]]) -> None:
+        """Refleja una escritura propia (data=None => borrado)."""
+        with self._lock:
+            if self._items is None:
+                return
+            self._put([product_id], data)
+            self._version += 1
+
+    def invalidate(self) -> None:
+        """Descarta la copia; el próximo acceso recarga desde RTDB."""
+        self.close()
+        with self._lock:
+            self._items = None
+            self._version += 1
+
+    def close(self) -> None:
+        listener, self._listener = self._listener, None
+        self._listening = False
+        if listener is not None:
+            try:
+                listener.close()
+            except Exception:
+                pass
+
+    # ---------- internos ----------
+    def _is_stale(self) -> bool:
+        return not self._listening and (time.monotonic() - self._loaded_at) > CACHE_MAX_STALENESS
+
+    def _ensure_loaded(self) -> None:
+        with self._lock:
+            if self._items is not None and not self._is_stale():
+                self.hits += 1
+                return
+
+        # La carga va fuera de self._lock: el listener entrega eventos desde otro hilo
+        with self._load_lock:
+            with self._lock:
+                if self._items is not None and not self._is_stale():
+                    self.hits += 1
+                    return
+                if self._items is not None:
+                    self.stale += 1
+                self.misses += 1
+
+            if not self._listening:
+                self._start_listener()
+            if self._listening and self._ready.wait(CACHE_LISTEN_TIMEOUT):
+                return
+
+            try:
+                data = rtdb(self._path).get()
+            except Exception:
+                # RTDB no responde: se sirve la réplica local si está al día
+                replica = read_replica("products")
+                if replica is None:
+                    raise
+                data = replica.products()
+            with self._lock:
+                self._put([], data)
+                self._version += 1
+                self._loaded_at = time.monotonic()
+
+    def _start_listener(self) -> None:
+        self.close()
+        self._ready.clear()
+        try:
+            self._listening = True
+            self._listener = rtdb(self._path).listen(self._on_event)
+        except Exception:
+            self._listening = False
+            self._listener = None
+
+    def _on_event(self, event) -> None:
+        etype = getattr(event, "event_type", None)
+        if etype not in ("put", "patch"):
+            # cancel / auth_revoked: el stream dejó de ser confiable
+            if etype in ("cancel", "auth_revoked"):
+                self._listening = False
+            return
+
+        parts = _split_path(event.path)
+        with self._lock:
+            if etype == "put":
+                self._put(parts, event.data)
+            else:
+                for rel, value in (event.data or {}).items():
+                    self._put(parts + _split_path(rel), value)
+            self.events += 1
+            self._version += 1
+            self._loaded_at = time.monotonic()
+        self._ready.set()
+
+    def _put(self, parts: List[str], data: Any) -> None:
+        if not parts:
+            # snapshot completo; ignora basura (bool, str, list, None)
+            src = data if isinstance(data, dict) else {}
+            self._items = {pid: dict(p) for pid, p in src.items() if _is_mapping(p)}
+            return
+        if self._items is None:
+            self._items = {}
+
+        pid = parts[0]
+        if len(parts) == 1:
+            if _is_mapping(data):
+                self._items[pid] = dict(data)
+            else:
+                self._items.pop(pid, None)
+            return
+
+        # cambio de un campo (p.ej. /{id}/price): copia y reemplaza el doc
+        doc = dict(self._items.get(pid) or {})
+        node = doc
+        for p in parts[1:-1]:
+            child = node.get(p)
+            child = dict(child) if isinstance(child, dict) else {}
+            node[p] = child
+            node = child
+        if data is None:
+            node.pop(parts[-1], None)
+        else:
+            node[parts[-1]] = data
+        if doc:
+            self._items[pid] = doc
+        else:
+            self._items.pop(pid, None)
+
+
+# Instancia compartida por ProductService, SaleService y el motor NLP
+product_catalog = ProductCatalog(f"/{COLLECTION}")
+
 class ProductService:
     # ---------------------------
     # CREATE
     # ---------------------------
     @staticmethod
     def create(data: ProductCreate) -> Dict[str, Any]:
-        ref = rtdb(f"/{COLLECTION}")
-
         name = (data.name or "").strip()
         if not name:
             raise ValueError("El nombre es obligatorio.")
 
-        doc_id = str(uuid.uuid4())
+        doc_id = push_id()
         payload = {
             "name": name,
             "price": _to_float(data.price),
             "status": data.status,
             "created_at": _now_iso(),
         }
-        ref.child(doc_id).set(payload)
+        # producto + índice de nombre en un solo update multi-path
+        rtdb().update({
+            f"/{COLLECTION}/{doc_id}": payload,
+            f"{NAME_INDEX_PATH}/{name_index_key(name, doc_id)}": doc_id,
+        })
+        product_catalog.apply(doc_id, payload)
         return _doc_to_response(doc_id, payload)
 
     # ---------------------------
@@ -69,33 +340,32 @@ class ProductService:
     # ---------------------------
     @staticmethod
     def list(limit: int = 50) -> List[Dict[str, Any]]:
-        ref = rtdb(f"/{COLLECTION}")
-        snap = ref.get()
-
-        items: List[Dict[str, Any]] = []
-        if isinstance(snap, dict):
-            # Formato esperado: {id: {name, price, ...}, ...}
-            for pid, pdata in snap.items():
-                if not _is_mapping(pdata):
-                    # Ignora basura (bool, str, list, None)
-                    continue
-                items.append(_doc_to_response(pid, pdata))
-        else:
-            # Si /products no es un objeto, no rompemos
-            items = []
+        # Servido desde memoria; el orden (created_at desc) se cachea por versión
+        items = product_catalog.sorted_by_created()
+        return [dict(x) for x in items[:limit]]
 
-        items.sort(
-            key=lambda x: x["created_at"] or datetime.min.replace(tzinfo=timezone.utc),
-            reverse=True,
-        )
-        return items[:limit]
+    @staticmethod
+    def list_page(limit: int = 50, cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Listado paginado por cursor opaco: (productos, next_cursor)."""
+        position = decode_cursor(cursor)
+        after = None
+        if position is not None:
+            t, k = position.get("t"), position.get("k")
+            if not isinstance(k, str) or not (t is None or isinstance(t, (int, float))):
+                raise ValueError("cursor inválido")
+            after = (float("-inf") if t is None else float(t), k)
+        page, last = product_catalog.page_by_created(limit, after)
+        next_cursor = None
+        if last is not None:
+            next_cursor = encode_cursor({"t": None if last[0] == float("-inf") else last[0], "k": last[1]})
+        return [dict(x) for x in page], next_cursor
 
     # ---------------------------
     # GET BY ID
     # ---------------------------
     @staticmethod
     def get_by_id(product_id: str) -> Optional[Dict[str, Any]]:
-        data = rtdb(f"/{COLLECTION}/{product_id}").get()
+        data = product_catalog.get(product_id)
         if not _is_mapping(data):
             return None
         return _doc_to_response(product_id, data)
@@ -105,8 +375,7 @@ class ProductService:
     # ---------------------------
     @staticmethod
     def update(product_id: str, data: ProductUpdate) -> Dict[str, Any]:
-        ref = rtdb(f"/{COLLECTION}/{product_id}")
-        current = ref.get()
+        current = product_catalog.get(product_id)
         if not _is_mapping(current):
             raise ValueError("Producto no encontrado.")
 
@@ -121,10 +390,19 @@ class ProductService:
         if data.status is not None:
             updates["status"] = data.status
 
+        merged = {**current, **updates}
         if updates:
-            ref.update(updates)
+            paths: Dict[str, Any] = {
+                f"/{COLLECTION}/{product_id}/{field}": value for field, value in updates.items()
+            }
+            old_key = name_index_key(current.get("name"), product_id)
+            new_key = name_index_key(merged.get("name"), product_id)
+            if old_key != new_key:
+                paths[f"{NAME_INDEX_PATH}/{old_key}"] = None
+                paths[f"{NAME_INDEX_PATH}/{new_key}"] = product_id
+            rtdb().update(paths)
+            product_catalog.apply(product_id, merged)
 
-        merged = {**current, **updates}
         return _doc_to_response(product_id, merged)
 
     # ---------------------------
@@ -132,39 +410,53 @@ class ProductService:
     # ---------------------------
     @staticmethod
     def delete(product_id: str) -> None:
-        ref = rtdb(f"/{COLLECTION}/{product_id}")
-        if not _is_mapping(ref.get()):
+        current = product_catalog.get(product_id)
+        if not _is_mapping(current):
             raise ValueError("Producto no encontrado.")
-        ref.delete()
+        rtdb().update({
+            f"/{COLLECTION}/{product_id}": None,
+            f"{NAME_INDEX_PATH}/{name_index_key(current.get('name'), product_id)}": None,
+        })
+        product_catalog.apply(product_id, None)
 
     # ---------------------------
-    # FIND BY NAME (prefijo, sin índices)
+    # FIND BY NAME (prefijo sobre /_indexes/product_name)
     # ---------------------------
     @staticmethod
     def find_by_name(name: str, limit: int = 50) -> List[Dict[str, Any]]:
-        prefix = (name or "").strip().lower()
+        prefix = normalize_name(name)
         if not prefix:
             return []
 
-        snap = rtdb(f"/{COLLECTION}").get()
-        results: List[Dict[str, Any]] = []
-        if isinstance(snap, dict):
-            for pid, pdata in snap.items():
-                if not _is_mapping(pdata):
-                    continue
-                pname = (pdata.get("name") or "")
-                if pname.lower().startswith(prefix):
-                    results.append(_doc_to_response(pid, pdata))
+        # Una sola consulta por rango de clave: solo viajan las filas que coinciden,
+        # ya ordenadas por nombre normalizado
+        hits = (
+            rtdb(NAME_INDEX_PATH)
+            .order_by_key()
+            .start_at(prefix)
+            .end_at(prefix + "\uf8ff")
+            .limit_to_first(limit)
+            .get()
+        )
+        if not isinstance(hits, dict):
+            return []
 
-        results.sort(key=lambda x: (x["name"] or "").lower())
-        return results[:limit]
+        results: List[Dict[str, Any]] = []
+        for key, pid in hits.items():
+            if not isinstance(pid, str):
+                continue
+            pdata = product_catalog.get(pid)
+            if _is_mapping(pdata):
+                results.append(_doc_to_response(pid, pdata))
+        return results
 
     # ---------------------------
     # GET NAME BY ID
     # ---------------------------
     @staticmethod
     def get_name_by_id(product_id: str) -> Optional[Dict[str, str]]:
-        name = rtdb(f"/{COLLECTION}/{product_id}/name").get()
+        data = product_catalog.get(product_id)
+        name = data.get("name") if data else None
         if name is None:
             return None
         # Si el name en RTDB es no-string (corrupción), no rompemos
@@ -173,4 +465,158 @@ class ProductService:
                 name = str(name)
             except Exception:
                 name = ""
-        return {"id": product_id, "name": name}
\ No newline at end of file
+        return {"id": product_id, "name": name}
+
+    # ---------------------------
+    # CACHE STATS
+    # ---------------------------
+    @staticmethod
+    def cache_stats() -> Dict[str, Any]:
+        return product_catalog.stats()
+
+    # ---------------------------
+    # IMPORT / EXPORT CSV
+    # ---------------------------
+    @staticmethod
+    def import_csv(lines: Iterable[str], dry_run: bool = False) -> Dict[str, Any]:
+        """
+        Upsert desde CSV (id,name,price[,status]); encabezados sin distinguir
+        mayúsculas. Con id se actualiza (o crea) ese producto; sin id se busca
+        por nombre normalizado y, si no existe, se crea con un id nuevo.
+        Los cambios se escriben con un update multi-path por bloque de
+        IMPORT_CHUNK_SIZE productos. Con dry_run solo se devuelve el diff.
+
+        Cada bloque es atómico, pero el import completo no: si falla la escritura
+        de un bloque, los anteriores ya quedaron escritos. Sus filas y las de los
+        bloques siguientes (que no se intentan) salen como error y write_error
+        trae el motivo; created/updated cuentan solo lo que se escribió.
+        """
+        reader = csv.DictReader(lines)
+        headers = {(h or "").strip().lower(): h for h in (reader.fieldnames or [])}
+        if "name" not in headers or "price" not in headers:
+            raise ValueError("El CSV debe tener columnas name y price (id y status opcionales)")
+
+        by_name = {normalize_name(d.get("name")): pid for pid, d in product_catalog.items() if _is_mapping(d)}
+        seen: Dict[str, int] = {}
+        changes: List[Dict[str, Any]] = []
+        writes: List[Tuple[str, Optional[Dict[str, Any]], Dict[str, Any]]] = []
+        write_changes: List[Dict[str, Any]] = []  # entrada de `changes` de cada write
+        counts = {"created": 0, "updated": 0, "unchanged": 0, "failed": 0}
+
+        def col(row: Dict[str, Any], name: str) -> str:
+            return (row.get(headers[name]) or "").strip() if name in headers else ""
+
+        for line_no, row in enumerate(reader, start=2):  # la fila 1 es el encabezado
+            pid, name, status = col(row, "id"), col(row, "name"), col(row, "status") or None
+            error = None
+            try:
+                price = float(col(row, "price"))
+            except ValueError:
+                price, error = None, "price inválido"
+            else:
+                # nan/inf no se pueden guardar en RTDB (y nan nunca es igual a sí mismo en el diff)
+                if not math.isfinite(price) or price < 0:
+                    price, error = None, "price debe ser un número finito mayor o igual a 0"
+            if not name:
+                error = "name es obligatorio"
+            elif status not in (None, "active", "inactive"):
+                error = "status debe ser active o inactive"
+            elif pid and (_INVALID_KEY.search(pid) or len(pid.encode("utf-8")) > 768):
+                error = "id contiene caracteres no permitidos"
+
+            current = None
+            if not error:
+                if not pid:
+                    pid = by_name.get(normalize_name(name)) or push_id()
+                current = product_catalog.get(pid)
+                if pid in seen:
+                    error = f"producto repetido en el CSV (fila {seen[pid]})"
+            if error:
+                counts["failed"] += 1
+                changes.append({"row": line_no, "action": "error", "id": pid or None, "name": name or None, "error": error})
+                continue
+            seen[pid] = line_no
+
+            if not _is_mapping(current):
+                doc = {"name": name, "price": price, "status": status or "active", "created_at": _now_iso()}
+                writes.append((pid, None, doc))
+                by_name[normalize_name(name)] = pid
+                counts["created"] += 1
+                changes.append({"row": line_no, "action": "create", "id": pid, "name": name})
+                write_changes.append(changes[-1])
+                continue
+
+            fields = {"name": name, "price": price}
+            if status:
+                fields["status"] = status
+            diff = {
+                f: {"old": current.get(f), "new": v}
+                for f, v in fields.items()
+                if (_to_float(current.get(f)) != v if f == "price" else current.get(f) != v)
+            }
+            if not diff:
+                counts["unchanged"] += 1
+                continue
+            writes.append((pid, current, {f: d["new"] for f, d in diff.items()}))
+            counts["updated"] += 1
+            changes.append({"row": line_no, "action": "update", "id": pid, "name": name, "changes": diff})
+            write_changes.append(changes[-1])
+
+        rows = len(seen) + counts["failed"]
+        write_error = None
+        if not dry_run:
+            for i in range(0, len(writes), IMPORT_CHUNK_SIZE):
+                try:
+                    ProductService._write_import_chunk(writes[i:i + IMPORT_CHUNK_SIZE])
+                except Exception as e:
+                    write_error = f"falló la escritura desde la fila {write_changes[i]['row']}: {e}"
+                    for change in write_changes[i:]:
+                        counts["created" if change["action"] == "create" else "updated"] -= 1
+                        counts["failed"] += 1
+                        change["action"], change["error"] = "error", "no se escribió"
+                    break
+
+        return {"dry_run": dry_run, "rows": rows, **counts, "write_error": write_error, "changes": changes}
+
+    @staticmethod
+    def _write_import_chunk(chunk: List[Tuple[str, Optional[Dict[str, Any]], Dict[str, Any]]]) -> None:
+        """Un update multi-path para el bloque: documentos/campos + índice de nombre."""
+        paths: Dict[str, Any] = {}
+        merged: Dict[str, Dict[str, Any]] = {}
+        for pid, current, fields in chunk:
+            if current is None:
+                paths[f"/{COLLECTION}/{pid}"] = fields
+                paths[f"{NAME_INDEX_PATH}/{name_index_key(fields['name'], pid)}"] = pid
+                merged[pid] = fields
+                continue
+            for field, value in fields.items():
+                paths[f"/{COLLECTION}/{pid}/{field}"] = value
+            doc = {**current, **fields}
+            old_key = name_index_key(current.get("name"), pid)
+            new_key = name_index_key(doc.get("name"), pid)
+            if old_key != new_key:
+                paths[f"{NAME_INDEX_PATH}/{old_key}"] = None
+                paths[f"{NAME_INDEX_PATH}/{new_key}"] = pid
+            merged[pid] = doc
+        rtdb().update(paths)
+        for pid, doc in merged.items():
+            product_catalog.apply(pid, doc)
+
+    @staticmethod
+    def export_csv() -> Iterator[str]:
+        """Catálogo completo en CSV (mismas columnas que acepta el import), por bloques."""
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerow(EXPORT_COLUMNS)
+        for n, (pid, data) in enumerate(sorted(product_catalog.items()), start=1):
+            if not _is_mapping(data):
+                continue
+            writer.writerow([
+                pid, data.get("name") or "", _to_float(data.get("price")),
+                data.get("status", "active"), data.get("created_at") or "",
+            ])
+            if n % IMPORT_CHUNK_SIZE == 0:
+                yield buf.getvalue()
+                buf.seek(0)
+                buf.truncate()
+        yield buf.getvalue()
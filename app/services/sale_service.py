@@ -1,24 +1,193 @@
-from typing import List, Optional, Literal
-from datetime import datetime, timezone
-import uuid
+from typing import List, Optional, Literal, Dict, Any, Tuple, Iterator
+import csv
+import io
+import json
+import os
+from datetime import datetime, timezone, date, timedelta
 
 from fastapi.encoders import jsonable_encoder
+from pydantic import ValidationError
 
-from ..models.sale import SaleCreate, SaleResponse
-from ..repositories.sale_repo import SaleRepo
-from ..repositories.product_repo import ProductRepo
+from ..models.sale import SaleCreate, SaleResponse, GroupBy, BreakdownBy, TopMetric
+from ..repositories.sale_repo import SaleRepo, DATE_END_SUFFIX
+from ..repositories.rollup_repo import RollupRepo
+from ..core.pagination import encode_cursor, cursor_key
+from ..core.ids import push_id
+from .product_service import product_catalog
+from . import sales_analytics
+from .sales_analytics import SalesFrame, group_totals, summary
+
+
+def _to_float(v) -> float:
+    try:
+        return float(v)
+    except Exception:
+        return 0.0
+
+def _line_total(unit_price: float, quantity) -> float:
+    return round(unit_price * _to_float(quantity), 2)
+
+# Tamaño de página al recorrer ventas crudas por rango de fecha
+REPORT_PAGE_SIZE = 1000
+
+# Carga masiva: ventas por update multi-path y máximo de items por request
+BULK_CHUNK_SIZE = int(os.getenv("SALES_BULK_CHUNK_SIZE", "200"))
+BULK_MAX_ITEMS = int(os.getenv("SALES_BULK_MAX_ITEMS", "5000"))
+
+# Export: columnas del CSV y filas por bloque enviado al cliente
+EXPORT_COLUMNS = ["id", "date", "created_at", "product_id", "quantity", "unit_price", "total", "payment_method"]
+EXPORT_FLUSH_ROWS = 500
+ExportFormat = Literal["csv", "ndjson"]
+
+def _validation_message(e: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(p) for p in err['loc']) or 'item'}: {err['msg']}" for err in e.errors()
+    )
+
+def parse_bulk_body(body: bytes, content_type: Optional[str] = None) -> List[Any]:
+    """
+    Body de /sales/bulk: arreglo JSON o NDJSON (un objeto por línea).
+    Devuelve los items crudos; la validación es por item.
+    """
+    try:
+        text = body.decode("utf-8").strip()
+    except UnicodeDecodeError:
+        raise ValueError("El body debe ser UTF-8")
+    if not text:
+        raise ValueError("Body vacío")
+
+    if "ndjson" not in (content_type or "") and text.startswith("["):
+        try:
+            items = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"JSON inválido: {e.msg}")
+        if not isinstance(items, list):
+            raise ValueError("Se esperaba un arreglo de ventas")
+    else:
+        items = []
+        for n, line in enumerate(text.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                raise ValueError(f"NDJSON inválido en la línea {n}: {e.msg}")
+
+    if len(items) > BULK_MAX_ITEMS:
+        raise ValueError(f"Máximo {BULK_MAX_ITEMS} ventas por request")
+    return items
+
+def _parse_bound(value: Optional[str], field: str) -> Tuple[Optional[str], Optional[datetime]]:
+    """
+    Normaliza un límite de fecha del reporte: 'YYYY-MM-DD' (día completo) o un
+    datetime ISO-8601. Devuelve (texto, datetime); datetime es None para días.
+    """
+    if not value or not value.strip():
+        return None, None
+    value = value.strip()
+    try:
+        if len(value) == 10:
+            return date.fromisoformat(value).isoformat(), None
+        dt = _as_utc(datetime.fromisoformat(value))
+        return dt.isoformat(), dt
+    except ValueError:
+        raise ValueError(f"{field} inválido: usa YYYY-MM-DD o una fecha ISO-8601")
+
+def _as_utc(dt: datetime) -> datetime:
+    # fechas sin zona se asumen UTC (igual que el default de create)
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt
+
+def _parse_sale_date(value: Any) -> Optional[datetime]:
+    try:
+        return _as_utc(datetime.fromisoformat(str(value)))
+    except ValueError:
+        return None
+
+def _parse_window(date_from: Optional[str], date_to: Optional[str]):
+    start, start_dt = _parse_bound(date_from, "date_from")
+    end, end_dt = _parse_bound(date_to, "date_to")
+    if start and end and start[:10] > end[:10]:
+        raise ValueError("date_from debe ser menor o igual que date_to")
+    return start, start_dt, end, end_dt
+
+def _bucket_key(day_or_date: str, group_by: str) -> str:
+    if group_by == "month":
+        return day_or_date[:7]
+    if group_by == "none":
+        return "all"
+    return day_or_date[:10]
 
 
 class SaleService:
     @staticmethod
     def create(payload: SaleCreate) -> Optional[SaleResponse]:
-        # Validar producto
-        product = ProductRepo.get_by_id(payload.product_id)
+        # Validar producto (desde el catálogo en memoria)
+        product = product_catalog.get(payload.product_id)
         if not product:
             raise ValueError("Product does not exist")
 
-        sale_id = str(uuid.uuid4())
+        sale_id = push_id()  # ordenable por tiempo: order_by_key() = orden de creación
+        sale_data = SaleService._build_sale(payload, product)
+        SaleRepo.create(sale_id, sale_data)
+
+        return SaleResponse(id=sale_id, **sale_data)
+
+    @staticmethod
+    def create_bulk(items: List[Any]) -> Dict[str, Any]:
+        """
+        Crea muchas ventas (sincronización offline de los POS). Cada item se
+        valida por separado; los productos salen del catálogo en memoria y las
+        ventas válidas se escriben con un update multi-path por bloque de
+        BULK_CHUNK_SIZE. Devuelve un resultado por item, en el orden recibido.
+
+        Cada bloque es atómico, la carga completa no: si un bloque falla se
+        deja de escribir, los bloques anteriores quedan guardados (con su id)
+        y los items desde ese bloque salen con ok=False; `write_error` dice
+        desde qué item reintentar.
+        """
+        results: List[Dict[str, Any]] = []
+        pending: List[Tuple[int, str, Dict[str, Any]]] = []
+
+        for index, item in enumerate(items):
+            try:
+                payload = SaleCreate.model_validate(item)
+            except ValidationError as e:
+                results.append({"index": index, "ok": False, "error": _validation_message(e)})
+                continue
+            product = product_catalog.get(payload.product_id)
+            if not product:
+                results.append({"index": index, "ok": False, "error": "Product does not exist"})
+                continue
+            pending.append((index, push_id(), SaleService._build_sale(payload, product)))
+            results.append({"index": index, "ok": True})
 
+        write_error = None
+        for i in range(0, len(pending), BULK_CHUNK_SIZE):
+            chunk = pending[i:i + BULK_CHUNK_SIZE]
+            try:
+                SaleRepo.create_many([(sale_id, sale) for _, sale_id, sale in chunk])
+            except Exception as e:
+                write_error = f"falló la escritura desde el item {chunk[0][0]}: {e}"
+                for index, _, _ in chunk:
+                    results[index].update(ok=False, error=f"Error al guardar: {e}")
+                for index, _, _ in pending[i + BULK_CHUNK_SIZE:]:
+                    results[index].update(ok=False, error="No se escribió (falló un bloque anterior)")
+                break
+            for index, sale_id, _ in chunk:
+                results[index]["id"] = sale_id
+
+        created = sum(1 for r in results if r["ok"])
+        return {
+            "received": len(items),
+            "created": created,
+            "failed": len(items) - created,
+            "write_error": write_error,
+            "results": results,
+        }
+
+    @staticmethod
+    def _build_sale(payload: SaleCreate, product: Dict[str, Any]) -> Dict[str, Any]:
+        """Documento de la venta a guardar (fechas y precio congelado incluidos)."""
         # Convierte Pydantic → JSON
         sale_data = jsonable_encoder(payload)
 
@@ -29,9 +198,11 @@ class SaleService:
         # ✅ created_at siempre generado en backend
         sale_data["created_at"] = datetime.now(timezone.utc).isoformat()
 
-        SaleRepo.upsert(sale_id, sale_data)
-
-        return SaleResponse(id=sale_id, **sale_data)
+        # ✅ Precio del momento: el reporte suma esto sin volver a leer productos
+        unit_price = _to_float(product.get("price"))
+        sale_data["unit_price"] = unit_price
+        sale_data["total"] = _line_total(unit_price, payload.quantity)
+        return sale_data
 
     @staticmethod
     def get(sale_id: str) -> Optional[SaleResponse]:
@@ -41,65 +212,297 @@ class SaleService:
         return SaleResponse(id=sale_id, **data)
 
     @staticmethod
-    def list_sales(limit: int = 50) -> List[SaleResponse]:
-        data = SaleRepo.list(limit)
-        return [SaleResponse(**s) for s in data]
+    def list_sales(limit: int = 50, cursor: Optional[str] = None) -> Tuple[List[SaleResponse], Optional[str]]:
+        """Página de ventas por clave: (ventas, next_cursor)."""
+        data, next_key = SaleRepo.list_page(limit, after=cursor_key(cursor))
+        return [SaleResponse(**s) for s in data], encode_cursor({"k": next_key} if next_key else None)
 
     @staticmethod
-    def list_sales_by_product(product_id: str, limit: int = 50) -> List[SaleResponse]:
-        data = SaleRepo.list_by_product(product_id, limit)
-        return [SaleResponse(**s) for s in data]
+    async def list_sales_async(limit: int = 50, cursor: Optional[str] = None) -> Tuple[List[SaleResponse], Optional[str]]:
+        data, next_key = await SaleRepo.alist_page(limit, after=cursor_key(cursor))
+        return [SaleResponse(**s) for s in data], encode_cursor({"k": next_key} if next_key else None)
+
+    @staticmethod
+    def latest_sales(limit: int = 20) -> List[SaleResponse]:
+        """Últimas ventas registradas, de la más reciente a la más antigua."""
+        return [SaleResponse(**s) for s in SaleRepo.latest(limit)]
+
+    @staticmethod
+    def list_sales_by_product(product_id: str, limit: int = 50,
+                              cursor: Optional[str] = None) -> Tuple[List[SaleResponse], Optional[str]]:
+        """Historial de ventas de un producto (índice por producto): (ventas, next_cursor)."""
+        data, next_key = SaleRepo.list_by_product(product_id, limit, after=cursor_key(cursor))
+        return [SaleResponse(**s) for s in data], encode_cursor({"k": next_key} if next_key else None)
     
     @staticmethod
-    def report():
-        # Reporte global SIN parámetros: agrupa por día y usa hasta 1000 ventas
-        from ..repositories.product_repo import ProductRepo
-        from datetime import datetime
+    async def list_sales_by_product_async(product_id: str, limit: int = 50,
+                                          cursor: Optional[str] = None) -> Tuple[List[SaleResponse], Optional[str]]:
+        data, next_key = await SaleRepo.alist_by_product(product_id, limit, after=cursor_key(cursor))
+        return [SaleResponse(**s) for s in data], encode_cursor({"k": next_key} if next_key else None)
+
+    @staticmethod
+    def report(date_from: Optional[str] = None, date_to: Optional[str] = None,
+               group_by: GroupBy = "day") -> Dict[str, Any]:
+        """
+        Reporte por ventana de fechas (inclusive), agrupado por day | month | none.
+        - Límites de día completo (YYYY-MM-DD) o sin límites: se leen los rollups
+          diarios del rango; no se toca /sales.
+        - Límites con hora: se recorren solo las ventas de la ventana
+          (order_by_child("date") paginado).
+        """
+        start, start_dt, end, end_dt = _parse_window(date_from, date_to)
 
-        rows = SaleService.list_sales(1000)  # usa tu método existente
+        if start_dt is not None or end_dt is not None:
+            # ventana con hora: ventas crudas de la ventana -> motor columnar
+            frame = SalesFrame.from_sales(SaleService._iter_window(start, start_dt, end, end_dt))
+            totals = summary(frame)
+            buckets = [
+                {"key": b["key"], "count": b["count"], "total": b["total"]}
+                for b in group_totals(frame, group_by)
+            ]
+            return {
+                "date_from": date_from,
+                "date_to": date_to,
+                "group_by": group_by,
+                "total_sales": totals["total_sales"],
+                "total_revenue": totals["total_revenue"],
+                "avg_ticket": totals["avg_ticket"],
+                "buckets": buckets,
+            }
 
-        price_cache = {}
+        # días completos: rollups diarios del rango
         total_sales = 0
-        total_revenue = 0.0
-        buckets = {}
-
-        for sale in rows:
-            dt = getattr(sale, "date", None)
-            if not isinstance(dt, datetime):
+        total_cents = 0
+        grouped: Dict[str, Dict[str, int]] = {}
+        for day, node in RollupRepo.list_days(start, end).items():
+            count = int(node.get("count") or 0)
+            cents = int(node.get("revenue_cents") or 0)
+            if count <= 0:
                 continue
+            total_sales += count
+            total_cents += cents
+            b = grouped.setdefault(_bucket_key(day, group_by), {"count": 0, "cents": 0})
+            b["count"] += count
+            b["cents"] += cents
 
-            pid = sale.product_id
-            if pid not in price_cache:
-                prod = ProductRepo.get_by_id(pid)
-                price_cache[pid] = float(prod.get("price", 0)) if prod else 0.0
-
-            sale_total = price_cache[pid] * float(sale.quantity or 0)
-
-            total_sales += 1
-            total_revenue += sale_total
-
-            key = dt.strftime("%Y-%m-%d")  # agrupa por DÍA
-            if key not in buckets:
-                buckets[key] = {"count": 0, "total": 0.0}
-            buckets[key]["count"] += 1
-            buckets[key]["total"] += sale_total
-
+        total_revenue = total_cents / 100
         avg_ticket = (total_revenue / total_sales) if total_sales else 0
 
         return {
-            "group_by": "day",
+            "date_from": date_from,
+            "date_to": date_to,
+            "group_by": group_by,
             "total_sales": total_sales,
             "total_revenue": round(total_revenue, 2),
             "avg_ticket": round(avg_ticket, 2),
             "buckets": [
-                {"key": k, "count": v["count"], "total": round(v["total"], 2)}
-                for k, v in sorted(buckets.items())
+                {"key": k, "count": v["count"], "total": round(v["cents"] / 100, 2)}
+                for k, v in sorted(grouped.items())
             ],
         }
 
+    @staticmethod
+    def breakdown(by: BreakdownBy, date_from: Optional[str] = None,
+                  date_to: Optional[str] = None, product_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Totales por día, mes, producto, método de pago u hora (motor NumPy).
+        Con product_id solo se leen las ventas de ese producto (vía su índice).
+        """
+        frame = SaleService.sales_frame(date_from, date_to, product_id=product_id)
+
+        buckets = group_totals(frame, by)
+        if by == "product":
+            for b in buckets:
+                product = product_catalog.get(b["key"])
+                b["label"] = product.get("name") if product else None
+            buckets.sort(key=lambda b: b["total"], reverse=True)
 
+        totals = summary(frame)
+        return {
+            "date_from": date_from,
+            "date_to": date_to,
+            "by": by,
+            "product_id": product_id,
+            "total_sales": totals["total_sales"],
+            "total_units": totals["total_units"],
+            "total_revenue": totals["total_revenue"],
+            "buckets": buckets,
+        }
 
+    # ---------------------------
+    # ANALYTICS
+    # ---------------------------
+    @staticmethod
+    def sales_frame(date_from: Optional[str] = None, date_to: Optional[str] = None,
+                    product_id: Optional[str] = None) -> SalesFrame:
+        """Ventas de la ventana en columnas (una sola pasada sobre /sales o sobre el índice del producto)."""
+        start, start_dt, end, end_dt = _parse_window(date_from, date_to)
+        return SalesFrame.from_sales(SaleService._iter_window(start, start_dt, end, end_dt, product_id))
+
+    @staticmethod
+    def top_products(metric: TopMetric = "revenue", limit: int = 10,
+                     date_from: Optional[str] = None, date_to: Optional[str] = None) -> Dict[str, Any]:
+        frame = SaleService.sales_frame(date_from, date_to)
+        totals = summary(frame)
+        denominator = totals["total_units"] if metric == "units" else totals["total_revenue"]
+
+        items = sales_analytics.top_products(frame, metric, limit)
+        for item in items:
+            product = product_catalog.get(item["product_id"])
+            item["name"] = product.get("name") if product else None
+            value = item["units"] if metric == "units" else item["total"]
+            item["share"] = round(value / denominator, 4) if denominator else 0.0
+
+        return {
+            "date_from": date_from,
+            "date_to": date_to,
+            "metric": metric,
+            "total_sales": totals["total_sales"],
+            "total_units": totals["total_units"],
+            "total_revenue": totals["total_revenue"],
+            "items": items,
+        }
+
+    @staticmethod
+    def payment_mix(date_from: Optional[str] = None, date_to: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Participación por método de pago. Con días completos (o sin ventana) se
+        suma by_payment de los rollups diarios; con hora, se recorre la ventana.
+        """
+        start, start_dt, end, end_dt = _parse_window(date_from, date_to)
+        mix: Dict[str, Dict[str, int]] = {
+            m: {"count": 0, "cents": 0} for m in sales_analytics.PAYMENT_METHODS
+        }
+        if start_dt is None and end_dt is None:
+            for node in RollupRepo.list_days(start, end).values():
+                for method, split in (node.get("by_payment") or {}).items():
+                    if not isinstance(split, dict):
+                        continue
+                    m = mix.setdefault(method, {"count": 0, "cents": 0})
+                    m["count"] += int(split.get("count") or 0)
+                    m["cents"] += int(split.get("revenue_cents") or 0)
+        else:
+            frame = SalesFrame.from_sales(SaleService._iter_window(start, start_dt, end, end_dt))
+            for row in sales_analytics.payment_mix(frame):
+                mix[row["method"]] = {"count": row["count"], "cents": row["revenue_cents"]}
+
+        total_sales = sum(m["count"] for m in mix.values())
+        total_cents = sum(m["cents"] for m in mix.values())
+        items = [
+            {
+                "method": method,
+                "count": m["count"],
+                "total": round(m["cents"] / 100, 2),
+                "count_share": round(m["count"] / total_sales, 4) if total_sales else 0.0,
+                "revenue_share": round(m["cents"] / total_cents, 4) if total_cents else 0.0,
+            }
+            for method, m in mix.items()
+            if m["count"] > 0 or method in sales_analytics.PAYMENT_METHODS
+        ]
+        return {
+            "date_from": date_from,
+            "date_to": date_to,
+            "total_sales": total_sales,
+            "total_revenue": round(total_cents / 100, 2),
+            "items": items,
+        }
+
+    @staticmethod
+    def hourly_heatmap(date_from: Optional[str] = None, date_to: Optional[str] = None) -> Dict[str, Any]:
+        frame = SaleService.sales_frame(date_from, date_to)
+        heat = sales_analytics.hourly_heatmap(frame)
+        return {
+            "date_from": date_from,
+            "date_to": date_to,
+            "weekdays": sales_analytics.WEEKDAYS,
+            "hours": list(range(24)),
+            "counts": heat["counts"].astype(int).tolist(),
+            "totals": (heat["cents"] / 100).round(2).tolist(),
+        }
+
+    # ---------------------------
+    # EXPORT
+    # ---------------------------
+    @staticmethod
+    def export(fmt: ExportFormat = "csv", date_from: Optional[str] = None,
+               date_to: Optional[str] = None) -> Iterator[str]:
+        """
+        Ventas en CSV o NDJSON, como generador de bloques de texto. La ventana se
+        valida aquí (antes de empezar a responder); las filas salen página a página
+        de RTDB sin armar la lista completa en memoria.
+        """
+        start, start_dt, end, end_dt = _parse_window(date_from, date_to)
+        if start is None and end is None:
+            # sin ventana: meses archivados y luego /sales en orden de clave (push IDs = orden de creación)
+            sales = SaleRepo.iter_all(REPORT_PAGE_SIZE)
+        else:
+            sales = SaleService._iter_window(start, start_dt, end, end_dt)
+        return SaleService._export_chunks(sales, fmt)
+
+    @staticmethod
+    def _export_chunks(sales, fmt: ExportFormat) -> Iterator[str]:
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        if fmt == "csv":
+            writer.writerow(EXPORT_COLUMNS)
+            yield buf.getvalue()  # primer byte sin esperar a RTDB
+            buf.seek(0)
+            buf.truncate()
+
+        rows = 0
+        for sale in sales:
+            row = [sale.get(c) for c in EXPORT_COLUMNS]
+            if fmt == "csv":
+                writer.writerow(["" if v is None else v for v in row])
+            else:
+                buf.write(json.dumps(dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False))
+                buf.write("\n")
+            rows += 1
+            if rows % EXPORT_FLUSH_ROWS == 0:
+                yield buf.getvalue()
+                buf.seek(0)
+                buf.truncate()
+        if buf.tell():
+            yield buf.getvalue()
+
+    @staticmethod
+    def _iter_window(start: Optional[str], start_dt: Optional[datetime],
+                     end: Optional[str], end_dt: Optional[datetime],
+                     product_id: Optional[str] = None):
+        """
+        Ventas dentro de la ventana. En RTDB se pide el rango por prefijo de día
+        (ampliado un día si el límite trae hora, porque las fechas guardadas pueden
+        venir con 'Z', '+00:00' u otro offset) y aquí se filtra con precisión.
+        """
+        fetch_start = start if start_dt is None else (start_dt - timedelta(days=1)).date().isoformat()
+        fetch_end = None
+        if end is not None:
+            fetch_end = (end if end_dt is None else (end_dt + timedelta(days=1)).date().isoformat()) + DATE_END_SUFFIX
+
+        if product_id:
+            sales = SaleRepo.iter_by_product(product_id, fetch_start, fetch_end, REPORT_PAGE_SIZE)
+        else:
+            sales = SaleRepo.iter_by_date(fetch_start, fetch_end, REPORT_PAGE_SIZE)
+        for sale in sales:
+            raw = str(sale.get("date") or "")
+            if start_dt is not None or end_dt is not None:
+                dt = _parse_sale_date(raw)
+                if dt is None:
+                    continue
+                if start_dt is not None and dt < start_dt:
+                    continue
+                if end_dt is not None and dt > end_dt:
+                    continue
+            if start_dt is None and start is not None and raw[:10] < start:
+                continue
+            if end_dt is None and end is not None and raw[:10] > end:
+                continue
+            yield sale
 
     @staticmethod
     def delete(sale_id: str) -> None:
-        SaleRepo.delete(sale_id)
\ No newline at end of file
+        # se lee primero: hace falta fecha/total/método para descontar los rollups
+        data = SaleRepo.get_by_id(sale_id)
+        if not isinstance(data, dict):
+            raise ValueError("Venta no encontrada")
+        SaleRepo.remove(sale_id, data)
\ No newline at end of file
@@ -0,0 +1,240 @@
+"""
+Motor de agregación columnar para ventas (NumPy).
+
+Las ventas se cargan una vez en arreglos tipados (día epoch, hora, índice de
+producto, cantidad, precio, céntimos y código de método de pago) y las
+agrupaciones se resuelven con np.bincount en vez de un loop de
+Python por venta.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, get_args
+
+import numpy as np
+
+from ..models.sale import PaymentMethod
+
+PAYMENT_METHODS: List[str] = list(get_args(PaymentMethod))
+_PAYMENT_CODES = {m: i for i, m in enumerate(PAYMENT_METHODS)}
+OTHER_PAYMENT = len(PAYMENT_METHODS)  # código para métodos desconocidos/legacy
+
+GROUP_KEYS = ("day", "month", "product", "payment_method", "hour", "none")
+
+
+def _to_cents(value: Any) -> int:
+    try:
+        return int(round(float(value) * 100))
+    except Exception:
+        return 0
+
+
+def _to_number(value: Any) -> float:
+    try:
+        return float(value)
+    except Exception:
+        return 0.0
+
+
+def _parse_days(day_strings: List[str]) -> np.ndarray:
+    """'YYYY-MM-DD' -> días desde epoch (int32); -1 si la fecha es inválida."""
+    arr = np.array(day_strings, dtype="U10")
+    try:
+        return arr.astype("datetime64[D]").astype(np.int64).astype(np.int32)
+    except ValueError:
+        # hay basura: se parsean solo los días distintos (pocos) y se reexpanden
+        uniq, inverse = np.unique(arr, return_inverse=True)
+        parsed = np.full(len(uniq), -1, dtype=np.int32)
+        for i, s in enumerate(uniq):
+            try:
+                parsed[i] = np.datetime64(s, "D").astype(np.int64)
+            except ValueError:
+                pass
+        return parsed[inverse.reshape(-1)]
+
+
+@dataclass
+class SalesFrame:
+    day: np.ndarray          # int32, días desde 1970-01-01 (fecha local de la venta)
+    hour: np.ndarray         # int8, 0-23 (-1 si la fecha no trae hora)
+    product: np.ndarray      # int32, índice en product_ids
+    quantity: np.ndarray     # float64
+    price: np.ndarray        # float64, precio unitario congelado en la venta
+    total_cents: np.ndarray  # int64
+    payment: np.ndarray      # int8, índice en PAYMENT_METHODS (OTHER_PAYMENT si no aplica)
+    product_ids: List[str]
+
+    def __len__(self) -> int:
+        return int(self.day.shape[0])
+
+    @classmethod
+    def from_sales(cls, sales: Iterable[Dict[str, Any]]) -> "SalesFrame":
+        """Una sola pasada sobre los dicts de RTDB; el resto es vectorizado."""
+        days: List[str] = []
+        hours: List[int] = []
+        products: List[int] = []
+        quantities: List[float] = []
+        prices: List[float] = []
+        cents: List[int] = []
+        payments: List[int] = []
+        product_index: Dict[str, int] = {}
+
+        for sale in sales:
+            raw = str(sale.get("date") or "")
+            if len(raw) < 10 or raw[4] != "-" or raw[7] != "-":
+                continue
+            days.append(raw[:10])
+            h = raw[11:13]
+            hours.append(int(h) if h.isdigit() else -1)
+            pid = str(sale.get("product_id") or "")
+            products.append(product_index.setdefault(pid, len(product_index)))
+            quantities.append(_to_number(sale.get("quantity")))
+            prices.append(_to_number(sale.get("unit_price")))
+            cents.append(_to_cents(sale.get("total")))
+            payments.append(_PAYMENT_CODES.get(sale.get("payment_method"), OTHER_PAYMENT))
+
+        frame = cls(
+            day=_parse_days(days),
+            hour=np.array(hours, dtype=np.int8),
+            product=np.array(products, dtype=np.int32),
+            quantity=np.array(quantities, dtype=np.float64),
+            price=np.array(prices, dtype=np.float64),
+            total_cents=np.array(cents, dtype=np.int64),
+            payment=np.array(payments, dtype=np.int8),
+            product_ids=list(product_index),
+        )
+        return frame.take(frame.day >= 0)
+
+    def take(self, mask: np.ndarray) -> "SalesFrame":
+        """Subconjunto de filas según una máscara booleana."""
+        if mask.all():
+            return self
+        return SalesFrame(
+            day=self.day[mask], hour=self.hour[mask], product=self.product[mask],
+            quantity=self.quantity[mask], price=self.price[mask],
+            total_cents=self.total_cents[mask], payment=self.payment[mask],
+            product_ids=self.product_ids,
+        )
+
+
+# ---------------------------
+# Kernels
+# ---------------------------
+def _codes(frame: SalesFrame, by: str):
+    """(códigos por fila, etiquetas por código) para cada agrupación."""
+    if by == "product":
+        return frame.product, list(frame.product_ids)
+    if by == "payment_method":
+        return frame.payment.astype(np.int64), PAYMENT_METHODS + ["Otro"]
+    if by == "hour":
+        hours = frame.hour.astype(np.int64)
+        return np.where(hours < 0, 24, hours), [f"{h:02d}" for h in range(24)] + ["sin hora"]
+    if by == "none":
+        return np.zeros(len(frame), dtype=np.int64), ["all"]
+
+    if by == "month":
+        unit = "M"
+        values = frame.day.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    elif by == "day":
+        unit = "D"
+        values = frame.day.astype(np.int64)
+    else:
+        raise ValueError(f"Agrupación no soportada: {by}")
+    # desplazamiento desde el mínimo: bincount lineal, sin ordenar
+    lo, hi = int(values.min()), int(values.max())
+    labels = np.arange(lo, hi + 1).astype(f"datetime64[{unit}]").astype(str).tolist()
+    return values - lo, labels
+
+
+def group_totals(frame: SalesFrame, by: str) -> List[Dict[str, Any]]:
+    """
+    Totales por grupo: [{key, count, units, total}] ordenado por key.
+    Los grupos sin ventas se omiten.
+    """
+    if not len(frame):
+        return []
+    codes, labels = _codes(frame, by)
+    n = len(labels)
+    counts = np.bincount(codes, minlength=n)
+    units = np.bincount(codes, weights=frame.quantity, minlength=n)
+    cents = np.bincount(codes, weights=frame.total_cents, minlength=n)
+
+    out = [
+        {
+            "key": labels[i],
+            "count": int(counts[i]),
+            "units": float(units[i]),
+            "total": round(float(cents[i]) / 100, 2),
+        }
+        for i in np.nonzero(counts)[0]
+    ]
+    if by in ("day", "month"):
+        return out  # los códigos ya siguen el orden cronológico
+    return sorted(out, key=lambda b: b["key"])
+
+
+def summary(frame: SalesFrame) -> Dict[str, Any]:
+    total_sales = len(frame)
+    total_revenue = float(frame.total_cents.sum()) / 100 if total_sales else 0.0
+    return {
+        "total_sales": total_sales,
+        "total_units": float(frame.quantity.sum()) if total_sales else 0.0,
+        "total_revenue": round(total_revenue, 2),
+        "avg_ticket": round(total_revenue / total_sales, 2) if total_sales else 0,
+    }
+
+
+# ---------------------------
+# Analytics (top, mix de pago, heatmap)
+# ---------------------------
+WEEKDAYS = ["lunes", "martes", "miércoles", "jueves", "viernes", "sábado", "domingo"]
+
+
+def top_products(frame: SalesFrame, metric: str = "revenue", limit: int = 10) -> List[Dict[str, Any]]:
+    """Top-N productos por ingresos ('revenue') o unidades ('units')."""
+    if not len(frame):
+        return []
+    n = len(frame.product_ids)
+    counts = np.bincount(frame.product, minlength=n)
+    units = np.bincount(frame.product, weights=frame.quantity, minlength=n)
+    cents = np.bincount(frame.product, weights=frame.total_cents, minlength=n)
+
+    score = units if metric == "units" else cents
+    k = min(limit, n)
+    # argpartition: O(n) para separar el top-k; solo se ordenan esos k
+    top = np.argpartition(-score, k - 1)[:k]
+    top = top[np.lexsort((top, -score[top]))]
+    return [
+        {
+            "product_id": frame.product_ids[i],
+            "count": int(counts[i]),
+            "units": float(units[i]),
+            "total": round(float(cents[i]) / 100, 2),
+        }
+        for i in top
+        if counts[i]
+    ]
+
+
+def payment_mix(frame: SalesFrame) -> List[Dict[str, Any]]:
+    """Participación de cada método de pago en ventas e ingresos."""
+    n = len(PAYMENT_METHODS) + 1
+    counts = np.bincount(frame.payment.astype(np.int64), minlength=n)
+    cents = np.bincount(frame.payment.astype(np.int64), weights=frame.total_cents, minlength=n)
+    labels = PAYMENT_METHODS + ["Otro"]
+    return [
+        {"method": labels[i], "count": int(counts[i]), "revenue_cents": int(cents[i])}
+        for i in range(n)
+        if i < len(PAYMENT_METHODS) or counts[i]
+    ]
+
+
+def hourly_heatmap(frame: SalesFrame) -> Dict[str, np.ndarray]:
+    """Matrices 7x24 (día de semana x hora) de ventas e ingresos en céntimos."""
+    mask = frame.hour >= 0
+    # 1970-01-01 fue jueves: (día + 3) % 7 deja lunes = 0
+    weekday = (frame.day[mask].astype(np.int64) + 3) % 7
+    codes = weekday * 24 + frame.hour[mask].astype(np.int64)
+    counts = np.bincount(codes, minlength=7 * 24).reshape(7, 24)
+    cents = np.bincount(codes, weights=frame.total_cents[mask], minlength=7 * 24).reshape(7, 24)
+    return {"counts": counts, "cents": cents}
@@ -1,20 +1,20 @@
-from typing import Optional, List
-from passlib.context import CryptContext
+from typing import Optional, List, Tuple
+from datetime import datetime, timezone
 from ..models.user import UserCreate, UserResponse
 from ..repositories.user_repo import UserRepo
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from ..core.pagination import encode_cursor, cursor_key
+from ..core.passwords import password_hasher
 
 class UserService:
     @staticmethod
-    def create_if_not_exists(payload: UserCreate, password: str) -> UserResponse:
+    def create_if_not_exists(payload: UserCreate, password: Optional[str] = None) -> UserResponse:
         # 1) Buscar por email en repositorio
         existing = UserRepo.get_by_email(payload.email)
         if existing:
             raise Exception("El usuario ya existe")
 
-        # 2) Hashear la contraseña
-        hashed_password = pwd_context.hash(password)
+        # 2) Hashear la contraseña (pool compartido de hashing)
+        hashed_password = password_hasher.hash(password or payload.password)
 
         # 3) Crear perfil
         profile = {
@@ -23,6 +23,7 @@ class UserService:
             "role": payload.role,
             "disabled": False,
             "password": hashed_password,
+            "created_at": datetime.now(timezone.utc).isoformat(),
         }
 
         uid = UserRepo.create(profile)  # genera ID en tu repo
@@ -36,18 +37,20 @@ class UserService:
         )
 
     @staticmethod
-    def list_users(limit: int = 50) -> List[dict]:
-        return UserRepo.list(limit)
+    def list_users(limit: int = 50, cursor: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        """Página de usuarios por uid: (usuarios, next_cursor)."""
+        data, next_key = UserRepo.list_page(limit, after=cursor_key(cursor))
+        return data, encode_cursor({"k": next_key} if next_key else None)
 
     @staticmethod
     def verify_password(plain_password: str, hashed_password: str) -> bool:
-        return pwd_context.verify(plain_password, hashed_password)
+        return password_hasher.verify_and_update(plain_password, hashed_password)[0]
 
     @staticmethod
     def authenticate(email: str, password: str) -> Optional[dict]:
         user = UserRepo.get_by_email(email)
         if not user:
             return None
-        if not UserService.verify_password(password, user["password"]):
+        if not user.get("password") or not UserService.verify_password(password, user["password"]):
             return None
         return user
\ No newline at end of file
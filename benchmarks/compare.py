@@ -0,0 +1,50 @@
+"""
+Compara dos corridas de benchmarks/run.py.
+
+    python -m benchmarks.compare base.json nuevo.json [--threshold 10]
+
+Sale con código 1 si algún escenario empeora más que --threshold % en p95 o req/s.
+"""
+import argparse
+import json
+import sys
+
+
+def _load(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _pct(old: float, new: float) -> float:
+    return (new - old) / old * 100 if old else 0.0
+
+
+def compare(base: dict, new: dict, threshold: float) -> int:
+    regressions = 0
+    print(f"base {base['meta']['git_commit']}  ->  nuevo {new['meta']['git_commit']}")
+    print(f"{'escenario':<13} {'req/s':>20} {'p95 ms':>22}")
+    for name, b in base["results"].items():
+        n = new["results"].get(name)
+        if n is None:
+            continue
+        rps = _pct(b["rps"], n["rps"])
+        p95 = _pct(b["latency_ms"]["p95"], n["latency_ms"]["p95"])
+        worse = rps < -threshold or p95 > threshold
+        regressions += worse
+        print(f"{name:<13} {b['rps']:>8.1f} -> {n['rps']:>8.1f} ({rps:+5.0f}%)"
+              f" {b['latency_ms']['p95']:>8.2f} -> {n['latency_ms']['p95']:>8.2f} ({p95:+5.0f}%)"
+              f"{'  <- regresión' if worse else ''}")
+    return 1 if regressions else 0
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="Compara dos resultados de benchmarks")
+    p.add_argument("base")
+    p.add_argument("new")
+    p.add_argument("--threshold", type=float, default=10.0, help="tolerancia en %%")
+    args = p.parse_args(argv)
+    return compare(_load(args.base), _load(args.new), args.threshold)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
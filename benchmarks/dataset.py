@@ -0,0 +1,19 @@
+"""
+Datos de prueba para los benchmarks: el mismo generador sintético de
+scripts/generate_data.py (nombres reales, popularidad sesgada, horas pico),
+escrito directo en RTDB (emulador) con las rutas que usa la API.
+"""
+from typing import Any, Dict
+
+from scripts.generate_data import generate
+
+BENCH_PASSWORD = "bench-password"
+ADMIN_EMAIL = "bench-admin@salestalk.com"
+
+
+def seed(products: int, sales: int, users: int = 10, days: int = 90, seed_value: int = 42) -> Dict[str, Any]:
+    """Carga el dataset y devuelve lo que necesitan los escenarios (ids, nombres, fechas)."""
+    return generate(
+        products=products, sales=sales, users=max(users, 1), days=days, seed=seed_value,
+        password=BENCH_PASSWORD, admin_email=ADMIN_EMAIL,
+    )
@@ -0,0 +1,216 @@
+"""
+Benchmarks de los flujos principales de la API, en proceso y contra el
+emulador de RTDB (RTDB_BACKEND=memory; no usa Firebase ni red).
+
+Uso:
+    python -m benchmarks.run --products 1000 --sales 20000 --concurrency 16 --requests 300
+    python -m benchmarks.run --scenarios products,report --latency-ms 20-60
+
+Escribe un JSON por corrida en benchmarks/results/ (o --out) con req/s y
+latencias p50/p95/p99 por escenario; compáralos con benchmarks/compare.py.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+RESULTS_DIR = os.path.join(BASE_DIR, "benchmarks", "results")
+
+
+# -------------------------------------------------------------------
+# Escenarios: cada uno arma un request (método, url, kwargs) por iteración
+# -------------------------------------------------------------------
+def _scenarios(data: Dict[str, Any], rng: random.Random) -> Dict[str, Callable[[], tuple]]:
+    from benchmarks.dataset import BENCH_PASSWORD
+
+    def login():
+        return "POST", "/auth/login", {"params": {"email": rng.choice(data["emails"]), "password": BENCH_PASSWORD}}
+
+    def products():
+        return "GET", "/products", {"params": {"limit": 50}}
+
+    def search():
+        name = rng.choice(data["product_names"])
+        return "GET", "/products/search/by-name", {"params": {"name": name[: rng.randint(3, 8)]}}
+
+    def create_sale():
+        body = {"product_id": rng.choice(data["product_ids"]), "quantity": rng.randint(1, 5),
+                "payment_method": rng.choice(["Efectivo", "Tarjeta", "Yape", "Plin"])}
+        return "POST", "/sales", {"json": body}
+
+    def report():
+        return "GET", "/sales/report", {"params": {"date_from": data["date_from"], "date_to": data["date_to"]}}
+
+    def interpret():
+        name = rng.choice(data["product_names"])
+        return "POST", "/nlp/interpret", {"json": {"text": f"vendí {rng.randint(1, 4)} {name} con yape"}}
+
+    def confirm_sale():
+        body = {"product_id": rng.choice(data["product_ids"]), "quantity": rng.randint(1, 3), "payment_method": "Yape"}
+        return "POST", "/nlp/confirm_sale", {"json": body}
+
+    return {
+        "login": login,
+        "products": products,
+        "search": search,
+        "create_sale": create_sale,
+        "report": report,
+        "interpret": interpret,
+        "confirm_sale": confirm_sale,
+    }
+
+
+def _percentile(sorted_values: List[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, int(round(p / 100 * (len(sorted_values) - 1)))))
+    return sorted_values[k]
+
+
+async def _run_scenario(client, build: Callable[[], tuple], headers: Dict[str, str],
+                        requests: int, concurrency: int, warmup: int) -> Dict[str, Any]:
+    for _ in range(warmup):
+        method, url, kwargs = build()
+        await client.request(method, url, headers=headers, **kwargs)
+
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            method, url, kwargs = build()
+            t0 = time.perf_counter()
+            resp = await client.request(method, url, headers=headers, **kwargs)
+            latencies.append((time.perf_counter() - t0) * 1000)
+            statuses[str(resp.status_code)] = statuses.get(str(resp.status_code), 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    errors = sum(n for code, n in statuses.items() if not code.startswith("2"))
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "rps": round(requests / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+            "p50": round(_percentile(latencies, 50), 2),
+            "p95": round(_percentile(latencies, 95), 2),
+            "p99": round(_percentile(latencies, 99), 2),
+            "max": round(latencies[-1], 2) if latencies else 0.0,
+        },
+        "status": statuses,
+        "errors": errors,
+    }
+
+
+def _git_commit() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR,
+                             capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or "unknown"
+    except Exception:
+        return "unknown"
+
+
+async def _main(args) -> Dict[str, Any]:
+    import httpx
+    from app.core.firebase import init_firebase
+    from app.core.security import create_access_token
+    from app.main import app
+    from benchmarks.dataset import ADMIN_EMAIL, seed
+
+    init_firebase()
+    t0 = time.perf_counter()
+    data = seed(args.products, args.sales, users=args.users, days=args.days)
+    seed_seconds = time.perf_counter() - t0
+    print(f"Dataset: {args.products} productos, {args.sales} ventas ({seed_seconds:.1f}s)")
+
+    token = create_access_token(sub=ADMIN_EMAIL, role="superadmin", uid="bench-uid-0")
+    headers = {"Authorization": f"Bearer {token}"}
+    rng = random.Random(args.seed)
+    scenarios = _scenarios(data, rng)
+    selected = [s.strip() for s in args.scenarios.split(",") if s.strip()] if args.scenarios else list(scenarios)
+    unknown = [s for s in selected if s not in scenarios]
+    if unknown:
+        raise SystemExit(f"Escenarios desconocidos: {', '.join(unknown)} (disponibles: {', '.join(scenarios)})")
+
+    results: Dict[str, Any] = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for name in selected:
+            # login (bcrypt) es mucho más lento: menos requests por defecto
+            requests = args.login_requests if name == "login" else args.requests
+            res = await _run_scenario(client, scenarios[name], headers, requests, args.concurrency, args.warmup)
+            results[name] = res
+            lat = res["latency_ms"]
+            print(f"{name:<13} {res['rps']:>9.1f} req/s  p50 {lat['p50']:>8.2f}  p95 {lat['p95']:>8.2f}  "
+                  f"p99 {lat['p99']:>8.2f} ms  errores {res['errors']}")
+
+    return {
+        "meta": {
+            "git_commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "dataset": {"products": args.products, "sales": args.sales, "users": args.users, "days": args.days},
+            "concurrency": args.concurrency,
+            "latency_ms": args.latency_ms or "0",
+            "seed_seconds": round(seed_seconds, 2),
+        },
+        "results": results,
+    }
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Benchmarks de la API sobre el emulador de RTDB")
+    p.add_argument("--products", type=int, default=500)
+    p.add_argument("--sales", type=int, default=10000)
+    p.add_argument("--users", type=int, default=10)
+    p.add_argument("--days", type=int, default=90, help="días de historia de ventas")
+    p.add_argument("--concurrency", type=int, default=8)
+    p.add_argument("--requests", type=int, default=200, help="requests por escenario")
+    p.add_argument("--login-requests", type=int, default=40)
+    p.add_argument("--warmup", type=int, default=5)
+    p.add_argument("--scenarios", default="", help="lista separada por comas (por defecto todos)")
+    p.add_argument("--latency-ms", default="", help="latencia simulada de RTDB: '20' o '10-40'")
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--out", default="", help="archivo JSON de salida")
+    return p.parse_args(argv)
+
+
+def run(argv=None) -> str:
+    args = parse_args(argv)
+    # el backend se elige al importar app.core.firebase: fijarlo antes
+    os.environ["RTDB_BACKEND"] = "memory"
+    os.environ["RTDB_LATENCY_MS"] = args.latency_ms
+    os.environ.pop("RTDB_MEMORY_FILE", None)
+
+    report = asyncio.run(_main(args))
+    out = args.out or os.path.join(
+        RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{report['meta']['git_commit']}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"Resultados: {out}")
+    return out
+
+
+if __name__ == "__main__":
+    run()
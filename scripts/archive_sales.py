@@ -0,0 +1,94 @@
+# scripts/archive_sales.py
+# Saca de /sales las ventas de meses anteriores a los últimos SALES_HOT_MONTHS.
+# Quedan en su partición /sales_by_month/{YYYY-MM} y en /_archive/sales/ids
+# (id -> mes), así que GET /sales/{id}, los listados y los reportes las siguen
+# encontrando; lo que deja de crecer es /sales.
+#
+#   python scripts/archive_sales.py --months 12 --dry-run
+#
+# Requiere la migración 2026-10-partition-sales-by-month completa (si no, no
+# hace nada): los reportes leen las particiones solo desde entonces. Igual se
+# reescribe la copia de cada venta en su partición antes de borrarla de /sales.
+import sys, os, time, argparse
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from app.core.firebase import init_firebase, rtdb
+from app.repositories.sale_repo import (
+    SaleRepo, SALES_PATH, SALES_BY_MONTH_PATH, ARCHIVED_IDS_PATH, ARCHIVED_MONTHS_PATH, sale_month,
+    PARTITIONS_MIGRATION, partitions_ready,
+)
+
+SALES_HOT_MONTHS = int(os.getenv("SALES_HOT_MONTHS", "12"))
+BATCH_SIZE = int(os.getenv("MIGRATION_BATCH_SIZE", "500"))
+
+def cutoff_month(hot_months: int, today: Optional[datetime] = None) -> str:
+    """Primer mes que se queda en /sales: el actual menos (hot_months - 1)."""
+    today = today or datetime.now(timezone.utc)
+    index = today.year * 12 + (today.month - 1) - (hot_months - 1)
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+def _move(page: List[Dict[str, Any]], counts: Dict[str, int], dry_run: bool) -> None:
+    paths: Dict[str, Any] = {}
+    for sale in page:
+        sid = sale.pop("id")
+        month = sale_month(sale)
+        paths[f"{SALES_BY_MONTH_PATH}/{month}/{sid}"] = sale
+        paths[f"{ARCHIVED_IDS_PATH}/{sid}"] = month
+        paths[f"{SALES_PATH}/{sid}"] = None
+        counts[month] = counts.get(month, 0) + 1
+    if paths and not dry_run:
+        rtdb().update(paths)
+
+def archive(hot_months: int = SALES_HOT_MONTHS, batch_size: int = BATCH_SIZE, dry_run: bool = False) -> Dict[str, int]:
+    cutoff = cutoff_month(hot_months)
+    print(f"Archivando ventas anteriores a {cutoff}{' (dry-run)' if dry_run else ''}")
+    started = time.time()
+    counts: Dict[str, int] = {}
+    page: List[Dict[str, Any]] = []
+    # end_at("YYYY-MM") deja fuera todo ese mes: "YYYY-MM-.." > "YYYY-MM"
+    for sale in SaleRepo.iter_by_child_date(SALES_PATH, None, cutoff, batch_size):
+        if not sale_month(sale):
+            continue
+        page.append(sale)
+        if len(page) >= batch_size:
+            _move(page, counts, dry_run)
+            page = []
+            moved = sum(counts.values())
+            print(f"  {moved} ventas archivadas ({moved / max(time.time() - started, 1e-6):,.0f}/s)")
+    _move(page, counts, dry_run)
+
+    if counts and not dry_run:
+        now = int(time.time())
+        paths: Dict[str, Any] = {}
+        for month, n in counts.items():
+            paths[f"{ARCHIVED_MONTHS_PATH}/{month}/count"] = {".sv": {"increment": n}}
+            paths[f"{ARCHIVED_MONTHS_PATH}/{month}/archived_at"] = now
+        rtdb().update(paths)
+    for month in sorted(counts):
+        print(f"  {month}: {counts[month]} ventas")
+    print(f"{sum(counts.values())} ventas archivadas en {time.time() - started:.1f}s")
+    return counts
+
+def parse_args(argv: Optional[List[str]] = None):
+    p = argparse.ArgumentParser(description="Archiva los meses antiguos de /sales en sus particiones")
+    p.add_argument("--months", type=int, default=SALES_HOT_MONTHS, help="meses que se quedan en /sales (incluye el actual)")
+    p.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    p.add_argument("--dry-run", action="store_true", help="solo cuenta lo que se archivaría")
+    return p.parse_args(argv)
+
+def run(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    if args.months < 1:
+        sys.exit("--months debe ser >= 1")
+    init_firebase()
+    if not partitions_ready():
+        sys.exit(f"Falta completar la migración {PARTITIONS_MIGRATION} (python scripts/migrate.py)")
+    archive(args.months, args.batch_size, args.dry_run)
+
+if __name__ == "__main__":
+    run()
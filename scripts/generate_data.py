@@ -0,0 +1,250 @@
+# scripts/generate_data.py
+# Genera un dataset sintético con forma de producción: productos con nombres
+# reales de bodega, ventas repartidas en el tiempo (más ventas a mediodía y en
+# la noche, y los fines de semana), popularidad sesgada (Zipf) y mezcla de
+# métodos de pago. Misma semilla => mismo dataset (salvo los ids push).
+#
+#   python scripts/generate_data.py --products 2000 --sales 1000000 --days 365 --seed 42
+#
+# Escribe con updates multi-path por bloques (--chunk). Por defecto solo corre
+# contra el emulador (RTDB_BACKEND=memory); para Firebase real usar --allow-remote.
+# --reset solo se acepta con el emulador: nunca borra datos de Firebase real.
+import sys, os, time, argparse, random
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+from typing import Any, Dict, List, Optional
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+import bcrypt
+
+from app.core.firebase import init_firebase, rtdb, use_memory
+from app.core.ids import push_id
+from app.repositories.rollup_repo import RollupRepo
+from app.repositories.sale_repo import (
+    SALES_PATH, SALES_BY_PRODUCT_PATH, SALES_BY_MONTH_PATH, ARCHIVE_PATH, MIGRATIONS_PATH, PARTITIONS_MIGRATION,
+)
+from app.repositories.user_repo import UserRepo
+from app.services.product_service import NAME_INDEX_PATH, name_index_key
+
+CHUNK_SIZE = int(os.getenv("GENERATOR_CHUNK_SIZE", "2000"))
+
+# (categoría, variantes, presentaciones, rango de precio en soles)
+CATALOG = [
+    ("Gaseosa", ["Coca Cola", "Inca Kola", "Fanta", "Sprite", "Pepsi", "Guaraná"], ["500 ml", "1 L", "1.5 L", "3 L"], (2.0, 12.0)),
+    ("Agua", ["San Luis", "Cielo", "San Mateo", "Vida"], ["625 ml", "1 L", "2.5 L"], (1.0, 5.0)),
+    ("Galletas", ["Oreo", "Soda Field", "Casino", "Margarita", "Morochas", "Chomp"], ["paquete", "six pack"], (0.8, 7.0)),
+    ("Arroz", ["Costeño", "Paisana", "Faraón", "Valle Norte"], ["1 kg", "5 kg"], (4.0, 25.0)),
+    ("Leche", ["Gloria", "Laive", "Pura Vida", "Bonlé"], ["lata 400 g", "caja 1 L"], (3.5, 6.5)),
+    ("Aceite", ["Primor", "Cocinero", "Capri", "Ideal"], ["900 ml", "1 L"], (7.0, 14.0)),
+    ("Yogurt", ["Gloria", "Laive", "Yoleit"], ["fresa 1 L", "durazno 1 L", "vainilla 180 g"], (1.5, 8.0)),
+    ("Pan", ["francés", "de yema", "integral", "ciabatta", "chapla"], ["unidad", "bolsa x6"], (0.3, 3.5)),
+    ("Chocolate", ["Sublime", "Triángulo", "Princesa", "Cua Cua"], ["unidad", "pack x6"], (1.0, 9.0)),
+    ("Detergente", ["Ariel", "Bolívar", "Opal", "Ace"], ["500 g", "1 kg", "2 kg"], (5.0, 28.0)),
+    ("Fideos", ["Don Vittorio", "Molitalia", "Lavaggi"], ["spaghetti 500 g", "tallarín 1 kg", "canuto 250 g"], (2.0, 8.0)),
+    ("Atún", ["Florida", "Campomar", "A1"], ["lata 170 g", "pack x3"], (4.5, 16.0)),
+    ("Onigiri", ["clásico", "de salmón", "de atún", "de pollo"], ["unidad"], (5.0, 9.0)),
+    ("Makis", ["acevichado", "furai", "california", "parrillero"], ["x5", "x10"], (12.0, 30.0)),
+    ("Cerveza", ["Pilsen", "Cusqueña", "Cristal"], ["lata 355 ml", "botella 650 ml", "six pack"], (4.0, 32.0)),
+]
+PACKS = ["", " pack x2", " pack x3", " caja x12", " caja x24"]
+
+PAYMENT_METHODS = ["Efectivo", "Yape", "Plin", "Tarjeta"]
+PAYMENT_WEIGHTS = [45, 30, 10, 15]
+
+# ventas por hora local (bodega: pico de almuerzo y de salida del trabajo)
+HOUR_WEIGHTS = [0, 0, 0, 0, 0, 0, 1, 3, 5, 5, 5, 6, 9, 10, 7, 5, 5, 6, 9, 10, 9, 6, 3, 1]
+# lunes..domingo
+WEEKDAY_WEIGHTS = [10, 10, 10, 11, 13, 16, 12]
+
+
+def product_names(n: int, rng: random.Random) -> List[Dict[str, Any]]:
+    """n productos con nombre y precio realistas (los primeros, sin pack)."""
+    base = []
+    for category, variants, sizes, (lo, hi) in CATALOG:
+        for variant in variants:
+            for size in sizes:
+                base.append((f"{category} {variant} {size}".strip(), lo, hi))
+    rng.shuffle(base)
+
+    out = []
+    for i in range(n):
+        name, lo, hi = base[i % len(base)]
+        round_, rest = divmod(i, len(base))
+        multiplier = 1
+        if round_ < len(PACKS):
+            name = name + PACKS[round_]
+            multiplier = [1, 2, 3, 12, 24][round_]
+        else:
+            name = f"{name} presentación {round_ - len(PACKS) + 2}"
+        price = round(rng.uniform(lo, hi) * multiplier * (0.9 if multiplier > 1 else 1), 1)
+        out.append({"name": name, "price": max(price, 0.1)})
+    return out
+
+
+def _zipf_cum_weights(n: int, s: float) -> List[float]:
+    """Popularidad: el producto de rango k pesa 1/k^s (pocos productos concentran las ventas)."""
+    return list(accumulate(1.0 / (k ** s) for k in range(1, n + 1)))
+
+
+def write_products(products: List[Dict[str, Any]], chunk: int, now: datetime, days: int) -> List[str]:
+    ids = []
+    for i in range(0, len(products), chunk):
+        paths: Dict[str, Any] = {}
+        for p in products[i:i + chunk]:
+            pid = push_id()
+            paths[f"/products/{pid}"] = {
+                "name": p["name"], "price": p["price"], "status": "active",
+                "created_at": (now - timedelta(days=days)).isoformat(),
+            }
+            paths[f"{NAME_INDEX_PATH}/{name_index_key(p['name'], pid)}"] = pid
+            ids.append(pid)
+        rtdb().update(paths)
+    return ids
+
+
+def write_sales(total: int, product_ids: List[str], prices: List[float], rng: random.Random,
+                now: datetime, days: int, chunk: int, zipf: float, tz_offset_hours: int) -> None:
+    """
+    Ventas + partición mensual + índice por producto por bloques. Los rollups se acumulan en memoria
+    y se escriben al final (incrementos): cada bloque toca cientos de días y
+    mandarlos en cada update multiplicaría el tamaño de los writes.
+    """
+    popularity = list(range(len(product_ids)))
+    rng.shuffle(popularity)  # qué productos son populares también depende de la semilla
+    cum = _zipf_cum_weights(len(product_ids), zipf)
+    hours = list(range(24))
+    hour_cum = list(accumulate(HOUR_WEIGHTS))
+    day_offsets = list(range(days))
+    start_day = (now + timedelta(hours=tz_offset_hours)).date() - timedelta(days=days - 1)
+    day_cum = list(accumulate(WEEKDAY_WEIGHTS[(start_day + timedelta(days=d)).weekday()] for d in day_offsets))
+    tz = timezone(timedelta(hours=tz_offset_hours))
+
+    rollups: Dict[str, int] = {}
+    written = 0
+    started = time.time()
+    while written < total:
+        n = min(chunk, total - written)
+        picks = rng.choices(popularity, cum_weights=cum, k=n)
+        day_picks = rng.choices(day_offsets, cum_weights=day_cum, k=n)
+        hour_picks = rng.choices(hours, cum_weights=hour_cum, k=n)
+        methods = rng.choices(PAYMENT_METHODS, weights=PAYMENT_WEIGHTS, k=n)
+
+        paths: Dict[str, Any] = {}
+        for idx, d, h, method in zip(picks, day_picks, hour_picks, methods):
+            day = start_day + timedelta(days=d)
+            date = datetime(day.year, day.month, day.day, h, rng.randrange(60), rng.randrange(60), tzinfo=tz)
+            quantity = 1 + int(rng.expovariate(0.9))  # casi siempre 1-2 unidades
+            price = prices[idx]
+            sale = {
+                "product_id": product_ids[idx],
+                "quantity": quantity,
+                "payment_method": method,
+                "date": date.isoformat(),
+                "created_at": date.isoformat(),
+                "unit_price": price,
+                "total": round(price * quantity, 2),
+            }
+            sid = push_id()
+            paths[f"{SALES_PATH}/{sid}"] = sale
+            paths[f"{SALES_BY_MONTH_PATH}/{sale['date'][:7]}/{sid}"] = sale
+            paths[f"{SALES_BY_PRODUCT_PATH}/{sale['product_id']}/{sid}"] = sale["date"]
+            RollupRepo.merge(rollups, RollupRepo.deltas(sale, +1))
+        rtdb().update(paths)
+        written += n
+        rate = written / max(time.time() - started, 1e-6)
+        print(f"  ventas {written}/{total} ({rate:,.0f}/s)")
+
+    increments = RollupRepo.increments(rollups)
+    keys = list(increments)
+    for i in range(0, len(keys), chunk):
+        rtdb().update({k: increments[k] for k in keys[i:i + chunk]})
+
+
+def write_users(n: int, password: str, now: datetime, admin_email: str) -> List[str]:
+    # un solo hash (bcrypt es caro a propósito) para todos los usuarios generados
+    hashed = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+    emails = []
+    for i in range(n):
+        email = admin_email if i == 0 else f"usuario{i}@salestalk.com"
+        UserRepo.upsert_profile(f"gen-uid-{i}", {
+            "email": email,
+            "display_name": "Super Admin" if i == 0 else f"Usuario {i}",
+            "role": "superadmin" if i == 0 else "user",
+            "disabled": False,
+            "password": hashed,
+            "created_at": now.isoformat(),
+        })
+        emails.append(email)
+    return emails
+
+
+def generate(products: int = 500, sales: int = 10000, users: int = 5, days: int = 90,
+             seed: int = 42, chunk: int = CHUNK_SIZE, zipf: float = 1.1,
+             password: str = "admin", admin_email: str = "admin@salestalk.com",
+             tz_offset_hours: int = -5) -> Dict[str, Any]:
+    """Genera y escribe el dataset; devuelve ids/nombres/emails para quien lo use (p. ej. benchmarks)."""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+
+    catalog = product_names(products, rng)
+    product_ids = write_products(catalog, chunk, now, days)
+    print(f"Productos: {len(product_ids)}")
+    if sales and product_ids:
+        fresh = not rtdb(SALES_PATH).get(shallow=True)
+        write_sales(sales, product_ids, [p["price"] for p in catalog], rng, now, days, chunk, zipf, tz_offset_hours)
+        if fresh:
+            # todas las ventas se escribieron con su partición: no hay historia que migrar
+            rtdb(f"{MIGRATIONS_PATH}/{PARTITIONS_MIGRATION}").set({"status": "done", "finished_at": int(now.timestamp())})
+    emails = write_users(users, password, now, admin_email) if users else []
+    print(f"Usuarios: {len(emails)}")
+
+    return {
+        "product_ids": product_ids,
+        "product_names": [p["name"] for p in catalog],
+        "emails": emails,
+        "date_from": (now - timedelta(days=min(days, 30))).date().isoformat(),
+        "date_to": now.date().isoformat(),
+    }
+
+
+def reset() -> None:
+    """Borra lo que genera este script (productos, ventas y particiones, índices, rollups, usuarios)."""
+    paths = ("/products", SALES_PATH, SALES_BY_MONTH_PATH, ARCHIVE_PATH, "/_indexes", "/_rollups", "/users", "/_refresh_tokens")
+    rtdb().update({p: None for p in paths})
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    p = argparse.ArgumentParser(description="Genera un dataset sintético de productos, ventas y usuarios")
+    p.add_argument("--products", type=int, default=500)
+    p.add_argument("--sales", type=int, default=10000)
+    p.add_argument("--users", type=int, default=5)
+    p.add_argument("--days", type=int, default=90, help="días de historia de ventas")
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--chunk", type=int, default=CHUNK_SIZE, help="ventas/productos por update multi-path")
+    p.add_argument("--zipf", type=float, default=1.1, help="sesgo de popularidad (0 = uniforme)")
+    p.add_argument("--password", default="admin", help="password de los usuarios generados")
+    p.add_argument("--reset", action="store_true", help="borra los datos existentes antes de generar (solo con el emulador)")
+    p.add_argument("--allow-remote", action="store_true", help="permite escribir en Firebase real")
+    return p.parse_args(argv)
+
+
+def run(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    if not use_memory() and not args.allow_remote:
+        sys.exit("RTDB_BACKEND no es 'memory': agrega --allow-remote para escribir en Firebase real.")
+    if args.reset and not use_memory():
+        sys.exit("--reset solo funciona con RTDB_BACKEND=memory: no se borran datos de Firebase real.")
+    init_firebase()
+    if args.reset:
+        print("Borrando datos existentes...")
+        reset()
+    started = time.time()
+    generate(args.products, args.sales, args.users, args.days, args.seed, args.chunk, args.zipf, args.password)
+    print(f"Dataset generado en {time.time() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    run()
@@ -1,103 +1,162 @@
 # scripts/migrate.py
-import sys, os, time
-from datetime import datetime, timezone
+# Aplica las migraciones de scripts/migrations/ en orden.
+#
+#   python scripts/migrate.py              # aplica las pendientes
+#   python scripts/migrate.py --dry-run    # solo cuenta lo que cambiaría
+#   python scripts/migrate.py --status     # estado de cada migración
+#
+# El progreso queda en /_migrations/{name} (paso + última clave procesada) en
+# el mismo update que los cambios de cada página: si se corta, la siguiente
+# corrida sigue desde ahí.
+import sys, os, time, argparse
+from typing import Any, Dict, List, Optional
 
 # asegurar que la raíz del proyecto esté en sys.path
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if BASE_DIR not in sys.path:
     sys.path.insert(0, BASE_DIR)
 
-from app.core.firebase import init_firebase, rtdb
+from app.core.firebase import init_firebase, rtdb, iter_pages
+from scripts.migrations import Batched, Context, Once, discover
 
-MIGRATION_NAME = "2025-08-ensure-users-products-sales-structure-final"
 MIGRATIONS_PATH = "/_migrations"
-USERS_PATH = "/users"
-PRODUCTS_PATH = "/products"
-SALES_PATH = "/sales"
-EMAIL_INDEX_PATH = "/_indexes/email_to_uid"
-
-def already_ran():
-    return bool(rtdb(f"{MIGRATIONS_PATH}/{MIGRATION_NAME}").get())
-
-def mark_done():
-    rtdb(f"{MIGRATIONS_PATH}/{MIGRATION_NAME}").set(int(time.time()))
-
-def ensure_branch_exists(path: str):
-    """Si la rama no existe (get() is None), crea un placeholder para que se muestre."""
-    ref = rtdb(path)
-    val = ref.get()
-    if val is None:
-        print(f"Creando rama: {path}")
-        # placeholder visible y sencillo
-        ref.set({"__created_by_migration__": True})
-    else:
-        print(f"Ya existe rama: {path}")
-
-def safe_set(child_path: str, value):
-    """Escribe un valor en una ruta concreta (set)"""
-    rtdb(child_path).set(value)
-
-def run():
+BATCH_SIZE = int(os.getenv("MIGRATION_BATCH_SIZE", "500"))
+PROGRESS_EVERY_SECONDS = 1.0
+
+def get_checkpoint(name: str) -> Dict[str, Any]:
+    value = rtdb(f"{MIGRATIONS_PATH}/{name}").get()
+    if value is None:
+        return {}
+    if not isinstance(value, dict):
+        # formato antiguo: timestamp de cuando se aplicó
+        return {"status": "done", "finished_at": value}
+    return value
+
+def already_ran(name: str) -> bool:
+    return get_checkpoint(name).get("status") == "done"
+
+def _checkpoint_paths(name: str, fields: Dict[str, Any]) -> Dict[str, Any]:
+    return {f"{MIGRATIONS_PATH}/{name}/{k}": v for k, v in fields.items()}
+
+class _Progress:
+    def __init__(self, label: str, processed: int = 0, changed: int = 0):
+        self.label = label
+        self.processed = processed
+        self.changed = changed
+        self._started = time.time()
+        self._from = processed
+        self._last_print = 0.0
+        self._printed = None
+
+    def report(self, force: bool = False):
+        now = time.time()
+        if not force and now - self._last_print < PROGRESS_EVERY_SECONDS:
+            return
+        if self._printed == self.processed:
+            return
+        self._last_print, self._printed = now, self.processed
+        rate = (self.processed - self._from) / max(now - self._started, 1e-6)
+        print(f"  {self.label}: {self.processed} leídos en total, {self.changed} con cambios ({rate:,.0f}/s)")
+
+def run_batched(name: str, index: int, step: Batched, ctx: Context,
+                cursor: Optional[str], progress: _Progress) -> None:
+    for page in iter_pages(step.path, ctx.batch_size, start_key=cursor):
+        updates: Dict[str, Any] = {}
+        for key, value in page:
+            fix = step.fix(key, value, ctx)
+            if fix:
+                updates.update(fix)
+                progress.changed += 1
+        progress.processed += len(page)
+        if not ctx.dry_run:
+            updates.update(_checkpoint_paths(name, {
+                "status": "running", "step": index, "cursor": page[-1][0],
+                "processed": progress.processed, "changed": progress.changed,
+                "updated_at": int(time.time()),
+            }))
+            rtdb().update(updates)
+        progress.report()
+    progress.report(force=True)
+
+def apply(module, ctx: Context) -> None:
+    name = module.NAME
+    checkpoint = get_checkpoint(name)
+    start_step = int(checkpoint.get("step") or 0)
+    cursor = checkpoint.get("cursor")
+    processed = int(checkpoint.get("processed") or 0)
+    changed = int(checkpoint.get("changed") or 0)
+    if checkpoint.get("status") == "running":
+        print(f"Retomando {name} en el paso {start_step + 1} (después de {cursor!r})")
+    started = time.time()
+
+    prepare = getattr(module, "prepare", None)
+    if prepare is not None:
+        prepare(ctx)
+
+    steps = module.STEPS
+    for i, step in enumerate(steps):
+        if i < start_step:
+            continue
+        if isinstance(step, Batched):
+            progress = _Progress(f"[{i + 1}/{len(steps)}] {step.path}", processed, changed)
+            run_batched(name, i, step, ctx, cursor if i == start_step else None, progress)
+            processed, changed = progress.processed, progress.changed
+        elif isinstance(step, Once):
+            step_changed = step.fn(ctx) or 0
+            changed += step_changed
+            print(f"  [{i + 1}/{len(steps)}] {step.fn.__name__}: {step_changed} cambios")
+        else:
+            raise TypeError(f"Paso no soportado en {name}: {step!r}")
+        if not ctx.dry_run:
+            rtdb().update(_checkpoint_paths(name, {
+                "status": "running", "step": i + 1, "cursor": None,
+                "processed": processed, "changed": changed, "updated_at": int(time.time()),
+            }))
+
+    seconds = round(time.time() - started, 1)
+    if ctx.dry_run:
+        print(f"Migration {name}: {processed} leídos, {changed} cambiarían ({seconds}s, dry-run).")
+        return
+    rtdb(f"{MIGRATIONS_PATH}/{name}").set({
+        "status": "done", "processed": processed, "changed": changed,
+        "seconds": seconds, "finished_at": int(time.time()),
+    })
+    print(f"Migration {name} aplicada correctamente: {processed} leídos, {changed} con cambios en {seconds}s.")
+
+def print_status(modules: List[Any]) -> None:
+    for module in modules:
+        checkpoint = get_checkpoint(module.NAME)
+        status = checkpoint.get("status") or "pendiente"
+        extra = ""
+        if status == "running":
+            extra = f" (paso {int(checkpoint.get('step') or 0) + 1}/{len(module.STEPS)}, cursor {checkpoint.get('cursor')!r})"
+        print(f"{module.__name__.rsplit('.', 1)[-1]:<34} {module.NAME:<56} {status}{extra}")
+
+def parse_args(argv: Optional[List[str]] = None):
+    p = argparse.ArgumentParser(description="Migraciones versionadas de RTDB")
+    p.add_argument("--dry-run", action="store_true", help="no escribe nada; solo cuenta los cambios")
+    p.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="registros por página/update")
+    p.add_argument("--only", action="append", help="aplica solo esta migración (NAME); repetible")
+    p.add_argument("--status", action="store_true", help="muestra el estado y termina")
+    return p.parse_args(argv)
+
+def run(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
     init_firebase()
-
-    if already_ran():
-        print("Migration ya aplicada. Nada que hacer.")
+    modules = discover()
+    if args.status:
+        print_status(modules)
         return
 
-    now = datetime.now(timezone.utc).isoformat()
-
-    # 1) Asegurar que las ramas base existan (usar leading slash para seguir tu patrón)
-    ensure_branch_exists(USERS_PATH)
-    ensure_branch_exists(PRODUCTS_PATH)
-    ensure_branch_exists(SALES_PATH)
-    ensure_branch_exists(EMAIL_INDEX_PATH)    # crea _indexes/email_to_uid si falta
-
-    # 2) Normalizar usuarios existentes
-    users = rtdb(f"{USERS_PATH}").get() or {}
-    if isinstance(users, dict):
-        for uid, profile in users.items():
-            # Si el profile no es dict (por algún dato corrupto), lo saltamos
-            if not isinstance(profile, dict):
-                continue
-            # password
-            if "password" not in profile:
-                print(f"Añadiendo password=None a users/{uid}")
-                safe_set(f"{USERS_PATH}/{uid}/password", None)
-            # created_at
-            if "created_at" not in profile:
-                print(f"Añadiendo created_at a users/{uid}")
-                safe_set(f"{USERS_PATH}/{uid}/created_at", now)
-            # disabled
-            if "disabled" not in profile:
-                print(f"Añadiendo disabled=False a users/{uid}")
-                safe_set(f"{USERS_PATH}/{uid}/disabled", False)
-
-    # 3) Normalizar productos existentes
-    products = rtdb(f"{PRODUCTS_PATH}").get() or {}
-    if isinstance(products, dict):
-        for pid, product in products.items():
-            if not isinstance(product, dict):
-                continue
-            if "status" not in product:
-                print(f"Añadiendo status='active' a products/{pid}")
-                safe_set(f"{PRODUCTS_PATH}/{pid}/status", "active")
-            if "created_at" not in product:
-                print(f"Añadiendo created_at a products/{pid}")
-                safe_set(f"{PRODUCTS_PATH}/{pid}/created_at", now)
-
-    # 4) Normalizar ventas existentes
-    sales = rtdb(f"{SALES_PATH}").get() or {}
-    if isinstance(sales, dict):
-        for sid, sale in sales.items():
-            if not isinstance(sale, dict):
-                continue
-            if "created_at" not in sale:
-                print(f"Añadiendo created_at a sales/{sid}")
-                safe_set(f"{SALES_PATH}/{sid}/created_at", now)
-
-    # 5) Marcar migración aplicada
-    mark_done()
-    print("Migration aplicada correctamente.")
+    ctx = Context(dry_run=args.dry_run, batch_size=args.batch_size)
+    for module in modules:
+        if args.only and module.NAME not in args.only:
+            continue
+        if already_ran(module.NAME):
+            print(f"Migration {module.NAME} ya aplicada. Nada que hacer.")
+            continue
+        print(f"Aplicando {module.NAME}{' (dry-run)' if ctx.dry_run else ''}...")
+        apply(module, ctx)
 
 if __name__ == "__main__":
     run()
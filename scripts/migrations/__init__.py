@@ -0,0 +1,39 @@
+# scripts/migrations/__init__.py
+# Migraciones versionadas. Cada módulo mNNNN_*.py define:
+#   NAME   -> id con el que se registra en /_migrations/{NAME}
+#   STEPS  -> lista de pasos, en orden:
+#               Batched(path, fix): recorre los hijos de `path` por páginas de
+#                 claves; fix(key, value, ctx) devuelve {ruta absoluta: valor}
+#                 con los cambios de ese registro ({} si no hay nada que hacer).
+#                 Cada página se escribe en un solo update multi-path junto con
+#                 el checkpoint, así una corrida interrumpida sigue donde quedó.
+#               Once(fn): fn(ctx) -> cantidad de cambios; debe respetar ctx.dry_run.
+#   prepare(ctx) (opcional) -> carga lo que necesiten los pasos (p. ej. precios).
+# El orden de aplicación es el del nombre del archivo (m0001, m0002, ...).
+import importlib
+import pkgutil
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, NamedTuple
+
+
+class Batched(NamedTuple):
+    path: str
+    fix: Callable[[str, Any, "Context"], Dict[str, Any]]
+
+
+class Once(NamedTuple):
+    fn: Callable[["Context"], int]
+
+
+class Context:
+    def __init__(self, dry_run: bool = False, batch_size: int = 500):
+        self.dry_run = dry_run
+        self.batch_size = batch_size
+        self.now = datetime.now(timezone.utc).isoformat()
+        self.state: Dict[str, Any] = {}  # datos compartidos entre prepare() y los pasos
+
+
+def discover() -> List[Any]:
+    """Módulos de migración ordenados por nombre de archivo."""
+    names = sorted(m.name for m in pkgutil.iter_modules(__path__) if m.name.startswith("m"))
+    return [importlib.import_module(f"{__name__}.{name}") for name in names]
@@ -0,0 +1,53 @@
+# Ramas base y campos por defecto en usuarios, productos y ventas.
+from typing import Any, Dict
+
+from app.core.firebase import rtdb
+from scripts.migrations import Batched, Context, Once
+
+NAME = "2025-08-ensure-users-products-sales-structure-final"
+
+USERS_PATH = "/users"
+PRODUCTS_PATH = "/products"
+SALES_PATH = "/sales"
+EMAIL_INDEX_PATH = "/_indexes/email_to_uid"
+
+
+def ensure_branches(ctx: Context) -> int:
+    """Si la rama no existe crea un placeholder para que se muestre."""
+    created = 0
+    for path in (USERS_PATH, PRODUCTS_PATH, SALES_PATH, EMAIL_INDEX_PATH):
+        # una sola clave basta para saber si existe (sin bajar la rama)
+        if rtdb(path).order_by_key().limit_to_first(1).get():
+            continue
+        print(f"Creando rama: {path}")
+        if not ctx.dry_run:
+            rtdb(path).set({"__created_by_migration__": True})
+        created += 1
+    return created
+
+
+def _defaults(base: str, doc: Any, defaults: Dict[str, Any]) -> Dict[str, Any]:
+    if not isinstance(doc, dict):
+        return {}  # dato corrupto: se salta
+    return {f"{base}/{field}": value for field, value in defaults.items() if field not in doc}
+
+
+def fix_user(uid: str, profile: Any, ctx: Context) -> Dict[str, Any]:
+    # password=None no crea nada en RTDB: se mantiene como en la versión original
+    return _defaults(f"{USERS_PATH}/{uid}", profile, {"password": None, "created_at": ctx.now, "disabled": False})
+
+
+def fix_product(pid: str, product: Any, ctx: Context) -> Dict[str, Any]:
+    return _defaults(f"{PRODUCTS_PATH}/{pid}", product, {"status": "active", "created_at": ctx.now})
+
+
+def fix_sale(sid: str, sale: Any, ctx: Context) -> Dict[str, Any]:
+    return _defaults(f"{SALES_PATH}/{sid}", sale, {"created_at": ctx.now})
+
+
+STEPS = [
+    Once(ensure_branches),
+    Batched(USERS_PATH, fix_user),
+    Batched(PRODUCTS_PATH, fix_product),
+    Batched(SALES_PATH, fix_sale),
+]
@@ -0,0 +1,24 @@
+# Reconstruye /_indexes/product_name a partir de /products.
+from app.core.firebase import iter_pages, rtdb
+from app.services.product_service import NAME_INDEX_PATH, name_index_key
+from scripts.migrations import Context, Once
+
+NAME = "2025-10-backfill-product-name-index"
+
+PRODUCTS_PATH = "/products"
+
+
+def rebuild_name_index(ctx: Context) -> int:
+    index = {}
+    for page in iter_pages(PRODUCTS_PATH, ctx.batch_size):
+        for pid, product in page:
+            if isinstance(product, dict) and product.get("name"):
+                index[name_index_key(product["name"], pid)] = pid
+    print(f"Indexando {len(index)} productos en {NAME_INDEX_PATH}")
+    if not ctx.dry_run:
+        # set completo: también elimina claves huérfanas de nombres antiguos
+        rtdb(NAME_INDEX_PATH).set(index or None)
+    return len(index)
+
+
+STEPS = [Once(rebuild_name_index)]
@@ -0,0 +1,40 @@
+# Rellena unit_price y total en ventas antiguas. No hay historial de precios:
+# se usa el precio actual del producto, que es lo que el reporte hacía antes.
+from typing import Any, Dict
+
+from app.core.firebase import iter_pages
+from app.repositories.sale_repo import SALES_PATH
+from scripts.migrations import Batched, Context
+
+NAME = "2025-10-backfill-sale-unit-price-and-total"
+
+PRODUCTS_PATH = "/products"
+
+
+def _float(value: Any) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def prepare(ctx: Context) -> None:
+    prices = {}
+    for page in iter_pages(PRODUCTS_PATH, ctx.batch_size):
+        for pid, product in page:
+            if isinstance(product, dict):
+                prices[pid] = _float(product.get("price"))
+    ctx.state["prices"] = prices
+
+
+def fix_sale(sid: str, sale: Any, ctx: Context) -> Dict[str, Any]:
+    if not isinstance(sale, dict) or sale.get("total") is not None:
+        return {}
+    price = ctx.state["prices"].get(sale.get("product_id"), 0.0)
+    return {
+        f"{SALES_PATH}/{sid}/unit_price": price,
+        f"{SALES_PATH}/{sid}/total": round(price * _float(sale.get("quantity")), 2),
+    }
+
+
+STEPS = [Batched(SALES_PATH, fix_sale)]
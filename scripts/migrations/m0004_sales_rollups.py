@@ -0,0 +1,13 @@
+# Rollups diarios/mensuales desde las ventas crudas (después de m0003: suman sale.total).
+from scripts.migrations import Context, Once
+from scripts.rebuild_rollups import rebuild
+
+NAME = "2025-10-build-sales-rollups"
+
+
+def build_rollups(ctx: Context) -> int:
+    # agregado global: no se puede reanudar a mitad, se recalcula entero
+    return rebuild(page_size=ctx.batch_size, dry_run=ctx.dry_run)
+
+
+STEPS = [Once(build_rollups)]
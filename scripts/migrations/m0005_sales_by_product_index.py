@@ -0,0 +1,16 @@
+# Crea /_indexes/sales_by_product/{product_id}/{sale_id} = fecha.
+from typing import Any, Dict
+
+from app.repositories.sale_repo import SALES_BY_PRODUCT_PATH, SALES_PATH
+from scripts.migrations import Batched, Context
+
+NAME = "2025-10-build-sales-by-product-index"
+
+
+def index_sale(sid: str, sale: Any, ctx: Context) -> Dict[str, Any]:
+    if not isinstance(sale, dict) or not sale.get("product_id"):
+        return {}
+    return {f"{SALES_BY_PRODUCT_PATH}/{sale['product_id']}/{sid}": sale.get("date") or True}
+
+
+STEPS = [Batched(SALES_PATH, index_sale)]
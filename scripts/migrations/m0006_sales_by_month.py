@@ -0,0 +1,18 @@
+# Copia cada venta a su partición mensual /sales_by_month/{YYYY-MM}/{sale_id}.
+from typing import Any, Dict
+
+from app.repositories.sale_repo import PARTITIONS_MIGRATION, SALES_BY_MONTH_PATH, SALES_PATH, sale_month
+from scripts.migrations import Batched, Context
+
+# SaleRepo lee los rangos de fechas de las particiones solo cuando esta migración terminó
+NAME = PARTITIONS_MIGRATION
+
+
+def copy_to_partition(sid: str, sale: Any, ctx: Context) -> Dict[str, Any]:
+    if not isinstance(sale, dict):
+        return {}
+    month = sale_month(sale)
+    return {f"{SALES_BY_MONTH_PATH}/{month}/{sid}": sale} if month else {}
+
+
+STEPS = [Batched(SALES_PATH, copy_to_partition)]
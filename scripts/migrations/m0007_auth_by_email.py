@@ -0,0 +1,16 @@
+# Crea /_indexes/auth_by_email/{email} = {uid, email, role, disabled, password} (login en una lectura).
+from typing import Any, Dict
+
+from app.repositories.user_repo import AUTH_INDEX_PATH, USERS_PATH, auth_entry, email_key
+from scripts.migrations import Batched, Context
+
+NAME = "2026-10-build-auth-by-email-index"
+
+
+def project_user(uid: str, profile: Any, ctx: Context) -> Dict[str, Any]:
+    if not isinstance(profile, dict) or not profile.get("email"):
+        return {}
+    return {f"{AUTH_INDEX_PATH}/{email_key(profile['email'])}": auth_entry(uid, profile)}
+
+
+STEPS = [Batched(USERS_PATH, project_user)]
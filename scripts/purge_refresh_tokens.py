@@ -0,0 +1,36 @@
+# scripts/purge_refresh_tokens.py
+# Borra de /_refresh_tokens los tokens vencidos (los que nunca se canjearon ni
+# revocaron). /auth/refresh ya rechaza los vencidos; esto solo libera espacio.
+#
+#   python scripts/purge_refresh_tokens.py
+import sys, os, argparse
+from typing import List, Optional
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from app.core.firebase import init_firebase
+from app.repositories.refresh_token_repo import RefreshTokenRepo
+
+BATCH_SIZE = int(os.getenv("MIGRATION_BATCH_SIZE", "500"))
+
+def purge(batch_size: int = BATCH_SIZE) -> int:
+    total = 0
+    while True:
+        removed = RefreshTokenRepo.purge_expired(batch_size)
+        total += removed
+        if removed < batch_size:
+            break
+    print(f"{total} refresh tokens vencidos eliminados")
+    return total
+
+def run(argv: Optional[List[str]] = None):
+    p = argparse.ArgumentParser(description="Elimina los refresh tokens vencidos")
+    p.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = p.parse_args(argv)
+    init_firebase()
+    purge(args.batch_size)
+
+if __name__ == "__main__":
+    run()
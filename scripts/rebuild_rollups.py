@@ -0,0 +1,49 @@
+# scripts/rebuild_rollups.py
+# Recalcula /_rollups/sales desde las ventas crudas.
+# Correr en una ventana de poco tráfico: las ventas que entren durante el
+# recálculo pueden quedar fuera (volver a correrlo lo corrige).
+import sys, os, time
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from app.core.firebase import init_firebase
+from app.repositories.rollup_repo import RollupRepo, ROLLUPS_PATH
+from app.repositories.sale_repo import SaleRepo
+
+PAGE_SIZE = int(os.getenv("MIGRATION_BATCH_SIZE", "500"))
+
+def _nest(flat: dict, root: str) -> dict:
+    """{'/_rollups/sales/day/2025-10-01/count': 3} -> {'day': {'2025-10-01': {'count': 3}}}"""
+    out: dict = {}
+    prefix = root.rstrip("/") + "/"
+    for path, value in flat.items():
+        if not value:
+            continue
+        parts = path[len(prefix):].split("/")
+        node = out
+        for p in parts[:-1]:
+            node = node.setdefault(p, {})
+        node[parts[-1]] = value
+    return out
+
+def rebuild(page_size: int = PAGE_SIZE, dry_run: bool = False) -> int:
+    started = time.time()
+    totals: dict = {}
+    count = 0
+    # activas + meses archivados
+    for sale in SaleRepo.iter_all(page_size):
+        RollupRepo.merge(totals, RollupRepo.deltas(sale, +1))
+        count += 1
+    if not dry_run:
+        RollupRepo.replace_all(_nest(totals, ROLLUPS_PATH) or None)
+    print(f"Rollups recalculados desde {count} ventas en {time.time() - started:.1f}s")
+    return count
+
+def run():
+    init_firebase()
+    rebuild()
+
+if __name__ == "__main__":
+    run()
@@ -4,6 +4,7 @@ from datetime import datetime
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 from app.core.firebase import init_firebase, rtdb
+from app.repositories.user_repo import auth_entry
 
 
 def hash_password(password: str) -> str:
@@ -30,6 +31,7 @@ def run():
     rtdb().update({
         f"/users/{uid}": profile,
         f"/_indexes/email_to_uid/{email.replace('.', ',')}": uid,
+        f"/_indexes/auth_by_email/{email.replace('.', ',')}": auth_entry(uid, profile),
     })
     print("Perfil superadmin insertado solo en RTDB.")
 
@@ -0,0 +1,132 @@
+# Las pruebas corren contra el emulador en memoria (sin Firebase ni red).
+import os
+import sys
+
+os.environ["RTDB_BACKEND"] = "memory"
+os.environ.setdefault("PASSWORD_BCRYPT_ROUNDS", "4")  # bcrypt barato en pruebas
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+import pytest
+
+from app.core.firebase import memory_tree
+
+
+def _reset_caches():
+    from app.core.token_cache import token_cache
+    from app.repositories import sale_repo, user_repo
+    from app.services.product_service import product_catalog
+
+    product_catalog.invalidate()
+    sale_repo._partitions.update(ready=False, checked_at=None)
+    user_repo._auth_cache.clear()
+    token_cache.clear()
+    token_cache._revoked.clear()
+
+
+@pytest.fixture(autouse=True)
+def tree():
+    """Árbol vacío (y cachés de proceso vacías) en cada prueba."""
+    t = memory_tree()
+    t.set("/", None)
+    _reset_caches()
+    yield t
+    t.set("/", None)
+    _reset_caches()
+
+
+class SdkClient:
+    """
+    Cliente HTTP falso para firebase_admin.db.Reference: atiende sus llamadas
+    (GET/PUT/PATCH/DELETE, ETag e if-match) sobre el árbol en memoria. Así las
+    pruebas pasan por el Reference real del SDK, con sus validaciones.
+    """
+
+    def __init__(self, tree):
+        self.tree = tree
+        self.before_conditional_put = None  # hook para simular otro cliente escribiendo
+
+    @staticmethod
+    def _path(url):
+        return url[:-len(".json")] if url.endswith(".json") else url
+
+    @staticmethod
+    def etag(value):
+        import hashlib, json
+        return hashlib.sha1(json.dumps(value, sort_keys=True).encode()).hexdigest()
+
+    def request(self, method, url, **kwargs):
+        path, value = self._path(url), kwargs.get("json")
+        if method == "put":
+            self.tree.set(path, value)
+        elif method == "patch":
+            self.tree.update(path, value)
+        elif method == "delete":
+            self.tree.delete(path)
+        else:
+            raise AssertionError(f"método no soportado: {method}")
+
+    def body(self, method, url, **kwargs):
+        if method != "get":
+            return self.request(method, url, **kwargs)
+        import httpx
+        from app.core.rtdb_memory import MemoryTransport
+
+        path = self._path(url) or "/"
+        return MemoryTransport(self.tree)._get(path, httpx.QueryParams(kwargs.get("params") or ""))
+
+    def headers_and_body(self, method, url, **kwargs):
+        value = self.tree.get(self._path(url))
+        return {"ETag": self.etag(value)}, value
+
+    def headers(self, method, url, **kwargs):
+        from firebase_admin import exceptions
+
+        path = self._path(url)
+        if self.before_conditional_put is not None:
+            hook, self.before_conditional_put = self.before_conditional_put, None
+            hook()
+        current = self.tree.get(path)
+        if kwargs["headers"]["if-match"] != self.etag(current):
+            response = type("Response", (), {
+                "headers": {"ETag": self.etag(current)}, "json": lambda self: current,
+            })()
+            raise exceptions.FailedPreconditionError("etag distinto", http_response=response)
+        self.tree.set(path, kwargs["json"])
+        return {"ETag": self.etag(kwargs["json"])}
+
+
+@pytest.fixture
+def sdk_client(tree):
+    return SdkClient(tree)
+
+
+@pytest.fixture
+def sdk_rtdb(sdk_client):
+    """Como app.core.firebase.rtdb, pero devuelve Reference del SDK real."""
+    from firebase_admin import db
+
+    return lambda path="/": db.Reference(client=sdk_client, path=path)
+
+
+@pytest.fixture(scope="session")
+def client():
+    # una sola app por sesión: el shutdown cierra el pool de bcrypt del proceso
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture
+def user():
+    """Usuario admin con contraseña "pw"; devuelve su perfil con uid."""
+    from app.core.passwords import password_hasher
+    from app.repositories.user_repo import UserRepo
+
+    profile = {"email": "admin@x.com", "display_name": "Admin", "role": "admin",
+               "disabled": False, "password": password_hasher.hash("pw")}
+    return {"uid": UserRepo.create(profile), **profile}
@@ -0,0 +1,14 @@
+import pytest
+
+from scripts import generate_data
+
+
+def test_reset_is_refused_against_real_firebase(tree, monkeypatch):
+    tree.set("/products/p1", {"name": "Agua", "price": 1, "status": "active"})
+    monkeypatch.setattr(generate_data, "use_memory", lambda: False)
+    monkeypatch.setattr(generate_data, "init_firebase", lambda: pytest.fail("no debe conectarse"))
+
+    with pytest.raises(SystemExit) as exc:
+        generate_data.run(["--reset", "--allow-remote"])
+    assert "--reset" in str(exc.value)
+    assert tree.get("/products/p1") is not None
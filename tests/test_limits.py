@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+from app.core import limits
+from app.core.limits import ConcurrencyLimiter, LimiterBusy, limiter_for
+from app.core.security import create_access_token
+
+
+def test_limiter_queues_then_rejects():
+    async def scenario():
+        limiter = ConcurrencyLimiter("t", limit=1, max_queue=1, queue_timeout=0.05)
+        await limiter.acquire()
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(LimiterBusy):  # cola llena
+            await limiter.acquire()
+        limiter.release()  # el cupo pasa al que esperaba
+        await waiter
+        assert limiter.active == 1
+        with pytest.raises(LimiterBusy):  # espera agotada
+            await limiter.acquire()
+        limiter.release()
+        return limiter.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["active"] == 0 and stats["queued"] == 0
+    assert (stats["admitted"], stats["rejected_full"], stats["rejected_timeout"]) == (2, 1, 1)
+
+
+def test_limiter_for_matches_prefixes():
+    assert limiter_for("/nlp/tts").name == "tts"
+    assert limiter_for("/api/transcribe").name == "transcribe"
+    assert limiter_for("/api/transcribe/health") is None
+    assert limiter_for("/nlp/ttsx") is None
+
+
+@pytest.fixture
+def full():
+    """Deja un grupo sin cupo ni cola."""
+    touched = []
+
+    def fill(name):
+        limiter = next(l for _, l in limits.ROUTE_LIMITS if l.name == name)
+        touched.append((limiter, limiter.active, limiter.max_queue))
+        limiter.active, limiter.max_queue = limiter.limit, 0
+        return limiter
+
+    yield fill
+    for limiter, active, max_queue in touched:
+        limiter.active, limiter.max_queue = active, max_queue
+
+
+def test_unauthenticated_tts_does_not_take_a_slot(client, full):
+    limiter = full("tts")  # lleno: si tomara cupo respondería 503
+    admitted = limiter.admitted
+    for headers in ({}, {"Authorization": "Bearer basura"}, {"Authorization": "Basic x"}):
+        r = client.post("/nlp/tts", json={"text": "hola"}, headers=headers)
+        assert r.status_code in (401, 403)
+    assert limiter.admitted == admitted and limiter.rejected_full == 0
+
+
+def test_authenticated_tts_gets_503_when_full(client, full):
+    full("tts")
+    token = create_access_token("admin@x.com", "admin", "u1")
+    r = client.post("/nlp/tts", json={"text": "hola"}, headers={"Authorization": f"Bearer {token}"})
+    assert r.status_code == 503
+    assert r.headers["retry-after"] == str(limits.LIMIT_RETRY_AFTER)
+
+
+def test_busy_websocket_is_accepted_and_closed_with_1013(client, full):
+    full("realtime_ws")
+    with client.websocket_connect("/api/realtime/ws") as ws:
+        with pytest.raises(WebSocketDisconnect) as exc:
+            ws.receive_json()
+    assert exc.value.code == 1013
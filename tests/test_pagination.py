@@ -0,0 +1,65 @@
+import pytest
+
+from app.core.firebase import key_page
+from app.core.pagination import NEXT_CURSOR_HEADER, cursor_key, decode_cursor, encode_cursor
+from app.core.security import create_access_token
+from app.models.product import ProductCreate
+from app.services.product_service import ProductService
+
+
+def test_cursor_round_trip():
+    position = {"t": 1760000000.5, "k": "-Nabc_ñ"}
+    cursor = encode_cursor(position)
+    assert "=" not in cursor and "/" not in cursor and "+" not in cursor
+    assert decode_cursor(cursor) == position
+    assert encode_cursor(None) is None and decode_cursor(None) is None
+    assert cursor_key(encode_cursor({"k": "s1"})) == "s1"
+
+
+@pytest.mark.parametrize("cursor", ["%%%", encode_cursor({"k": 3}), "WzFd", encode_cursor({"t": 1})])
+def test_invalid_cursor(cursor):
+    with pytest.raises(ValueError):
+        cursor_key(cursor)
+
+
+def test_key_page_walks_every_key_once(tree):
+    tree.set("/items", {f"k{i:02d}": i for i in range(7)})
+    seen, after = [], None
+    while True:
+        items, after = key_page("/items", 3, after)
+        seen += [k for k, _ in items]
+        if after is None:
+            break
+    assert seen == [f"k{i:02d}" for i in range(7)]
+    assert key_page("/items", 7)[1] is None
+
+
+def test_product_pages_follow_created_order(tree):
+    ids = [ProductService.create(ProductCreate(name=f"P{i}", price=i))["id"] for i in range(5)]
+    seen, cursor = [], None
+    while True:
+        page, cursor = ProductService.list_page(limit=2, cursor=cursor)
+        seen += [p["id"] for p in page]
+        if cursor is None:
+            break
+    assert seen == ids[::-1]  # más nuevos primero
+
+    with pytest.raises(ValueError):
+        ProductService.list_page(cursor=encode_cursor({"t": "x", "k": ids[0]}))
+
+
+def test_sales_endpoint_pages_with_header(client, tree):
+    tree.set("/sales", {f"s{i}": {"product_id": "p1", "quantity": 1, "total": 1.0,
+                                   "payment_method": "Efectivo", "date": f"2026-10-0{i + 1}T10:00:00+00:00",
+                                   "created_at": f"2026-10-0{i + 1}T10:00:00+00:00"} for i in range(3)})
+    headers = {"Authorization": f"Bearer {create_access_token('a@x.com', 'admin', 'u1')}"}
+
+    first = client.get("/sales", params={"limit": 2}, headers=headers)
+    assert [s["id"] for s in first.json()] == ["s0", "s1"]
+    rest = client.get("/sales", params={"limit": 2, "cursor": first.headers[NEXT_CURSOR_HEADER]}, headers=headers)
+    assert [s["id"] for s in rest.json()] == ["s2"]
+    assert NEXT_CURSOR_HEADER not in rest.headers
+
+    assert client.get("/sales", params={"cursor": "%%%"}, headers=headers).status_code == 400
+    assert client.get("/users", params={"cursor": "%%%"}, headers=headers).status_code == 400
+    assert client.get("/sales", params={"limit": 501}, headers=headers).status_code == 422
@@ -0,0 +1,75 @@
+import pytest
+
+from app.services import product_service
+from app.services.product_service import NAME_INDEX_PATH, ProductService
+
+
+def _csv(*rows):
+    return ["id,name,price,status\n", *[f"{r}\n" for r in rows]]
+
+
+def _by_action(result):
+    return {c["row"]: (c["action"], c.get("error")) for c in result["changes"]}
+
+
+def test_creates_updates_and_reports_unchanged(tree):
+    first = ProductService.import_csv(_csv("p1,Agua,1.5,", ",Gaseosa,2,inactive"))
+    assert (first["created"], first["updated"], first["failed"]) == (2, 0, 0)
+    gaseosa = next(c["id"] for c in first["changes"] if c["name"] == "Gaseosa")
+    assert tree.get(f"/products/{gaseosa}")["status"] == "inactive"
+    assert gaseosa in tree.get(NAME_INDEX_PATH).values()
+
+    # sin id se reconoce por nombre; igual precio => sin cambios
+    second = ProductService.import_csv(_csv("p1,Agua,1.50,", ",Gaseosa,2.5,"))
+    assert (second["created"], second["updated"], second["unchanged"]) == (0, 1, 1)
+    assert second["changes"][0]["changes"] == {"price": {"old": 2, "new": 2.5}}
+
+
+def test_dry_run_writes_nothing(tree):
+    result = ProductService.import_csv(_csv("p1,Agua,1.5,"), dry_run=True)
+    assert result["created"] == 1
+    assert tree.get("/products") is None
+
+
+@pytest.mark.parametrize("price", ["nan", "inf", "-inf", "-1", "abc", ""])
+def test_rejects_prices_that_are_not_finite_and_non_negative(tree, price):
+    result = ProductService.import_csv(_csv(f"p1,Agua,{price},", "p2,Pan,0,"))
+    assert result["failed"] == 1 and result["created"] == 1
+    assert _by_action(result)[2][0] == "error"
+    assert list(tree.get("/products")) == ["p2"]
+
+
+def test_nan_row_does_not_show_up_as_a_change_on_every_import(tree):
+    ProductService.import_csv(_csv("p1,Agua,1.5,"))
+    again = ProductService.import_csv(_csv("p1,Agua,NaN,"))
+    assert again["updated"] == 0 and again["failed"] == 1
+
+
+def test_row_errors(tree):
+    result = ProductService.import_csv(_csv("p1,,1,", "p2,Pan,1,borrado", "a/b,Sal,1,", "p3,Te,1,", "p3,Te,2,"))
+    errors = {row: err for row, (action, err) in _by_action(result).items() if action == "error"}
+    assert set(errors) == {2, 3, 4, 6}
+    assert "repetido" in errors[6]
+
+
+def test_failed_chunk_reports_what_was_applied(tree, monkeypatch):
+    monkeypatch.setattr(product_service, "IMPORT_CHUNK_SIZE", 2)
+    real = ProductService._write_import_chunk
+    calls = []
+
+    def flaky(chunk):
+        calls.append(len(chunk))
+        if len(calls) == 2:
+            raise RuntimeError("RTDB no responde")
+        real(chunk)
+
+    monkeypatch.setattr(ProductService, "_write_import_chunk", staticmethod(flaky))
+    result = ProductService.import_csv(_csv("p1,A,1,", "p2,B,1,", "p3,C,1,", "p4,D,1,", "p5,E,1,"))
+
+    assert calls == [2, 2]  # el tercer bloque ya no se intenta
+    assert sorted(tree.get("/products")) == ["p1", "p2"]
+    assert (result["created"], result["failed"], result["rows"]) == (2, 3, 5)
+    assert "fila 4" in result["write_error"]
+    assert {row: action for row, (action, _) in _by_action(result).items()} == {
+        2: "create", 3: "create", 4: "error", 5: "error", 6: "error",
+    }
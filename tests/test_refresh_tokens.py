@@ -0,0 +1,97 @@
+import time
+
+import pytest
+
+from app.repositories import refresh_token_repo
+from app.repositories.refresh_token_repo import REFRESH_TOKENS_PATH, RefreshTokenRepo, refresh_key
+
+
+@pytest.fixture(params=["memory", "sdk"])
+def backend(request, monkeypatch):
+    """Cada prueba corre con el emulador y con el Reference del SDK."""
+    if request.param == "sdk":
+        monkeypatch.setattr(refresh_token_repo, "rtdb", request.getfixturevalue("sdk_rtdb"))
+    return request.param
+
+
+def test_issue_stores_only_the_digest(backend, tree):
+    token, exp = RefreshTokenRepo.issue("u1", "a@x.com", 60)
+    stored = tree.get(REFRESH_TOKENS_PATH)
+    assert list(stored) == [refresh_key(token)]
+    assert stored[refresh_key(token)] == {"uid": "u1", "email": "a@x.com", "exp": exp}
+
+
+def test_consume_is_single_use(backend, tree):
+    token, _ = RefreshTokenRepo.issue("u1", "a@x.com", 60)
+    record = RefreshTokenRepo.consume(token)
+    assert record["uid"] == "u1" and record["email"] == "a@x.com"
+    assert RefreshTokenRepo.consume(token) is None
+    assert tree.get(REFRESH_TOKENS_PATH) is None
+
+
+def test_consume_unknown_token(backend):
+    assert RefreshTokenRepo.consume("no-existe") is None
+
+
+def test_consume_expired_token(backend, tree):
+    token, _ = RefreshTokenRepo.issue("u1", "a@x.com", -1)
+    assert RefreshTokenRepo.consume(token) is None
+    assert tree.get(REFRESH_TOKENS_PATH) is None
+
+
+def test_consume_race_only_one_wins(monkeypatch, sdk_rtdb, sdk_client):
+    monkeypatch.setattr(refresh_token_repo, "rtdb", sdk_rtdb)
+    token, _ = RefreshTokenRepo.issue("u1", "a@x.com", 60)
+    inner = []
+    # otro cliente canjea el mismo token entre la lectura y la escritura condicional
+    sdk_client.before_conditional_put = lambda: inner.append(RefreshTokenRepo.consume(token))
+    assert RefreshTokenRepo.consume(token) is None
+    assert inner and inner[0]["uid"] == "u1"
+
+
+def test_revoke_and_purge(backend, tree):
+    token, _ = RefreshTokenRepo.issue("u1", "a@x.com", 60)
+    RefreshTokenRepo.revoke(token)
+    assert RefreshTokenRepo.consume(token) is None
+
+    tree.set(f"{REFRESH_TOKENS_PATH}/viejo", {"uid": "u", "email": "e", "exp": int(time.time()) - 5})
+    keep, _ = RefreshTokenRepo.issue("u2", "b@x.com", 60)
+    assert RefreshTokenRepo.purge_expired() == 1
+    assert list(tree.get(REFRESH_TOKENS_PATH)) == [refresh_key(keep)]
+
+
+def _login(client, email="admin@x.com", password="pw"):
+    r = client.post("/auth/login", params={"email": email, "password": password})
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def test_refresh_endpoint_rotates_the_token(client, user):
+    tokens = _login(client)
+    r = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert r.status_code == 200
+    renewed = r.json()
+    assert renewed["refresh_token"] != tokens["refresh_token"]
+    assert client.get("/products", headers={"Authorization": f"Bearer {renewed['access_token']}"}).status_code == 200
+    # el token usado ya no sirve
+    assert client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 401
+
+
+def test_refresh_token_is_not_accepted_in_the_query_string(client, user):
+    tokens = _login(client)
+    r = client.post("/auth/refresh", params={"refresh_token": tokens["refresh_token"]})
+    assert r.status_code == 422
+
+
+def test_logout_revokes_the_refresh_token(client, user):
+    tokens = _login(client)
+    assert client.post("/auth/logout", json={"refresh_token": tokens["refresh_token"]}).status_code == 204
+    assert client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 401
+
+
+def test_refresh_rejects_disabled_users(client, user):
+    from app.repositories.user_repo import UserRepo
+
+    tokens = _login(client)
+    UserRepo.upsert_profile(user["uid"], {**{k: v for k, v in user.items() if k != "uid"}, "disabled": True})
+    assert client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 403
@@ -0,0 +1,102 @@
+import pytest
+
+from app.core import replica as replica_module
+from app.core.replica import ReadReplica
+from app.repositories import sale_repo
+from app.repositories.sale_repo import PARTITIONS_MIGRATION, SALES_PATH, SaleRepo
+from app.repositories.user_repo import UserRepo
+from scripts import migrate
+
+
+def _sale(date, total=10.0, product_id="p1"):
+    return {"product_id": product_id, "quantity": 1, "payment_method": "Efectivo", "date": date, "total": total}
+
+
+@pytest.fixture
+def replica(tmp_path, monkeypatch):
+    # sin el hilo de refresco: la prueba llama sync_sales() cuando quiere
+    monkeypatch.setattr(ReadReplica, "_refresh_loop", lambda self: None)
+    r = ReadReplica(str(tmp_path / "replica.sqlite3"))
+    r.start()
+    monkeypatch.setattr(replica_module, "_replica", r)
+    yield r
+    r.close()
+
+
+def _ids(sales):
+    return [s["id"] for s in sales]
+
+
+def test_sales_not_served_until_partitions_are_complete(tree, replica):
+    tree.set(f"{SALES_PATH}/legacy1", _sale("2025-09-10T10:00:00"))
+    SaleRepo.create("-new1", _sale("2026-10-01T09:00:00"))
+
+    replica.sync_sales()
+    assert not replica.ready("sales")
+    # mientras tanto los repos leen RTDB y ven toda la historia
+    assert _ids(SaleRepo.iter_by_date("2025-09-01", None)) == ["legacy1", "-new1"]
+    page, _ = SaleRepo.list_page(10)
+    assert _ids(page) == ["-new1", "legacy1"]
+
+    migrate.run(["--only", PARTITIONS_MIGRATION])
+    sale_repo._partitions.update(ready=False, checked_at=None)
+    replica.sync_sales()
+    assert replica.ready("sales")
+    reads = replica.reads
+    assert _ids(SaleRepo.iter_by_date("2025-09-01", None)) == ["legacy1", "-new1"]
+    page, _ = SaleRepo.list_page(10)
+    assert _ids(page) == ["-new1", "legacy1"]
+    assert replica.reads == reads + 2
+
+
+def test_live_month_changes_reach_the_replica(tree, replica):
+    tree.set(f"/_migrations/{PARTITIONS_MIGRATION}", {"status": "done"})
+    replica.sync_sales()
+    assert replica.ready("sales")
+
+    # escritura de otro proceso: llega por el listener del mes vivo
+    tree.set("/sales_by_month/2026-10/-other", _sale("2026-10-02T10:00:00", 3.0))
+    assert [(s["id"], s["total"]) for s in replica.iter_sales("2026-10-01", None)] == [("-other", 3.0)]
+
+    SaleRepo.remove("-other", _sale("2026-10-02T10:00:00", 3.0))
+    assert list(replica.iter_sales()) == []
+
+
+def test_users_and_products_are_mirrored(tree, replica):
+    uid = UserRepo.create({"email": "a@x.com", "role": "user", "disabled": False, "password": "h"})
+    tree.set("/products/p1", {"name": "Agua", "price": 1.5})
+    assert replica.ready("users") and replica.ready("products")
+    assert replica.user_by_email("a@x.com")["uid"] == uid
+    assert replica.products() == {"p1": {"name": "Agua", "price": 1.5}}
+
+
+def _page_all(limit, after=None):
+    seen = []
+    while True:
+        page, after = SaleRepo.list_page(limit, after)
+        seen += _ids(page)
+        if after is None:
+            return seen
+
+
+def test_replica_pages_in_rtdb_key_order(tree, replica):
+    keys = ["10", "9", "-0", "007", "2147483648", "-5", "a", "-Nxyz", "0"]
+    for key in keys:
+        SaleRepo.create(key, _sale("2026-10-03T10:00:00"))
+    expected = ["-5", "0", "9", "10", "-0", "-Nxyz", "007", "2147483648", "a"]
+
+    assert not replica.ready("sales")
+    assert _page_all(2) == expected  # RTDB (key_page)
+    first, cursor = SaleRepo.list_page(3)
+
+    tree.set(f"/_migrations/{PARTITIONS_MIGRATION}", {"status": "done"})
+    sale_repo._partitions.update(ready=False, checked_at=None)
+    replica.sync_sales()
+    assert replica.ready("sales")
+    reads = replica.reads
+    assert _page_all(2) == expected  # réplica
+    assert replica.reads > reads
+
+    # un cursor emitido por RTDB sigue valiendo contra la réplica
+    rest = _page_all(3, cursor)
+    assert _ids(first) + rest == expected
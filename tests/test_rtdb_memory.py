@@ -0,0 +1,50 @@
+import threading
+
+import pytest
+
+from app.core.rtdb_memory import MemoryTree
+
+
+def test_transaction_rejects_none_like_the_sdk():
+    tree = MemoryTree({"a": {"b": 1}})
+    with pytest.raises(ValueError):
+        tree.reference("/a/b").transaction(lambda current: None)
+    assert tree.get("/a/b") == 1
+
+
+def test_transaction_propagates_abort_from_callback():
+    tree = MemoryTree({"a": 1})
+
+    class Abort(Exception):
+        pass
+
+    def abort(current):
+        raise Abort()
+
+    with pytest.raises(Abort):
+        tree.reference("/a").transaction(abort)
+    assert tree.get("/a") == 1
+
+
+def test_transaction_runs_listeners_outside_the_lock():
+    tree = MemoryTree({"n": 1})
+    seen = []
+
+    def on_event(event):
+        # otro hilo tiene que poder escribir mientras corre el callback
+        t = threading.Thread(target=tree.set, args=("/other", 1))
+        t.start()
+        t.join(timeout=2)
+        seen.append((event.path, event.data, t.is_alive()))
+
+    tree.listen("/n", on_event)
+    seen.clear()
+    assert tree.reference("/n").transaction(lambda current: current + 1) == 2
+    assert seen == [("/", 2, False)]
+    assert tree.get("/other") == 1
+
+
+def test_update_rejects_ancestor_and_descendant():
+    tree = MemoryTree()
+    with pytest.raises(ValueError):
+        tree.update("/", {"/a": 1, "/a/b": 2})
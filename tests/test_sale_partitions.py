@@ -0,0 +1,89 @@
+import pytest
+
+from app.repositories import sale_repo
+from app.repositories.sale_repo import (
+    ARCHIVED_IDS_PATH, PARTITIONS_MIGRATION, SALES_BY_MONTH_PATH, SALES_PATH, SaleRepo, _merge_pages,
+)
+from scripts import archive_sales, migrate
+
+
+def _sale(date, total=10.0, product_id="p1"):
+    return {"product_id": product_id, "quantity": 1, "payment_method": "Efectivo", "date": date, "total": total}
+
+
+def _ids(sales):
+    return [s["id"] for s in sales]
+
+
+def _migrate_partitions():
+    migrate.run(["--only", PARTITIONS_MIGRATION])
+    sale_repo._partitions.update(ready=False, checked_at=None)
+
+
+def test_merge_pages_interleaves_hot_and_archived_by_key():
+    hot = [("-b", {"n": 2}), ("-d", {"n": 4})]
+    archived = [("-a", "2025-01"), ("-c", "2025-02")]
+    page, next_key = _merge_pages(hot, None, archived, None, 3)
+    assert [(k, arch) for k, _, arch in page] == [("-a", True), ("-b", False), ("-c", True)]
+    assert next_key == "-c"
+
+    page, next_key = _merge_pages(hot, None, archived, None, 10)
+    assert len(page) == 4 and next_key is None
+
+    # si alguna de las dos fuentes tiene más, hay página siguiente aunque esta no se llene
+    page, next_key = _merge_pages(hot, "-d", [], None, 10)
+    assert next_key == "-d"
+
+
+def test_iter_by_date_reads_sales_until_the_partition_migration_is_done(tree):
+    # venta anterior al despliegue: solo en /sales
+    tree.set(f"{SALES_PATH}/legacy1", _sale("2025-09-10T10:00:00"))
+    # la primera venta nueva crea su partición
+    SaleRepo.create("-new1", _sale("2026-10-01T09:00:00"))
+    assert SaleRepo.months() == ["2026-10"]
+
+    assert _ids(SaleRepo.iter_by_date("2025-09-01", "2026-12-31")) == ["legacy1", "-new1"]
+
+    _migrate_partitions()
+    assert sale_repo.partitions_ready()
+    assert tree.get(f"{SALES_BY_MONTH_PATH}/2025-09/legacy1")["total"] == 10.0
+    assert _ids(SaleRepo.iter_by_date("2025-09-01", "2026-12-31")) == ["legacy1", "-new1"]
+    # solo los meses del rango
+    assert _ids(SaleRepo.iter_by_date("2026-10-01", None)) == ["-new1"]
+
+
+def test_partitions_ready_accepts_the_legacy_checkpoint_format(tree):
+    tree.set(f"/_migrations/{PARTITIONS_MIGRATION}", 1700000000)
+    assert sale_repo.partitions_ready()
+
+
+def test_archive_refuses_before_the_partition_migration(tree):
+    tree.set(f"{SALES_PATH}/legacy1", _sale("2025-09-10T10:00:00"))
+    with pytest.raises(SystemExit):
+        archive_sales.run(["--months", "1"])
+    assert tree.get(f"{SALES_PATH}/legacy1") is not None
+
+
+def test_archived_sales_stay_visible(tree):
+    SaleRepo.create("-a1", _sale("2025-08-10T10:00:00", 5.0))
+    SaleRepo.create("-a2", _sale("2025-09-10T10:00:00", 7.0))
+    SaleRepo.create("-h1", _sale("2026-10-05T10:00:00", 11.0))
+    _migrate_partitions()
+
+    counts = archive_sales.archive(hot_months=1)
+    assert counts == {"2025-08": 1, "2025-09": 1}
+    assert sorted(tree.get(SALES_PATH)) == ["-h1"]
+    assert tree.get(ARCHIVED_IDS_PATH) == {"-a1": "2025-08", "-a2": "2025-09"}
+
+    # por id, en el listado por clave (paginado), por fecha y en el export completo
+    assert SaleRepo.get_by_id("-a1")["total"] == 5.0
+    first, cursor = SaleRepo.list_page(2)
+    second, last = SaleRepo.list_page(2, cursor)
+    assert _ids(first) + _ids(second) == ["-a1", "-a2", "-h1"] and last is None
+    assert _ids(SaleRepo.iter_by_date("2025-01-01", None)) == ["-a1", "-a2", "-h1"]
+    assert sorted(_ids(SaleRepo.iter_all())) == ["-a1", "-a2", "-h1"]
+
+    # borrar una archivada limpia también su entrada en el índice
+    SaleRepo.remove("-a1", SaleRepo.get_by_id("-a1"))
+    assert SaleRepo.get_by_id("-a1") is None
+    assert tree.get(ARCHIVED_IDS_PATH) == {"-a2": "2025-09"}
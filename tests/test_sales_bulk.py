@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+from app.repositories.sale_repo import SaleRepo
+from app.services import sale_service
+from app.services.sale_service import SaleService, parse_bulk_body
+
+
+@pytest.fixture
+def products(tree):
+    tree.set("/products", {"p1": {"name": "Agua", "price": 1.5, "status": "active"}})
+
+
+def _sale(**extra):
+    return {"product_id": "p1", "quantity": 2, **extra}
+
+
+def test_parse_json_and_ndjson():
+    assert parse_bulk_body(json.dumps([_sale()]).encode()) == [_sale()]
+    ndjson = (json.dumps(_sale()) + "\n\n" + json.dumps(_sale(quantity=1))).encode()
+    assert len(parse_bulk_body(ndjson, "application/x-ndjson")) == 2
+    for bad in (b"", b"[1,", b'{"a":1}\n{', b"\xff"):
+        with pytest.raises(ValueError):
+            parse_bulk_body(bad)
+
+
+def test_bulk_writes_in_chunks_and_reports_each_item(tree, products, monkeypatch):
+    monkeypatch.setattr(sale_service, "BULK_CHUNK_SIZE", 2)
+    chunks = []
+    real = SaleRepo.create_many
+    monkeypatch.setattr(SaleRepo, "create_many", staticmethod(lambda sales: (chunks.append(len(sales)), real(sales))))
+
+    items = [_sale(), _sale(product_id="nope"), _sale(payment_method="Bitcoin"), _sale(), _sale(payment_method="Yape")]
+    result = SaleService.create_bulk(items)
+
+    assert chunks == [2, 1]
+    assert (result["received"], result["created"], result["failed"]) == (5, 3, 2)
+    assert result["write_error"] is None
+    ids = [r["id"] for r in result["results"] if r["ok"]]
+    assert sorted(tree.get("/sales")) == sorted(ids)
+    assert tree.get(f"/sales/{ids[0]}")["total"] == 3.0
+    assert [r["ok"] for r in result["results"]] == [True, False, False, True, True]
+
+
+def test_failed_chunk_stops_and_keeps_earlier_ids(tree, products, monkeypatch):
+    monkeypatch.setattr(sale_service, "BULK_CHUNK_SIZE", 2)
+    real = SaleRepo.create_many
+    calls = []
+
+    def flaky(sales):
+        calls.append(len(sales))
+        if len(calls) == 2:
+            raise RuntimeError("RTDB no responde")
+        real(sales)
+
+    monkeypatch.setattr(SaleRepo, "create_many", staticmethod(flaky))
+    result = SaleService.create_bulk([_sale() for _ in range(5)])
+
+    assert calls == [2, 2]  # el último bloque ya no se intenta
+    assert result["created"] == 2 and result["failed"] == 3
+    assert "item 2" in result["write_error"]
+    written = [r["id"] for r in result["results"] if r["ok"]]
+    assert sorted(tree.get("/sales")) == sorted(written)
+    assert all(r.get("id") is None and r["error"] for r in result["results"][2:])
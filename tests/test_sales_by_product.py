@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.security import create_access_token
+from app.models.sale import SaleCreate
+from app.repositories.sale_repo import SALES_BY_PRODUCT_PATH, SaleRepo
+from app.services.sale_service import SaleService
+from scripts import migrate
+from scripts.migrations import m0005_sales_by_product_index
+
+
+@pytest.fixture
+def sales(tree):
+    tree.set("/products", {
+        "p1": {"name": "Agua", "price": 1.5, "status": "active"},
+        "p2": {"name": "Pan", "price": 0.5, "status": "active"},
+    })
+    created = {"p1": [], "p2": []}
+    for day, product_id in [(1, "p1"), (2, "p2"), (3, "p1"), (4, "p1")]:
+        sale = SaleService.create(SaleCreate(product_id=product_id, quantity=1, date=f"2026-10-0{day}T12:00:00+00:00"))
+        created[product_id].append(sale.id)
+    return created
+
+
+def test_create_and_delete_maintain_the_index(tree, sales):
+    index = tree.get(f"{SALES_BY_PRODUCT_PATH}/p1")
+    assert list(index) == sales["p1"]
+    assert index[sales["p1"][0]].startswith("2026-10-01")
+
+    SaleService.delete(sales["p1"][0])
+    assert list(tree.get(f"{SALES_BY_PRODUCT_PATH}/p1")) == sales["p1"][1:]
+
+
+def test_list_by_product_pages_only_that_product(sales):
+    page, after = SaleRepo.list_by_product("p1", limit=2)
+    assert [s["id"] for s in page] == sales["p1"][:2]
+    rest, after = SaleRepo.list_by_product("p1", limit=2, after=after)
+    assert [s["id"] for s in rest] == sales["p1"][2:] and after is None
+
+    async_page, _ = asyncio.run(SaleRepo.alist_by_product("p1", limit=2))
+    assert async_page == page
+
+
+def test_iter_by_product_uses_the_date_window(sales):
+    found = SaleRepo.iter_by_product("p1", "2026-10-02", "2026-10-03T23:59:59")
+    assert [s["id"] for s in found] == [sales["p1"][1]]
+
+
+def test_product_sales_endpoint(client, sales):
+    headers = {"Authorization": f"Bearer {create_access_token('a@x.com', 'admin', 'u1')}"}
+    first = client.get("/products/p1/sales", params={"limit": 2}, headers=headers)
+    assert [s["id"] for s in first.json()] == sales["p1"][:2]
+    rest = client.get("/products/p1/sales", params={"cursor": first.headers[NEXT_CURSOR_HEADER]}, headers=headers)
+    assert [s["id"] for s in rest.json()] == sales["p1"][2:]
+    assert client.get("/products/nope/sales", headers=headers).status_code == 404
+
+
+def test_migration_backfills_the_index(tree, sales):
+    tree.set(SALES_BY_PRODUCT_PATH, None)
+    migrate.run(["--only", m0005_sales_by_product_index.NAME])
+    assert list(tree.get(f"{SALES_BY_PRODUCT_PATH}/p1")) == sales["p1"]
+    assert list(tree.get(f"{SALES_BY_PRODUCT_PATH}/p2")) == sales["p2"]
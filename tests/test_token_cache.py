@@ -0,0 +1,79 @@
+import time
+
+import pytest
+from fastapi import HTTPException
+from jose import jwt
+
+from app.core import token_cache as token_cache_module
+from app.core.deps import user_from_token
+from app.core.security import ALGORITHM, SECRET_KEY, create_access_token
+from app.core.token_cache import TokenCache, token_cache, token_digest
+
+CLAIMS = {"uid": "u1", "email": "a@x.com", "role": "admin"}
+
+
+def test_hit_miss_and_exp_bound(monkeypatch):
+    cache = TokenCache(max_size=10, ttl=300)
+    now = time.time()
+    cache.put(b"a", CLAIMS, exp=int(now) + 1000)
+    cache.put(b"b", CLAIMS, exp=int(now) + 5)  # vence antes que el TTL
+    assert cache.get(b"a") == CLAIMS and cache.get(b"x") is None
+
+    monkeypatch.setattr(token_cache_module.time, "time", lambda: now + 10)
+    assert cache.get(b"b") is None and cache.get(b"a") == CLAIMS
+    assert (cache.hits, cache.misses, cache.expired) == (2, 2, 1)
+
+
+def test_lru_eviction():
+    cache = TokenCache(max_size=2)
+    for digest in (b"a", b"b"):
+        cache.put(digest, CLAIMS, exp=None)
+    cache.get(b"a")  # b queda como el menos usado
+    cache.put(b"c", CLAIMS, exp=None)
+    assert cache.get(b"b") is None and cache.get(b"a") and cache.get(b"c")
+    assert cache.evictions == 1
+
+
+def test_revoke_uid_drops_entries_and_older_tokens():
+    cache = TokenCache()
+    cache.put(b"a", CLAIMS, exp=None, iat=time.time() - 1)
+    assert cache.revoke_uid("u1") == 1
+    assert cache.get(b"a") is None
+    assert cache.is_revoked("u1", time.time() - 1)
+    assert not cache.is_revoked("u2", 0)
+    cache.put(b"old", CLAIMS, exp=None, iat=time.time() - 1)  # verificado durante la revocación
+    assert cache.get(b"old") is None
+
+
+def test_login_in_the_same_second_as_the_revocation_is_valid(tree):
+    before = create_access_token("a@x.com", "admin", "u1")
+    token_cache.revoke_uid("u1")
+    after = create_access_token("a@x.com", "admin", "u1")
+
+    assert jwt.get_unverified_claims(after)["iat"] > jwt.get_unverified_claims(before)["iat"]
+    with pytest.raises(HTTPException) as exc:
+        user_from_token(before)
+    assert exc.value.status_code == 401
+    assert user_from_token(after)["uid"] == "u1"
+    assert token_cache.get(token_digest(after)) is not None
+
+
+def test_integer_iat_from_the_revocation_second_is_rejected(tree):
+    # tokens emitidos antes del cambio (iat entero) en el mismo segundo de la revocación
+    token_cache.revoke_uid("u1")
+    claims = {"sub": "a@x.com", "role": "admin", "uid": "u1", "iat": int(time.time()), "exp": int(time.time()) + 60}
+    with pytest.raises(HTTPException):
+        user_from_token(jwt.encode(claims, SECRET_KEY, algorithm=ALGORITHM))
+
+
+def test_revocations_are_pruned_after_the_token_lifetime(monkeypatch):
+    cache = TokenCache(revoke_ttl=60)
+    now = time.time()
+    cache.revoke_uid("u1")
+    monkeypatch.setattr(token_cache_module.time, "time", lambda: now + 61)
+    cache.revoke_uid("u2")
+    assert set(cache._revoked) == {"u2"}
+
+    monkeypatch.setattr(token_cache_module.time, "time", lambda: now + 200)
+    assert not cache.is_revoked("u2", 0)
+    assert cache._revoked == {}
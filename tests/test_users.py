@@ -0,0 +1,25 @@
+from app.core.passwords import PasswordHasherBusy, password_hasher
+from app.core.security import create_access_token
+
+
+def _superadmin():
+    return {"Authorization": f"Bearer {create_access_token('root@x.com', 'superadmin', 'u0')}"}
+
+
+def test_create_user(client, tree):
+    body = {"email": "nuevo@x.com", "display_name": "Nuevo", "password": "pw"}
+    r = client.post("/users", json=body, headers=_superadmin())
+    assert r.status_code == 200 and r.json()["email"] == "nuevo@x.com"
+    assert client.post("/users", json=body, headers=_superadmin()).status_code == 400  # ya existe
+
+
+def test_create_user_when_hasher_is_busy(client, tree, monkeypatch):
+    def busy(_password):
+        raise PasswordHasherBusy("Demasiados logins en cola")
+
+    monkeypatch.setattr(password_hasher, "hash", busy)
+    body = {"email": "nuevo@x.com", "display_name": "Nuevo", "password": "pw"}
+    r = client.post("/users", json=body, headers=_superadmin())
+    assert r.status_code == 503
+    assert r.headers["retry-after"] == "2"
+    assert tree.get("/users") is None